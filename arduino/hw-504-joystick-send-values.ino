@@ -25,6 +25,30 @@ int redPin = 6;
 int bluePin = 7;
 
 
+// Serial link, keep in sync with computer-bridge.py (BAUD_RATE, BINARY_FRAMES)
+// The defaults are the original text link. The fast link, measured with the emulator first
+// (python -m autocar.arduino --binary --baud 115200 --period 0.005 --changes-only):
+//   BAUD_RATE 115200, BINARY_FRAMES true, LOOP_DELAY_MS 5, SEND_CHANGES_ONLY true
+const long BAUD_RATE = 9600;
+const bool BINARY_FRAMES = false;          // 6 byte frames with a CRC instead of text lines, see autocar/framing.py
+const unsigned long LOOP_DELAY_MS = 50;    // 50 caps the samples at 20 Hz
+const bool SEND_CHANGES_ONLY = false;      // send a sample only when the stick moved (or as a keepalive)
+const int CHANGE_THRESHOLD = 4;            // counts, above the analogRead jitter
+const unsigned long KEEPALIVE_MS = 200;    // a sample at least this often even if nothing changed
+
+// Binary frame: 0xA5 | kind << 4 | seq | payload | CRC-8
+const byte SYNC = 0xA5;
+const byte FRAME_SAMPLE = 1;
+const byte FRAME_SENDING_ON = 2;
+const byte FRAME_SENDING_OFF = 3;
+byte frameSeq = 0;
+
+// Last sample sent, for SEND_CHANGES_ONLY
+int lastX = -1000;
+int lastY = -1000;
+int lastSw = -1;
+unsigned long lastSentTime = 0;
+
 // Double press variables
 unsigned long lastPressTime = 0;
 const unsigned long doublePressDelay = 500; // max time between presses in milliseconds
@@ -33,7 +57,7 @@ bool sendingEnabled = false;
 
 void setup() {
   pinMode(SW_pin, INPUT_PULLUP); // internal pullup resistor
-  Serial.begin(9600);
+  Serial.begin(BAUD_RATE);
 
   pinMode(redPin, OUTPUT);
   pinMode(bluePin, OUTPUT);
@@ -61,8 +85,13 @@ void loop() {
     if (pressCount == 2) {
       sendingEnabled = !sendingEnabled; // toggle sending
       pressCount = 0;
-      Serial.print("SENDING_");
-      Serial.println(sendingEnabled ? "ON" : "OFF");
+      lastSw = -1;  // send the first sample after a toggle whatever it is
+      if (BINARY_FRAMES) {
+        sendFrame(sendingEnabled ? FRAME_SENDING_ON : FRAME_SENDING_OFF, 0, 0, 0);
+      } else {
+        Serial.print("SENDING_");
+        Serial.println(sendingEnabled ? "ON" : "OFF");
+      }
 
       // LED feedback for ON/OFF state
       if (sendingEnabled) {
@@ -84,15 +113,59 @@ void loop() {
     int x = analogRead(X_pin);
     int y = analogRead(Y_pin);
     int sw = swState == LOW ? 1 : 0; // active LOW: pressed=1, released=0
-    Serial.print("X:");
-    Serial.print(x);
-    Serial.print("|Y:");
-    Serial.print(y);
-    Serial.print("|SW:");
-    Serial.println(sw);
+    if (!SEND_CHANGES_ONLY || changed(x, y, sw)) {
+      lastX = x;
+      lastY = y;
+      lastSw = sw;
+      lastSentTime = millis();
+      if (BINARY_FRAMES) {
+        sendFrame(FRAME_SAMPLE, x, y, sw);
+      } else {
+        Serial.print("X:");
+        Serial.print(x);
+        Serial.print("|Y:");
+        Serial.print(y);
+        Serial.print("|SW:");
+        Serial.println(sw);
+      }
+    }
   }
 
-  delay(50); // small delay for stability
+  delay(LOOP_DELAY_MS); // small delay for stability
+}
+
+bool changed(int x, int y, int sw) {
+  return abs(x - lastX) >= CHANGE_THRESHOLD || abs(y - lastY) >= CHANGE_THRESHOLD || sw != lastSw ||
+         millis() - lastSentTime >= KEEPALIVE_MS;
+}
+
+// CRC-8, polynomial 0x07
+byte crc8(const byte *data, int len) {
+  byte crc = 0;
+  for (int i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+void sendFrame(byte kind, int x, int y, int sw) {
+  byte frame[6];
+  int len = 2;
+  frameSeq = (frameSeq + 1) & 0x0F;
+  frame[0] = SYNC;
+  frame[1] = (kind << 4) | frameSeq;
+  if (kind == FRAME_SAMPLE) {
+    unsigned long packed = ((unsigned long)(x & 0x3FF) << 11) | ((unsigned long)(y & 0x3FF) << 1) | (sw & 1);
+    frame[2] = (packed >> 16) & 0xFF;
+    frame[3] = (packed >> 8) & 0xFF;
+    frame[4] = packed & 0xFF;
+    len = 5;
+  }
+  frame[len] = crc8(frame + 1, len - 1);
+  Serial.write(frame, len + 1);
 }
 
 
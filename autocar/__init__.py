@@ -0,0 +1,35 @@
+"""
+Shared driving logic for the IoT autocar.
+
+Both entry points on the Raspberry Pi (raspberry-pi/pi-receiver-mode-switcher.py and
+iot-autocar-web/app.py) import from here, and so does the simulator, so the
+same navigation code runs on the car and on a plain computer.
+
+Modules:
+  arduino.py     - the HW-504 joystick sketch emulated on a pty, for running computer-bridge.py without the board
+  braking.py     - stopping threshold and approach speed computed from the commanded speed
+  car.py         - adapter from the gpiozero devices to the interface used by the navigation code
+  instrument.py  - lock-free HDR-style latency histograms, loop jitter and a JSON stats endpoint
+  joystick.py    - asyncio TCP/UDP listener for the joystick frames sent by computer-bridge.py
+  lifecycle.py   - subsystem init in background threads, with per-subsystem timings
+  config.py      - typed settings from defaults, JSON file, environment and flags, tunables reloaded live
+  fusion.py      - IR and ultrasonic readings fused into one obstacle probability per sector
+  framing.py     - text and binary (sync byte + CRC-8) serial protocols between the sketch and the bridge
+  hardware.py    - gpiozero pin factory selection, prefers hardware-timed PWM, mock pins off the Pi
+  history.py     - NumPy ring buffer of sensor ticks, time windows downsampled with min/max or LTTB
+  infrared.py    - IR obstacle sensors from edge callbacks, debounced state, event channel, preemptive stop
+  metrics.py     - Prometheus text format for the instrument counters and histograms
+  motors.py      - single owner of the motors when the joystick and the dashboard share the car
+  navigation.py  - sweep helpers and the continuous (reactive) navigator
+  runtime.py     - dashboard loops as green threads, blocking calls in a bounded pool, emits from threads handed over
+  servo.py       - servo move timing (slew + settle) instead of fixed sleeps
+  snapshot.py    - versioned dashboard state, full snapshot on connect, missed events on reconnect
+  sonar.py       - several HC-SR04s as one array, pinged in interleaved slots without crosstalk
+  speech.py      - text-to-speech worker with a bounded, deduplicating queue and cached phrases
+  state.py       - read-only robot state swapped on every change, with change subscriptions and waits
+  tasks.py       - single-instance background tasks with cancellation checked in car.sleep()
+  turning.py     - closed-loop reversing and turning with a learned rotation rate
+  ultrasonic.py  - HC-SR04 pinged on demand instead of gpiozero's background sampling
+  simulator.py   - 2D simulator of the car, run with `python -m autocar.simulator`
+  tuning.py      - parallel grid/random/TPE search of the avoidance settings in the simulator
+"""
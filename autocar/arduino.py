@@ -0,0 +1,371 @@
+"""
+The HW-504 joystick sketch (arduino/hw-504-joystick-send-values.ino) emulated on a pty.
+
+computer-bridge.py opens the pty's slave end as if it were the Arduino's USB serial
+port, so the bridge can be run and load tested without the board. The emulator
+reproduces what the sketch does:
+
+  * loop() runs every 50 ms (delay(50) plus the time the loop body takes)
+  * the button is debounced only by the loop period; two presses less than 500 ms
+    apart toggle sending and print SENDING_ON / SENDING_OFF
+  * while sending, every pass prints "X:<0..1023>|Y:<0..1023>|SW:<0|1>\\r\\n"
+  * bytes leave at baud / 10 per second through the Uno's 64 byte TX buffer, and
+    Serial.print() blocks once that buffer is full
+
+The stick follows a trajectory: a built-in one (TRAJECTORIES) or a CSV script of
+"t,x,y,sw" rows, x and y interpolated linearly between rows. Stress mode drops the
+baud pacing and the loop delay, writes lines in random bursts and corrupts bytes.
+The fast link options of the sketch (binary frames, higher baud, shorter loop,
+change-only sending, see framing.py) are emulated too.
+
+Run from the repository root:
+
+    python -m autocar.arduino                                  # circle, prints the pty path
+    python -m autocar.arduino --trajectory script.csv --link /tmp/hw504
+    python -m autocar.arduino --stress --corrupt 0.02
+    python -m autocar.arduino --binary --baud 115200 --period 0.005 --changes-only
+    python ./computer/computer-bridge.py --serial /dev/pts/5 --host 127.0.0.1
+"""
+
+import argparse
+import csv
+import errno
+import math
+import os
+import random
+import time
+import tty
+
+from autocar.framing import SAMPLE, SENDING_OFF, SENDING_ON, encode
+
+CENTRE = 512
+LOOP_DELAY = 0.05            # delay(50)
+LOOP_BODY = 0.0003           # 2 x analogRead (~110 us each) and the prints into the TX buffer
+DOUBLE_PRESS_DELAY = 0.5     # doublePressDelay, ms in the sketch
+TX_BUFFER = 64               # HardwareSerial TX buffer on the Uno
+CHANGE_THRESHOLD = 4         # counts, above the analogRead jitter
+KEEPALIVE = 0.2              # s
+
+
+# ---- Stick trajectories: t (seconds) -> (x, y, pressed) ----
+
+def idle(t):
+    return CENTRE, CENTRE, False
+
+
+def circle(t, period=4.0):
+    a = 2 * math.pi * t / period
+    return CENTRE + 511 * math.cos(a), CENTRE + 511 * math.sin(a), False
+
+
+def forward_back(t, period=6.0):
+    """Full forward, centre, full backward, centre"""
+    phase = (t % period) / period
+    y = (1023, CENTRE, 0, CENTRE)[int(phase * 4)]
+    return CENTRE, y, False
+
+
+def corners(t, hold=0.5):
+    """Jumps between the corners and the centre, like flicking the stick"""
+    points = ((0, 0), (CENTRE, CENTRE), (1023, 0), (CENTRE, CENTRE), (1023, 1023), (CENTRE, CENTRE), (0, 1023), (CENTRE, CENTRE))
+    x, y = points[int(t / hold) % len(points)]
+    return x, y, False
+
+
+def wander(t, seed=0):
+    """Smooth pseudo-random movement, sum of incommensurate sines"""
+    rng = random.Random(seed)
+    x = sum(math.sin(rng.uniform(0.3, 2.0) * t + rng.uniform(0, 6.3)) for _ in range(3)) / 3
+    y = sum(math.sin(rng.uniform(0.3, 2.0) * t + rng.uniform(0, 6.3)) for _ in range(3)) / 3
+    return CENTRE + 511 * x, CENTRE + 511 * y, False
+
+
+TRAJECTORIES = {
+    'idle': idle,
+    'circle': circle,
+    'forward-back': forward_back,
+    'corners': corners,
+    'wander': wander,
+}
+
+
+def load_script(path):
+    """Trajectory from a CSV file of t,x,y,sw rows (header optional), repeats after the last row"""
+    rows = []
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if not row or row[0].strip().startswith('#'):
+                continue
+            try:
+                t, x, y = float(row[0]), float(row[1]), float(row[2])
+            except ValueError:   # header
+                continue
+            rows.append((t, x, y, len(row) > 3 and row[3].strip() == '1'))
+    if not rows:
+        raise ValueError(f"{path}: no t,x,y,sw rows")
+    end = rows[-1][0] or 1.0
+
+    def scripted(t):
+        t %= end
+        for (t0, x0, y0, sw), (t1, x1, y1, _) in zip(rows, rows[1:]):
+            if t0 <= t < t1:
+                k = (t - t0) / (t1 - t0)
+                return x0 + (x1 - x0) * k, y0 + (y1 - y0) * k, sw
+        return rows[-1][1:]
+    return scripted
+
+
+def with_double_presses(stick, at=(0.5,), press=0.1, gap=0.1):
+    """Adds a double-press starting at each time in at (held press, released gap, held press)"""
+    def pressed(t):
+        return any(0 <= t - start < press or press + gap <= t - start < 2 * press + gap for start in at)
+
+    def wrapped(t):
+        x, y, sw = stick(t)
+        return x, y, sw or pressed(t)
+    return wrapped
+
+
+# ---- The sketch ----
+
+class Sketch:
+    """loop() of the sketch minus the delay: button toggling and what it prints"""
+
+    def __init__(self, binary=False, changes_only=False, threshold=CHANGE_THRESHOLD, keepalive=KEEPALIVE):
+        self.binary = binary                # BINARY_FRAMES
+        self.changes_only = changes_only    # SEND_CHANGES_ONLY
+        self.threshold = threshold          # CHANGE_THRESHOLD, counts
+        self.keepalive = keepalive          # KEEPALIVE_MS, a sample at least this often even if nothing changed
+        self.last_sw_pressed = False
+        self.last_press_time = 0.0
+        self.press_count = 0
+        self.sending = False
+        self.toggles = 0
+        self.seq = 0
+        self.last_sent = None
+        self.last_sent_time = 0.0
+
+    def frame(self, kind, x=0, y=0, sw=0):
+        self.seq = (self.seq + 1) & 0x0F
+        return encode(kind, self.seq, x, y, sw)
+
+    def changed(self, now, sample):
+        if not self.changes_only or self.last_sent is None or now - self.last_sent_time >= self.keepalive:
+            return True
+        (x, y, sw), (last_x, last_y, last_sw) = sample, self.last_sent
+        return abs(x - last_x) >= self.threshold or abs(y - last_y) >= self.threshold or sw != last_sw
+
+    def step(self, now, x, y, pressed):
+        out = b''
+        if pressed and not self.last_sw_pressed:
+            if now - self.last_press_time < DOUBLE_PRESS_DELAY:
+                self.press_count += 1
+            else:
+                self.press_count = 1
+            self.last_press_time = now
+            if self.press_count == 2:
+                self.sending = not self.sending
+                self.press_count = 0
+                self.toggles += 1
+                self.last_sent = None
+                if self.binary:
+                    out += self.frame(SENDING_ON if self.sending else SENDING_OFF)
+                else:
+                    out += b"SENDING_ON\r\n" if self.sending else b"SENDING_OFF\r\n"
+        self.last_sw_pressed = pressed
+
+        sample = (x, y, 1 if pressed else 0)
+        if self.sending and self.changed(now, sample):
+            self.last_sent = sample
+            self.last_sent_time = now
+            if self.binary:
+                out += self.frame(SAMPLE, *sample)
+            else:
+                out += b"X:%d|Y:%d|SW:%d\r\n" % sample
+        return out
+
+
+# ---- Serial output ----
+
+def corrupt(line, rng):
+    """One random fault: a flipped bit, a lost byte, a stray byte or a cut-off end"""
+    fault = rng.randrange(4)
+    i = rng.randrange(len(line))
+    if fault == 0:
+        return line[:i] + bytes([line[i] ^ (1 << rng.randrange(8))]) + line[i + 1:]
+    if fault == 1:
+        return line[:i] + line[i + 1:]
+    if fault == 2:
+        return line[:i] + bytes([rng.randrange(256)]) + line[i:]
+    return line[:i]
+
+
+class Emulator:
+
+    def __init__(self, stick, baud=9600, period=LOOP_DELAY, noise=2, burst=1, corrupt=0.0, block=False, seed=0,
+                 sketch=None):
+        self.stick = stick
+        self.baud = baud            # 0: no pacing, bytes leave as fast as the reader takes them
+        self.period = period
+        self.noise = noise          # analogRead jitter in counts
+        self.burst = burst          # stress: write up to this many passes' output at once
+        self.corrupt = corrupt      # probability of a fault per line
+        self.block = block          # True: wait for the reader, False: drop what does not fit (like the USB serial chip)
+        self.rng = random.Random(seed)
+        self.sketch = sketch or Sketch()
+        self.started = None
+        self.master = self.slave = None
+        self.stats = {'lines': 0, 'bytes': 0, 'corrupted': 0, 'dropped_bytes': 0}
+
+    def open(self, link=None):
+        """Creates the pty, returns the path to give computer-bridge.py as its serial port"""
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)   # no echo, no newline translation, like a real serial port
+        path = os.ttyname(self.slave)
+        if link:
+            if os.path.lexists(link):
+                os.remove(link)
+            os.symlink(path, link)
+        if not self.block:
+            os.set_blocking(self.master, False)
+        return path
+
+    def close(self):
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                os.close(fd)
+        self.master = self.slave = None
+
+    def sample(self, t):
+        x, y, pressed = self.stick(t)
+        if self.noise:
+            x += self.rng.randint(-self.noise, self.noise)
+            y += self.rng.randint(-self.noise, self.noise)
+        return max(0, min(1023, int(x))), max(0, min(1023, int(y))), pressed
+
+    def write(self, data):
+        while data:
+            try:
+                n = os.write(self.master, data)
+            except BlockingIOError:
+                n = 0
+            except OSError as e:
+                if e.errno != errno.EIO:   # EIO: nobody has the port open, the bytes are lost
+                    raise
+                n = 0
+            if not self.block:
+                self.stats['dropped_bytes'] += len(data) - n
+                return
+            data = data[n:]
+
+    def run(self, duration=None, lines=None):
+        """Runs the sketch in real time until duration seconds or lines lines (frames) have passed"""
+        start = self.started = time.monotonic()
+        tick = start
+        tx_free = start        # when the last byte written so far has left the UART
+        pending = b''
+        burst = 1
+        while (duration is None or tick - start < duration) and (lines is None or self.stats['lines'] < lines):
+            out = self.sketch.step(tick - start, *self.sample(tick - start))
+            if out:
+                if self.corrupt and self.rng.random() < self.corrupt:
+                    out = corrupt(out, self.rng)
+                    self.stats['corrupted'] += 1
+                self.stats['lines'] += 1
+                self.stats['bytes'] += len(out)
+                pending += out
+
+            if self.baud:
+                # the loop only blocks in Serial.print() when the TX buffer is full
+                done = max(tick, tx_free) + len(out) * 10 / self.baud
+                blocked = max(0.0, done - tick - TX_BUFFER * 10 / self.baud)
+                tx_free = done
+                next_tick = tick + LOOP_BODY + blocked + self.period
+                if pending:
+                    _sleep_until(done)
+                    self.write(pending)
+                    pending = b''
+            else:
+                burst -= 1
+                if burst <= 0 and pending:
+                    self.write(pending)
+                    pending = b''
+                    burst = self.rng.randint(1, self.burst)
+                next_tick = tick + self.period
+            _sleep_until(next_tick)
+            tick = next_tick if self.period else time.monotonic()
+        if pending:
+            self.write(pending)
+        return self.stats
+
+
+def _sleep_until(t):
+    delay = t - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulate the HW-504 joystick Arduino sketch on a pty")
+    parser.add_argument('--trajectory', default='circle', help=f"one of {', '.join(TRAJECTORIES)} or a CSV file of t,x,y,sw")
+    parser.add_argument('--baud', type=int, default=9600, help="0: no pacing")
+    parser.add_argument('--period', type=float, default=LOOP_DELAY, help="delay() at the end of loop(), seconds")
+    parser.add_argument('--noise', type=int, default=2, help="analogRead jitter in counts")
+    parser.add_argument('--enable-at', type=float, nargs='*', default=[1.0],
+                        help="double-press the button at these times (s); the first one turns sending on")
+    parser.add_argument('--duration', type=float, help="seconds to run, default forever")
+    parser.add_argument('--link', help="also make a symlink to the pty at this path")
+    parser.add_argument('--stress', action='store_true', help="no baud pacing, no delay, bursty writes, backpressure")
+    parser.add_argument('--burst', type=int, default=1, help="write up to this many lines at once (with --stress 50)")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="probability of corrupting a line")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--binary', action='store_true', help="6 byte binary frames instead of text (bridge --binary)")
+    parser.add_argument('--changes-only', action='store_true', help="send a sample only when the stick moved, plus a keepalive")
+    parser.add_argument('--threshold', type=int, default=CHANGE_THRESHOLD, help="counts the stick has to move with --changes-only")
+    args = parser.parse_args()
+    sketch = Sketch(args.binary, args.changes_only, args.threshold)
+
+    if args.trajectory in TRAJECTORIES:
+        stick = TRAJECTORIES[args.trajectory]
+    else:
+        stick = load_script(args.trajectory)
+
+    if args.stress:
+        emulator = Emulator(stick, baud=0, period=0.0, noise=args.noise, burst=max(args.burst, 50),
+                            corrupt=args.corrupt, block=True, seed=args.seed, sketch=sketch)
+        emulator.sketch.sending = True   # no time for a double-press, start sending right away
+    else:
+        stick = with_double_presses(stick, at=args.enable_at)
+        emulator = Emulator(stick, baud=args.baud, period=args.period, noise=args.noise, burst=args.burst,
+                            corrupt=args.corrupt, seed=args.seed, sketch=sketch)
+    path = emulator.open(args.link)
+    print(f"HW-504 sketch on {path}" + (f" ({args.link})" if args.link else ""))
+    print(f"Run: python ./computer/computer-bridge.py --serial {args.link or path}")
+
+    start = time.monotonic()
+    try:
+        emulator.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.close()
+        if args.link and os.path.islink(args.link):
+            os.remove(args.link)
+    elapsed = time.monotonic() - start
+    s = emulator.stats
+    print(f"{s['lines']} lines, {s['bytes']} bytes in {elapsed:.1f} s ({s['lines'] / elapsed:.0f} lines/s), "
+          f"{s['corrupted']} corrupted, {s['dropped_bytes']} bytes dropped, {emulator.sketch.toggles} toggles")
+
+
+if __name__ == '__main__':
+    main()
+
+
+"""
+
+Reference:
+    Sketch emulated: arduino/hw-504-joystick-send-values.ino
+    pty(7): https://man7.org/linux/man-pages/man7/pty.7.html
+    HardwareSerial TX buffer: https://docs.arduino.cc/language-reference/en/functions/communication/serial/availableForWrite/
+
+"""
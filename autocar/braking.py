@@ -0,0 +1,64 @@
+"""
+Speed-dependent stopping threshold.
+
+A fixed FRONT_THRESHOLD is too short at full speed (the car overshoots) and too long
+at low speed (it stops far away and sweeps for nothing). The distance needed to stop is
+
+    reaction:  the car keeps going for one sensor sampling period (plus loop latency)
+    braking:   after robot.stop() the motors spin down, measured once as braking_distance
+               at full speed; small DC motors slow down roughly exponentially, so the
+               distance scales linearly with speed
+
+so the threshold is margin + reaction + braking for the current commanded speed.
+approach_speed() slows the car down progressively as the obstacle gets closer,
+which lowers the threshold again, so the car creeps up to obstacles instead of
+stopping at one fixed boundary.
+
+Calibrating: drive at full speed toward a wall, call robot.stop() and measure how far
+the car still rolls (braking_distance). max_speed is the full-speed velocity in cm/s.
+"""
+
+
+class StoppingModel:
+
+    def __init__(self, max_speed=60.0, braking_distance=8.0, sample_period=0.1,
+                 margin=12.0, headroom=2.0, min_speed=0.25):
+        self.max_speed = max_speed                  # cm/s at full PWM
+        self.braking_distance = braking_distance    # cm rolled after stopping from full PWM
+        self.sample_period = sample_period          # s between distance readings the loop acts on
+        self.margin = margin                        # cm kept between the car and the obstacle
+        self.headroom = headroom                    # start slowing down at headroom x threshold
+        self.min_speed = min_speed                  # PWM below which the motors stall
+
+    def stopping_distance(self, speed):
+        """cm travelled from the moment an obstacle is in range until the car stands still"""
+        speed = abs(speed)
+        return speed * (self.max_speed * self.sample_period + self.braking_distance)
+
+    def threshold(self, speed):
+        """Front distance in cm below which the car has to stop at this PWM speed"""
+        return self.margin + self.stopping_distance(speed)
+
+    def safe_speed(self, distance):
+        """Fastest speed whose threshold (with headroom) still fits into distance"""
+        # solve margin + stopping_distance(s) = distance / headroom for s
+        per_speed = self.max_speed * self.sample_period + self.braking_distance
+        return max(0.0, (distance / self.headroom - self.margin) / per_speed)
+
+    def approach_speed(self, requested, distance):
+        """Requested speed, reduced progressively near obstacles but never below min_speed"""
+        if distance is None:
+            return requested
+        return max(min(requested, self.min_speed), min(requested, self.safe_speed(distance)))
+
+    def must_stop(self, speed, distance):
+        return distance < self.threshold(speed)
+
+
+"""
+
+Reference:
+    Stopping distance = reaction distance + braking distance:
+    https://en.wikipedia.org/wiki/Braking_distance
+
+"""
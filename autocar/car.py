@@ -0,0 +1,82 @@
+"""
+Adapter between the gpiozero devices built by each script and the navigation code.
+
+The navigation code only talks to a "car" object with these methods:
+
+    now()             -> seconds (monotonic)
+    sleep(seconds)    -> raises tasks.Cancelled when the supervised task running it is cancelled
+    distance()        -> ultrasonic distance in cm
+    ir()              -> (left, right) IR values, 0 means obstacle
+    servo(deg)        -> point the ultrasonic sensor, 0..180 (90 is straight ahead, <90 is left)
+    drive(left, right)-> wheel speeds in -1..1
+    stop()
+    preempt()         -> immediate stop from another thread (IR edge callback), True if it stopped
+    preempted         -> True from a preempt() until the next stop(); forward drive() is ignored meanwhile,
+                         manoeuvres in progress (turning.turn) end early
+
+GpioCar implements it on the real hardware, SimCar (simulator.py) in the simulator.
+"""
+
+import threading
+import time
+
+from autocar import tasks
+
+
+class GpioCar:
+
+    def __init__(self, robot, servo, left_ir, right_ir, get_distance, ir_watch=None):
+        self.robot = robot
+        self._servo = servo
+        self.left_ir = left_ir
+        self.right_ir = right_ir
+        self.get_distance = get_distance  # each script reads the HC-SR04 its own way
+        self.ir_watch = ir_watch          # infrared.IrWatch, debounced edge state instead of reading the pins
+        self.servo_angle = 90
+        self.command = (0.0, 0.0)
+        self.preempted = False
+        self._lock = threading.Lock()     # preempt() comes from gpiozero's callback thread
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        tasks.sleep(seconds)   # time.sleep() outside a supervised task
+
+    def distance(self):
+        return self.get_distance()
+
+    def ir(self):
+        if self.ir_watch is not None:
+            return self.ir_watch.state()
+        return int(self.left_ir.value), int(self.right_ir.value)
+
+    def servo(self, deg):
+        """Move the servo without waiting; callers decide how long to let it settle"""
+        deg = max(0, min(180, deg))
+        self._servo.value = (deg - 90) / 90   # maps 0..180 -> -1..1
+        self.servo_angle = deg
+
+    def drive(self, left, right):
+        with self._lock:
+            if self.preempted and (left > 0 or right > 0):
+                return   # the loop has not seen the trip yet
+            self.robot.value = (left, right)
+            self.command = (left, right)
+
+    def stop(self):
+        with self._lock:
+            self.robot.stop()
+            self.command = (0.0, 0.0)
+            self.preempted = False
+
+    def preempt(self):
+        """Stops now if a wheel drives forward, the IR sensors face forward so reversing goes on"""
+        with self._lock:
+            left, right = self.command
+            if left <= 0 and right <= 0:
+                return False
+            self.robot.stop()
+            self.command = (0.0, 0.0)
+            self.preempted = True
+            return True
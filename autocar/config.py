@@ -0,0 +1,335 @@
+"""
+Configuration shared by every entry point, instead of constants at the top of each script.
+
+Every setting is declared once in FIELDS with its type, default and limits. An entry
+point loads them once at start-up, lowest precedence first:
+
+    FIELDS default  <  the script's own defaults  <  JSON file  <  AUTOCAR_<NAME> env  <  --name value
+
+The JSON file is --config PATH, else $AUTOCAR_CONFIG, else autocar-config.json in the
+repository root if it exists. Values are converted and checked against their field,
+a bad value or an unknown key stops the script with the name of the setting and where
+it came from. The result is a Config namedtuple: frozen, and reading a value is one
+attribute lookup.
+
+Fields marked tunable can change while the car drives. LiveConfig watches the file
+and, when it changes, swaps in a new Config with the new tunable values; loops read
+config.current once per iteration and pick it up on the next pass. A changed value that
+is not tunable (pins, ports, ...) is reported and needs a restart.
+
+Print every setting with the value it would have and whether it is tunable:
+
+    python -m autocar.config
+    python -m autocar.config --config my-car.json --deadzone 120
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_PATH = os.path.join(ROOT, 'autocar-config.json')
+ENV_PREFIX = 'AUTOCAR_'
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class Field:
+
+    def __init__(self, name, kind, default, help, tunable=False, minimum=None, maximum=None,
+                 choices=None, optional=False, flag=None):
+        self.name = name
+        self.kind = kind            # int, float, bool, str or tuple (of ints, for pin pairs and sonar mounts)
+        self.default = default
+        self.help = help
+        self.tunable = tunable      # may change at runtime, see LiveConfig
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+        self.optional = optional    # None is a valid value
+        self.flag = flag or '--' + name.replace('_', '-')
+
+    def convert(self, value, source):
+        """value from JSON, env or CLI as this field's type, ConfigError if it does not fit"""
+        try:
+            if value is None or (isinstance(value, str) and value.lower() in ('', 'none', 'null')):
+                if not self.optional:
+                    raise ValueError("a value is required")
+                return None
+            if self.kind is bool:
+                value = _bool(value)
+            elif self.kind is tuple:
+                if isinstance(value, str):
+                    value = value.split(',')
+                value = tuple(int(v) for v in value)
+            elif self.kind is int and isinstance(value, float) and not value.is_integer():
+                raise ValueError("not a whole number")
+            else:
+                value = self.kind(value)
+            if self.minimum is not None and value < self.minimum:
+                raise ValueError(f"below the minimum {self.minimum}")
+            if self.maximum is not None and value > self.maximum:
+                raise ValueError(f"above the maximum {self.maximum}")
+            if self.choices is not None and value not in self.choices:
+                raise ValueError(f"not one of {', '.join(map(str, self.choices))}")
+        except (TypeError, ValueError) as e:
+            raise ConfigError(f"{self.name} = {value!r} from {source}: {e}") from None
+        return value
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'yes', 'on'):
+        return True
+    if text in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError("not true or false")
+
+
+FIELDS = [
+    # ---- pins (BCM) ----
+    Field('motor_left', tuple, (7, 8), "L298N IN1, IN2"),
+    Field('motor_right', tuple, (9, 10), "L298N IN3, IN4"),
+    Field('motor_enable', tuple, (12, 13), "L298N ENA, ENB"),
+    Field('ultrasonic_echo', int, 26, "HC-SR04 echo pin", minimum=0, maximum=27),
+    Field('ultrasonic_trigger', int, 16, "HC-SR04 trigger pin", minimum=0, maximum=27),
+    Field('sonar_fixed', tuple, None, "more HC-SR04s at fixed angles, echo, trigger, angle for each "
+          "(5,6,150,20,21,30)", optional=True),
+    Field('ir_left', int, 17, "left IR sensor pin", minimum=0, maximum=27),
+    Field('ir_right', int, 27, "right IR sensor pin", minimum=0, maximum=27),
+    Field('servo_pin', int, 19, "SG90 PWM pin (12, 13, 18 or 19)", choices=(12, 13, 18, 19)),
+    Field('pin_factory', str, None, "gpiozero pin factory, none picks the best available", optional=True,
+          choices=('pigpio', 'lgpio', 'rpigpio', 'native', 'mock')),
+    Field('servo_settle', float, None, "s after a servo move, none uses the backend's default", optional=True,
+          minimum=0.0, maximum=1.0),
+
+    # ---- network ----
+    Field('serial', str, '/dev/cu.usbmodem1101', "Arduino serial port on the computer"),
+    Field('baud', int, 9600, "serial baud rate, BAUD_RATE in the sketch", minimum=300),
+    Field('binary', bool, False, "binary serial frames, BINARY_FRAMES in the sketch"),
+    Field('pi_host', str, 'jamescameronpi3.local', "Raspberry Pi address computer-bridge.py connects to", flag='--host'),
+    Field('port', int, 5005, "joystick TCP port on the Pi", minimum=1, maximum=65535),
+    Field('udp_port', int, 5006, "joystick UDP port (unified-runtime.py)", minimum=1, maximum=65535),
+    Field('stats_port', int, 5010, "receiver timing statistics HTTP port", minimum=1, maximum=65535),
+    Field('web_port', int, 5000, "dashboard HTTP port", minimum=1, maximum=65535),
+
+    # ---- joystick ----
+    Field('deadzone', int, 100, "joystick counts around the centre (512) that mean stop", tunable=True,
+          minimum=0, maximum=511),
+    Field('joystick_speed', int, 50, "% speed when driving with the joystick", tunable=True, minimum=0, maximum=100),
+    Field('sw_debounce', float, 0.5, "s between two mode switches from the joystick button", tunable=True,
+          minimum=0.0),
+
+    # ---- autonomous driving ----
+    Field('navigation', str, 'reactive', "'reactive' steers continuously, 'sweep' stops and sweeps on every obstacle "
+          "(the receiver's default, its loop is too slow for reactive)",
+          tunable=True, choices=('reactive', 'sweep')),
+    Field('forward_speed', float, 0.5, "speed when the way ahead is clear, 0..1", tunable=True,
+          minimum=0.0, maximum=1.0),
+    Field('max_speed', float, 60.0, "cm/s at full speed, measured on the floor the car drives on", tunable=True,
+          minimum=1.0),
+    Field('braking_distance', float, 8.0, "cm the car still rolls after stopping from full speed", tunable=True,
+          minimum=0.0),
+    Field('stop_margin', float, 12.0, "cm always kept between the car and an obstacle", tunable=True, minimum=0.0),
+    Field('sample_period', float, 0.1, "s between the distance readings the driving loop acts on", tunable=True,
+          minimum=0.001),
+    Field('reverse_time', float, 0.4, "s, longest reverse before turning", tunable=True, minimum=0.0, maximum=5.0),
+    Field('turn_rate', float, 200.0, "deg/s turning at full speed, first estimate before it is learned",
+          minimum=1.0),
+    Field('sweep_step', int, 5, "degrees between sweep readings", tunable=True, minimum=1, maximum=90),
+    Field('sonar_separation', int, 60, "degrees between ultrasonic sensors that may ping at the same time",
+          minimum=0, maximum=181),
+    Field('sonar_guard', float, 0.01, "s between two slots of ultrasonic pings for the echoes to die down",
+          minimum=0.0, maximum=0.1),
+    Field('obstacle_fusion', bool, True, "stop on the fused IR and ultrasonic obstacle estimate instead of any "
+          "single reading", tunable=True),
+
+    # ---- loop timing ----
+    Field('loop_period', float, 0.02, "s, receiver control loop sleep", tunable=True, minimum=0.0, maximum=1.0),
+    Field('recv_timeout', float, 0.1, "s, receiver waits this long for joystick data per loop", minimum=0.001),
+    Field('sensor_period', float, 0.1, "s, dashboard sensor update interval", tunable=True,
+          minimum=0.01, maximum=5.0),
+    Field('auto_period', float, 0.05, "s, dashboard autonomous loop sleep", tunable=True, minimum=0.0, maximum=1.0),
+
+    # ---- dashboard driving ----
+    Field('web_input_rate', int, 20, "Hz the dashboard samples its controls (keys, touch joystick, gamepad)",
+          tunable=True, minimum=1, maximum=100),
+    Field('web_keepalive', float, 0.1, "s between keepalives while an unchanged command is held", tunable=True,
+          minimum=0.01, maximum=5.0),
+    Field('web_input_timeout', float, 0.35, "s without a command or keepalive before a car driven from the "
+          "dashboard stops", tunable=True, minimum=0.05, maximum=10.0),
+
+    # ---- dashboard runtime ----
+    Field('executor_threads', int, 4, "real threads for the dashboard's blocking hardware calls (pings, servo "
+          "moves), one of them hands events from threads to the event loop", minimum=2, maximum=32),
+
+    # ---- dashboard history ----
+    Field('history_samples', int, 36000, "sensor ticks the dashboard keeps for /history (1 h at 10 Hz)",
+          minimum=100, maximum=1000000),
+]
+
+FIELDS_BY_NAME = {f.name: f for f in FIELDS}
+Config = namedtuple('Config', [f.name for f in FIELDS])
+TUNABLE = frozenset(f.name for f in FIELDS if f.tunable)
+
+
+def config_path(argv=None):
+    """JSON file to read: --config, $AUTOCAR_CONFIG, or autocar-config.json in the repository root if present"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--config')
+    args, _ = parser.parse_known_args(argv)
+    path = args.config or os.environ.get(ENV_PREFIX + 'CONFIG')
+    if path:
+        return path
+    return DEFAULT_PATH if os.path.exists(DEFAULT_PATH) else None
+
+
+def read_file(path):
+    """{name: value} from the JSON file, unknown names are an error"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"{path}: {e}") from None
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: expected a JSON object of setting: value")
+    unknown = sorted(set(data) - set(FIELDS_BY_NAME))
+    if unknown:
+        raise ConfigError(f"{path}: unknown settings {', '.join(unknown)}")
+    return data
+
+
+def cli_parser():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--config', help="JSON file with settings")
+    for f in FIELDS:
+        if f.kind is bool:
+            parser.add_argument(f.flag, dest=f.name, default=argparse.SUPPRESS, action=argparse.BooleanOptionalAction,
+                                help=f"{f.help} (default {f.default})")
+        else:
+            parser.add_argument(f.flag, dest=f.name, default=argparse.SUPPRESS, metavar=f.kind.__name__.upper(),
+                                help=f"{f.help} (default {f.default})")
+    return parser
+
+
+def resolve(argv=None, defaults=None, path=None, environ=None):
+    """Config from all sources, see the module docstring for the order"""
+    environ = os.environ if environ is None else environ
+    values = {f.name: f.default for f in FIELDS}
+    layers = [('script defaults', defaults or {})]
+    if path:
+        layers.append((path, read_file(path)))
+    layers.append(('environment', {f.name: environ[ENV_PREFIX + f.name.upper()]
+                                   for f in FIELDS if ENV_PREFIX + f.name.upper() in environ}))
+    args, _ = cli_parser().parse_known_args(argv)
+    layers.append(('command line', {k: v for k, v in vars(args).items() if k != 'config'}))
+
+    for source, layer in layers:
+        for name, value in layer.items():
+            if name not in FIELDS_BY_NAME:
+                raise ConfigError(f"unknown setting {name} in {source}")
+            values[name] = FIELDS_BY_NAME[name].convert(value, source)
+    return Config(**values)
+
+
+def load(argv=None, defaults=None):
+    """Config for an entry point, exits with a message if a setting is invalid"""
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        return resolve(argv, defaults, config_path(argv))
+    except ConfigError as e:
+        sys.exit(f"Configuration error: {e}")
+
+
+class LiveConfig:
+    """The current Config, with the tunable values reloaded from the file while running"""
+
+    def __init__(self, argv=None, defaults=None):
+        self.argv = sys.argv[1:] if argv is None else argv
+        self.defaults = defaults
+        self.path = config_path(self.argv)
+        self.current = load(self.argv, defaults)
+        self._callbacks = []
+        self._mtime = self._stat()
+
+    def on_change(self, callback):
+        """callback(old, new, changed_names) after every reload that changed something"""
+        self._callbacks.append(callback)
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns if self.path else None
+        except OSError:
+            return None
+
+    def reload(self):
+        """Re-reads every source, applies the tunable changes, returns the names applied"""
+        try:
+            new = resolve(self.argv, self.defaults, self.path)
+        except ConfigError as e:
+            print(f"[config] reload ignored: {e}")
+            return []
+        old = self.current
+        changed = [name for name in Config._fields if getattr(new, name) != getattr(old, name)]
+        frozen = [name for name in changed if name not in TUNABLE]
+        if frozen:
+            print(f"[config] restart to apply {', '.join(frozen)}")
+        applied = [name for name in changed if name in TUNABLE]
+        if not applied:
+            return []
+        self.current = old._replace(**{name: getattr(new, name) for name in applied})
+        print("[config] " + ", ".join(f"{name}={getattr(self.current, name)}" for name in applied))
+        for callback in self._callbacks:
+            callback(old, self.current, applied)
+        return applied
+
+    def watch(self, interval=1.0):
+        """Polls the file in a daemon thread and reloads when it changes"""
+        if not self.path:
+            return None
+
+        def poll():
+            while True:
+                time.sleep(interval)
+                mtime = self._stat()
+                if mtime != self._mtime:
+                    self._mtime = mtime
+                    self.reload()
+
+        thread = threading.Thread(target=poll, name='config-watch', daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the autocar settings", parents=[cli_parser()])
+    argv = sys.argv[1:]
+    parser.parse_args(argv)
+    config = load(argv)
+    path = config_path(argv)
+    print(f"# file: {path or 'none'}")
+    for f in FIELDS:
+        value = getattr(config, f.name)
+        note = '' if value == f.default else f"   (default {f.default})"
+        print(f"{f.name:<20} {value!s:<24}{' tunable' if f.tunable else '        '}{note}")
+
+
+if __name__ == '__main__':
+    main()
+
+
+"""
+
+Reference:
+    argparse parse_known_args: https://docs.python.org/3/library/argparse.html#partial-parsing
+    collections.namedtuple: https://docs.python.org/3/library/collections.html#collections.namedtuple
+
+"""
@@ -0,0 +1,129 @@
+"""
+Serial protocol between the HW-504 sketch and computer-bridge.py, text and binary.
+
+The text protocol costs 16..20 bytes per sample ("X:512|Y:1023|SW:0\\r\\n"), about
+20 ms on the wire at 9600 baud, and one flipped bit can make the line undecodable.
+The binary protocol (BINARY_FRAMES in the sketch, --binary on the bridge) costs 6:
+
+    0xA5 | kind << 4 | seq | payload | CRC-8
+
+    SAMPLE       payload x (10 bits), y (10 bits), sw (1 bit) packed big-endian into 3 bytes
+    SENDING_ON   no payload
+    SENDING_OFF  no payload
+
+seq counts frames modulo 16 so the bridge can tell how many were lost. The CRC-8
+(polynomial 0x07) covers everything after the sync byte. After a bad CRC the decoder
+drops only that sync byte and looks for the next 0xA5, so a corrupted byte costs the
+frame it hit and nothing after it.
+"""
+
+import re
+
+SYNC = 0xA5
+SAMPLE, SENDING_ON, SENDING_OFF = 1, 2, 3
+PAYLOAD = {SAMPLE: 3, SENDING_ON: 0, SENDING_OFF: 0}
+
+TEXT_SAMPLE = re.compile(rb'X:(\d{1,4})\|Y:(\d{1,4})\|SW:([01])')
+
+
+def _crc_table(poly=0x07):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC_TABLE = _crc_table()
+
+
+def crc8(data):
+    crc = 0
+    for b in data:
+        crc = CRC_TABLE[crc ^ b]
+    return crc
+
+
+def encode(kind, seq=0, x=0, y=0, sw=0):
+    """One binary frame"""
+    body = bytes([kind << 4 | seq & 0x0F])
+    if kind == SAMPLE:
+        body += ((x & 0x3FF) << 11 | (y & 0x3FF) << 1 | (sw & 1)).to_bytes(3, 'big')
+    return bytes([SYNC]) + body + bytes([crc8(body)])
+
+
+def parse_line(line):
+    """(x, y, sw) from a text line, None if it is not a complete sample"""
+    match = TEXT_SAMPLE.fullmatch(line.strip())
+    if match is None:
+        return None
+    x, y, sw = (int(v) for v in match.groups())
+    if x > 1023 or y > 1023:
+        return None
+    return x, y, sw
+
+
+class Decoder:
+    """Binary frames from a byte stream cut anywhere, resynchronising after corruption"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.seq = None
+        self.stats = {'frames': 0, 'bad_crc': 0, 'skipped_bytes': 0, 'lost_frames': 0}
+
+    def feed(self, data):
+        """Adds bytes, returns the complete frames in them as (kind, x, y, sw)"""
+        buf = self.buffer
+        buf += data
+        frames = []
+        i = 0
+        n = len(buf)
+        while True:
+            start = buf.find(SYNC, i)
+            if start < 0:
+                self.stats['skipped_bytes'] += n - i
+                i = n
+                break
+            self.stats['skipped_bytes'] += start - i
+            i = start
+            if i + 2 > n:
+                break
+            head = buf[i + 1]
+            size = PAYLOAD.get(head >> 4)
+            if size is None:   # not a frame start, a 0xA5 inside some other bytes
+                self.stats['skipped_bytes'] += 1
+                i += 1
+                continue
+            end = i + 3 + size
+            if end > n:
+                break
+            if crc8(buf[i + 1:end - 1]) != buf[end - 1]:
+                self.stats['bad_crc'] += 1
+                self.stats['skipped_bytes'] += 1
+                i += 1
+                continue
+
+            kind, seq = head >> 4, head & 0x0F
+            if self.seq is not None:
+                self.stats['lost_frames'] += (seq - self.seq - 1) % 16
+            self.seq = seq
+            if kind == SAMPLE:
+                value = int.from_bytes(buf[i + 2:i + 5], 'big')
+                frames.append((kind, value >> 11, value >> 1 & 0x3FF, value & 1))
+            else:
+                frames.append((kind, 0, 0, 0))
+            self.stats['frames'] += 1
+            i = end
+        del buf[:i]
+        return frames
+
+
+"""
+
+Reference:
+    CRC-8 (CRC-8/SMBUS, polynomial 0x07): https://reveng.sourceforge.io/crc-catalogue/1-15.htm#crc.cat.crc-8-smbus
+    Byte stuffing and resynchronisation in serial framing: https://en.wikipedia.org/wiki/Consistent_Overhead_Byte_Stuffing
+
+"""
@@ -0,0 +1,210 @@
+"""
+IR and ultrasonic readings fused into one obstacle estimate per sector.
+
+The stop check used to be `ir_left == 0 or ir_right == 0 or dist < threshold`, so any
+single reading decided, and each sensor fails in its own way:
+
+  * HC-SR04: a soft or angled surface sends no echo back (a far reading), crosstalk
+    and multipath give a spurious short one now and then
+  * MH IR modules: binary, about 10 cm set with the potentiometer, blind to black and
+    transparent objects (components-testing/ir_mh.py)
+
+ObstacleFusion keeps the recent ultrasonic readings per sector of sector_size degrees
+(servo angles, 90 is straight ahead) from the driving loop, the navigator's scan and
+sweeps, and the debounced IR state. estimate(angle, within) combines them in log-odds
+(naive Bayes, the readings taken as independent) into the probability of an obstacle
+closer than within cm in that sector:
+
+  * every reading counts with the likelihood ratio of that echo with and without such
+    an obstacle, from the miss and false echo rates and a Gaussian range error. Misses
+    count little, those of one soft obstacle are not independent, so a near echo among
+    missing ones still adds up; one spurious echo is not enough to stop, two are
+  * the IR sensor looking into the sector watches a near field of its own that the
+    ultrasonic beam may not cover, so the sector is blocked when either says so: a
+    blocked IR stops the car whatever the echoes, a clear one does not clear the sector
+  * evidence fades with its age (memory s), and advance(cm) from the driving loop
+    moves what the readings saw ahead that much nearer
+
+front() pools the sectors next to straight ahead, the beam is about 30 degrees wide,
+and blocked() compares it to stop_probability. An Estimate also has a confidence (0
+when nothing fresh has looked at the sector, toward 1 with several fresh readings),
+the age of the newest reading and the median distance of the readings kept:
+
+    fusion = ObstacleFusion()
+    fusion.observe(90, 23.5, (1, 1), now)     # one pass of a driving loop
+    fusion.front(within=30, now=now)
+    -> Estimate(angle=90, probability=0.696, confidence=0.865, age=0.0, distance=23.5)
+    fusion.advance(1.0)                       # drove 1 cm
+    fusion.observe(90, 22.4, (1, 1), now + 0.02)
+    fusion.blocked(30, now + 0.02)            -> True (p 0.977)
+
+python -m autocar.simulator --fusion counts the false and late stops and collisions
+against the raw checks, with clean sensors and with dark, soft and spurious failures.
+"""
+
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+Estimate = namedtuple('Estimate', 'angle probability confidence age distance')
+
+
+def logit(p):
+    return math.log(p / (1 - p))
+
+
+def normal_cdf(x):
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+class ObstacleFusion:
+
+    def __init__(self, sector_size=15, memory=1.0, readings=12, prior=0.1, stop_probability=0.7,
+                 max_range=100.0, range_error=1.5, echo_miss=0.8, echo_false=0.01,
+                 ir_range=10.0, ir_angle=25, ir_fov=15, ir_miss=0.3, ir_false=0.005, clock=time.monotonic):
+        self.sector_size = sector_size
+        self.memory = memory                    # s, evidence weight falls to 1/e after this long
+        self.readings = readings                # ultrasonic readings kept per sector
+        self.prior = prior                      # chance of an obstacle in range before any reading
+        self.stop_probability = stop_probability
+        self.max_range = max_range              # cm, readings this far mean no echo
+        self.range_error = range_error          # cm, standard deviation of a reading
+        self.echo_miss = echo_miss              # share of obstacles sending no echo (soft, angled)
+        self.echo_false = echo_false            # share of readings that are spurious short echoes
+        self.ir_range = ir_range                # cm the IR modules are set to
+        self.ir_angle = ir_angle                # degrees each IR sensor points off straight ahead
+        self.ir_fov = ir_fov                    # degrees around that direction it covers
+        self.ir_miss = ir_miss                  # share of obstacles the IR does not see (black, glass)
+        self.ir_false = ir_false
+        self.clock = clock
+        self.sectors = {}                       # sector angle -> deque of (distance, time, odometer)
+        self.odometer = 0.0                     # cm driven forward, from advance()
+        self.ir = None                          # ((left, right), time), 0 means obstacle like car.ir()
+        self._lock = threading.Lock()
+
+    def sector_of(self, angle):
+        return int(round(angle / self.sector_size)) * self.sector_size
+
+    # ---- evidence ----
+
+    def observe_distance(self, angle, distance, now=None):
+        """One ultrasonic reading in cm with the servo at angle"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            sector = self.sectors.setdefault(self.sector_of(angle), deque(maxlen=self.readings))
+            sector.append((distance, now, self.odometer))
+
+    def observe_ir(self, state, now=None):
+        """Debounced (left, right) IR state, car.ir() or an IrEvent's state at its time"""
+        self.ir = (tuple(state), self.clock() if now is None else now)
+
+    def observe(self, angle, distance, ir, now=None):
+        """Both sensors of one pass of a driving loop"""
+        now = self.clock() if now is None else now
+        self.observe_distance(angle, distance, now)
+        self.observe_ir(ir, now)
+
+    def advance(self, cm):
+        """The car drove cm forward since the last call, what the readings saw ahead is that much nearer"""
+        self.odometer += cm
+
+    def rotate(self, degrees):
+        """The car turned degrees to the right (negative: left), readings move to the sector now facing them"""
+        with self._lock:
+            moved = {}
+            for angle, readings in self.sectors.items():
+                angle = self.sector_of(angle - degrees)
+                if 0 <= angle <= 180:
+                    moved.setdefault(angle, deque(maxlen=self.readings)).extend(readings)
+            self.sectors = moved
+        self.ir = None
+
+    def clear(self):
+        with self._lock:
+            self.sectors.clear()
+        self.ir = None
+
+    # ---- estimates ----
+
+    def _echo(self, distance, within):
+        """Log likelihood ratio of one reading for 'an obstacle closer than within'"""
+        near = 0.0 if distance >= self.max_range - 1 else normal_cdf((within - distance) / self.range_error)
+        given_obstacle = near * (1 - self.echo_miss) + (1 - near) * self.echo_miss
+        given_none = near * self.echo_false + (1 - near) * (1 - self.echo_false)
+        return math.log(given_obstacle / given_none)
+
+    def _ir(self, blocked, within):
+        """Log likelihood ratio of one IR sensor's state for 'an obstacle in its near field'"""
+        if blocked:
+            # the near field reaches ir_range, only partly inside a smaller within
+            return math.log((1 - self.ir_miss) / self.ir_false) * min(1.0, within / self.ir_range)
+        return math.log(self.ir_miss / (1 - self.ir_false))
+
+    def _ir_side(self, angle):
+        """0 (left) or 1 (right) when that IR sensor looks into the sector at angle, else None"""
+        for side, direction in ((0, 90 - self.ir_angle), (1, 90 + self.ir_angle)):
+            if abs(angle - direction) <= self.ir_fov:
+                return side
+        return None
+
+    def estimate(self, angle, within, now=None):
+        """Estimate for an obstacle closer than within cm in the sector of angle"""
+        return self._estimate((self.sector_of(angle),), within, now)
+
+    def _estimate(self, angles, within, now=None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            readings = [r for angle in angles for r in self.sectors.get(angle, ())]
+        evidence = logit(self.prior)
+        weight = 0.0
+        newest = None
+        for distance, t, odometer in readings:
+            w = math.exp(-max(0.0, now - t) / self.memory)
+            if distance < self.max_range - 1:
+                distance -= self.odometer - odometer   # what it saw ahead is nearer now
+            evidence += w * self._echo(distance, within)
+            weight += w
+            newest = t if newest is None else max(newest, t)
+        clear = 1 / (1 + math.exp(evidence))
+        sides = {self._ir_side(angle) for angle in angles} - {None}
+        if sides and self.ir is not None:
+            # the IR looks at a near field the ultrasonic beam may not cover: an obstacle there
+            # is a second way for the sector to be blocked, far echoes say nothing about it
+            state, t = self.ir
+            w = math.exp(-max(0.0, now - t) / self.memory)
+            for side in sides:
+                near = logit(self.prior * min(1.0, self.ir_range / within)) + w * self._ir(state[side] == 0, within)
+                clear *= 1 / (1 + math.exp(near))
+            weight += w
+            newest = t if newest is None else max(newest, t)
+        distances = sorted(d for d, _, _ in readings)
+        return Estimate(angle=angles[len(angles) // 2],
+                        probability=round(1 - clear, 3),
+                        confidence=round(1 - math.exp(-weight), 3),
+                        age=None if newest is None else round(now - newest, 3),
+                        distance=distances[len(distances) // 2] if distances else None)
+
+    def sectors_estimate(self, within, now=None):
+        """Estimates of every sector from 0 to 180 degrees"""
+        now = self.clock() if now is None else now
+        return [self.estimate(angle, within, now) for angle in range(0, 181, self.sector_size)]
+
+    def front(self, within, now=None):
+        """Estimate for the sectors within one sector of straight ahead together, the beam is about
+        30 degrees wide so each of their readings looks ahead"""
+        return self._estimate((90 - self.sector_size, 90, 90 + self.sector_size), within, now)
+
+    def blocked(self, within, now=None):
+        """True when an obstacle closer than within cm ahead is likely enough to stop for"""
+        return self.front(within, now).probability >= self.stop_probability
+
+
+"""
+
+Reference:
+    Log-odds (binary Bayes filter) sensor fusion, Thrun, Burgard & Fox, Probabilistic Robotics, ch. 4.2 and 9
+    HC-SR04 limits (soft and angled surfaces): https://cdn.sparkfun.com/datasheets/Sensors/Proximity/HCSR04.pdf
+    Vector Field Histogram sectors: Borenstein & Koren, IEEE Transactions on Robotics and Automation, 1991
+
+"""
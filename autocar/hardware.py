@@ -0,0 +1,88 @@
+"""
+Pin factory (GPIO backend) selection for gpiozero.
+
+Left alone, gpiozero picks lgpio, RPi.GPIO, pigpio, native in that order. Only pigpio
+times PWM with DMA, the others toggle the pin from a software thread, which makes the
+SG90 jitter and forces long settling sleeps after every servo move. Here pigpio is
+tried first (it needs the daemon: `sudo pigpiod`), then the others, and on a computer
+that is not a Pi everything falls back to gpiozero's mock pins so the scripts still run.
+
+The backend is chosen in this order:
+    1. the name passed to select_pin_factory(): the scripts pass the pin_factory
+       setting (autocar/config.py: --pin-factory, AUTOCAR_PIN_FACTORY or the config file)
+    2. the GPIOZERO_PIN_FACTORY environment variable
+    3. PREFERRED_FACTORIES, first one that loads
+"""
+
+import os
+
+from gpiozero import Device
+
+
+FACTORIES = {
+    'pigpio':  ('gpiozero.pins.pigpio', 'PiGPIOFactory'),    # DMA-timed PWM on every pin
+    'lgpio':   ('gpiozero.pins.lgpio', 'LGPIOFactory'),      # PWM from a C thread
+    'rpigpio': ('gpiozero.pins.rpigpio', 'RPiGPIOFactory'),  # PWM from a C thread, older Pis only
+    'native':  ('gpiozero.pins.native', 'NativeFactory'),    # PWM from a Python thread
+    'mock':    ('gpiozero.pins.mock', 'MockFactory'),
+}
+
+PREFERRED_FACTORIES = ('pigpio', 'lgpio', 'rpigpio', 'native')
+
+# Servo settling time per backend in seconds, starting points until
+# raspberry-pi/servo-settle-benchmark.py has measured the real car
+SERVO_SETTLE = {
+    'pigpio': 0.02,
+    'lgpio': 0.03,
+    'rpigpio': 0.03,
+    'native': 0.05,
+    'mock': 0.0,
+}
+
+
+def make_pin_factory(name):
+    """Creates the gpiozero pin factory called name, raises if it is not usable on this host"""
+    module_name, class_name = FACTORIES[name]
+    module = __import__(module_name, fromlist=(class_name,))
+    if name == 'mock':
+        # servo and motors need PWM capable mock pins
+        from gpiozero.pins.mock import MockPWMPin
+        return getattr(module, class_name)(pin_class=MockPWMPin)
+    return getattr(module, class_name)()
+
+
+def select_pin_factory(name=None):
+    """
+    Installs the best available pin factory as gpiozero's default and returns its name.
+    Must be called before any gpiozero device is created.
+    """
+    name = name or os.environ.get('GPIOZERO_PIN_FACTORY')
+    candidates = [name] if name else list(PREFERRED_FACTORIES)
+
+    for candidate in candidates:
+        try:
+            Device.pin_factory = make_pin_factory(candidate)
+            return candidate
+        except Exception as e:
+            print(f"[hardware] pin factory {candidate} not available: {e}")
+
+    print("[hardware] no GPIO backend available, using mock pins")
+    Device.pin_factory = make_pin_factory('mock')
+    return 'mock'
+
+
+def servo_settle(factory_name, configured=None):
+    """Settling time after a servo move: the configured value, else the backend default"""
+    if configured is not None:
+        return configured
+    return SERVO_SETTLE.get(factory_name, 0.05)
+
+
+"""
+
+Reference:
+    Pin factories: https://gpiozero.readthedocs.io/en/stable/api_pins.html#changing-the-pin-factory
+    Servo jitter and pigpio: https://gpiozero.readthedocs.io/en/stable/api_output.html#servo
+    pigpio daemon: https://abyz.me.uk/rpi/pigpio/pigpiod.html
+
+"""
@@ -0,0 +1,156 @@
+"""
+Sensor history kept on the Pi, so a dashboard that reconnects gets the recent past back.
+
+History is a fixed-capacity ring buffer in preallocated NumPy arrays: one row per
+sensor tick, a monotonic timestamp and one float32 column per channel. Appending
+writes one row in place, the arrays never grow, and the oldest row is overwritten
+once the buffer is full (36000 rows = 1 h at 10 Hz, under 1 MB for four channels).
+
+window() returns any time range at a requested resolution instead of every sample:
+
+  * 'minmax' splits the range into points/2 buckets of equal sample count and keeps
+    the lowest and highest sample of each, in time order. Spikes survive, which is
+    what matters for distances (a 3 cm reading among 200 cm ones)
+  * 'lttb' (Largest-Triangle-Three-Buckets) keeps the sample of each bucket that
+    spans the largest triangle with its neighbours, closer to the shape of the line
+    but about 6 times slower (one step per output point)
+
+Ranges with fewer samples than points are returned as they are. Timestamps are
+stored on the monotonic clock (the Pi has no RTC and its wall clock jumps when NTP
+syncs) and converted to Unix time when a window is read.
+
+    history = History(('distance', 'ir_left'), capacity=36000)
+    history.append({'distance': 42.0, 'ir_left': 1})
+    history.window(seconds=300, points=400)
+    -> {'t0': 1718000000.0, 'method': 'minmax', 'samples': 3000,
+        'series': {'distance': {'t': [ms after t0, ...], 'v': [...]}, ...}}
+"""
+
+import threading
+import time
+
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+
+
+def minmax(t, v, points):
+    """Indices of the lowest and highest sample of each of points/2 buckets, in time order"""
+    n = len(v)
+    buckets = max(1, points // 2)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.intp)
+    width = int(np.diff(edges).max())
+    # buckets differ by at most one sample, the short ones repeat their last sample
+    rows = np.minimum(edges[:-1, None] + np.arange(width), edges[1:, None] - 1)
+    block = v[rows]
+    pick = np.arange(buckets)
+    low = rows[pick, np.argmin(block, axis=1)]
+    high = rows[pick, np.argmax(block, axis=1)]
+    return np.unique(np.concatenate((low, high)))
+
+
+def lttb(t, v, points):
+    """Indices picked by Largest-Triangle-Three-Buckets, first and last sample always kept"""
+    n = len(v)
+    if n <= points or points < 3:
+        return np.arange(n) if n <= points else np.array([0, n - 1])
+    edges = np.linspace(1, n - 1, points - 1).astype(np.intp)
+    keep = np.empty(points, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # average of the next bucket (the last sample for the last bucket)
+        nlo, nhi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        ct, cv = t[nlo:nhi].mean(), v[nlo:nhi].mean()
+        area = np.abs((t[a] - ct) * (v[lo:hi] - v[a]) - (t[a] - t[lo:hi]) * (cv - v[a]))
+        a = lo + int(np.argmax(area))
+        keep[b + 1] = a
+    return keep
+
+
+class History:
+
+    def __init__(self, channels, capacity=36000, clock=time.monotonic):
+        self.channels = tuple(channels)
+        self.capacity = capacity
+        self.clock = clock
+        self.t = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros((capacity, len(self.channels)), dtype=np.float32)
+        self.head = 0     # next row written
+        self.count = 0
+        self._column = {name: i for i, name in enumerate(self.channels)}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, values, now=None):
+        """One tick, values maps channel names to numbers, missing channels are NaN"""
+        now = self.clock() if now is None else now
+        row = [values.get(name, np.nan) for name in self.channels]
+        with self._lock:
+            self.t[self.head] = now
+            self.values[self.head] = row
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def latest(self, channel, n):
+        """Last n values of one channel, oldest first"""
+        with self._lock:
+            n = min(n, self.count)
+            rows = np.arange(self.head - n, self.head) % self.capacity
+            return self.values[rows, self._column[channel]].astype(np.float64)
+
+    def _range(self, start, end):
+        """Timestamps and values from start to end (monotonic), oldest first"""
+        with self._lock:
+            order = np.arange(self.head - self.count, self.head) % self.capacity
+            t = self.t[order]
+            i = np.searchsorted(t, start, side='left')
+            j = np.searchsorted(t, end, side='right')
+            return t[i:j], self.values[order[i:j]]
+
+    def window(self, start=None, end=None, seconds=None, points=500, channels=None, method='minmax'):
+        """Samples between two Unix times (or the last seconds) reduced to about points per channel"""
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {', '.join(METHODS)}")
+        channels = self.channels if channels is None else tuple(channels)
+        for name in channels:
+            if name not in self._column:
+                raise ValueError(f"channels must be among {', '.join(self.channels)}")
+        now = self.clock()
+        offset = time.time() - now        # monotonic to Unix time
+        end = now if end is None else end - offset
+        if start is not None:
+            start = start - offset
+        elif seconds is not None:
+            start = end - seconds
+        else:
+            start = -np.inf
+        t, values = self._range(start, end)
+        reduce = minmax if method == 'minmax' else lttb
+        t0 = round(float(t[0] + offset), 3) if len(t) else round(end + offset, 3)
+        series = {}
+        for name in channels:
+            v = values[:, self._column[name]].astype(np.float64)
+            valid = ~np.isnan(v)
+            tv, v = t[valid], v[valid]
+            keep = reduce(tv, v, max(2, points))
+            series[name] = {
+                't': np.round((tv[keep] + offset - t0) * 1000).astype(np.int64).tolist(),
+                'v': np.round(v[keep], 1).tolist(),
+            }
+        return {'t0': t0, 'method': method, 'samples': len(t), 'series': series}
+
+
+"""
+
+Reference:
+    NumPy ring buffers and fancy indexing: https://numpy.org/doc/stable/user/basics.indexing.html
+    Largest-Triangle-Three-Buckets, S. Steinarsson 2013: https://skemman.is/handle/1946/15343
+    M4 min/max aggregation for line charts: https://www.vldb.org/pvldb/vol7/p797-jugel.pdf
+
+"""
@@ -0,0 +1,114 @@
+"""
+IR obstacle sensors read from edge callbacks instead of polling.
+
+The loops used to read left_ir.value / right_ir.value once per pass, and not at all
+while a sweep, reverse or turn was sleeping, so a trip could go unseen for a long
+time. IrWatch hooks gpiozero's when_line / when_no_line callbacks instead. Every
+edge goes into a small event channel with its timestamp, and the debounced state
+is kept for car.ir():
+
+  * an obstacle edge trips at once
+  * a clear edge only releases after the sensor stayed clear for release seconds,
+    an obstacle edge before that is a bounce and not a new trip
+
+on_trip(event) runs in gpiozero's callback thread on every obstacle edge, bounces
+included (the car may have driven back in), while the channel only gets the debounced
+changes. The scripts stop the car there (car.preempt()) so a manoeuvre in progress
+ends without waiting for the loop.
+
+The MH sensor module pulls its output low on an obstacle, which LineSensor reports as
+a line (value 0): when_line means blocked, when_no_line means clear. Values follow
+car.ir(), 0 means obstacle. LineSensor averages 5 samples taken at 100 Hz, so an edge
+arrives about 25 ms after the pin changes.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+
+LEFT, RIGHT = 0, 1
+
+# state is the debounced (left, right) after the edge, 0 means obstacle like car.ir()
+IrEvent = namedtuple('IrEvent', 'time side blocked state')
+
+
+class IrWatch:
+
+    def __init__(self, left=None, right=None, release=0.05, on_trip=None, clock=time.monotonic, maxlen=64):
+        self.release = release        # s an input must stay clear before it is released
+        self.on_trip = on_trip
+        self.clock = clock
+        self.events = deque(maxlen=maxlen)   # oldest events drop out when nobody drains them
+        self.raw = [False, False]     # last edge per side, True means obstacle
+        self.blocked = [False, False] # debounced
+        self.clear_since = [0.0, 0.0]
+        self.trips = 0
+        self.bounces = 0
+        self._lock = threading.Lock()
+        self.sensors = []
+        for side, sensor in ((LEFT, left), (RIGHT, right)):
+            if sensor is not None:
+                self.attach(sensor, side)
+
+    def attach(self, sensor, side):
+        """Hooks the edge callbacks of a gpiozero LineSensor, starting from its current value"""
+        sensor.when_line = lambda: self.edge(side, True)
+        sensor.when_no_line = lambda: self.edge(side, False)
+        self.sensors.append(sensor)
+        if not sensor.value:
+            self.edge(side, True)
+
+    def close(self):
+        for sensor in self.sensors:
+            sensor.when_line = sensor.when_no_line = None
+        self.sensors = []
+
+    def edge(self, side, blocked, now=None):
+        """One edge of one sensor, called from the callbacks (or the simulator)"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            self.raw[side] = blocked
+            if not blocked:
+                self.clear_since[side] = now
+                return
+            bounce = self.blocked[side]   # back before the release, still the same obstacle
+            if bounce:
+                self.bounces += 1
+            else:
+                self.blocked[side] = True
+                self.trips += 1
+            event = IrEvent(now, side, True, self._state())
+            if not bounce:
+                self.events.append(event)
+        if self.on_trip is not None:
+            self.on_trip(event)
+
+    def state(self, now=None):
+        """Debounced (left, right), 0 means obstacle, releases the inputs that stayed clear"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            for side in (LEFT, RIGHT):
+                if self.blocked[side] and not self.raw[side] and now - self.clear_since[side] >= self.release:
+                    self.blocked[side] = False
+                    self.events.append(IrEvent(self.clear_since[side] + self.release, side, False, self._state()))
+            return self._state()
+
+    def drain(self):
+        """Events since the last call, oldest first"""
+        self.state()
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+    def _state(self):
+        return tuple(0 if b else 1 for b in self.blocked)
+
+
+"""
+
+Reference:
+    gpiozero LineSensor when_line / when_no_line: https://gpiozero.readthedocs.io/en/stable/api_input.html#linesensor-trct5000
+    Switch debouncing: https://en.wikipedia.org/wiki/Switch#Contact_bounce
+
+"""
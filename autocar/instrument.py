@@ -0,0 +1,235 @@
+"""
+Latency and loop-jitter instrumentation cheap enough to leave on while driving.
+
+Histogram stores durations in log-linear buckets like HdrHistogram: every power of two
+of microseconds is split into 2**sub_bits buckets, so any value is kept with about
+3 % precision (sub_bits=4) in a fixed, preallocated array. Recording is one index
+computation and one increment. Each thread records into its own shard of the array,
+so there is never a lock on the recording path and no increments are lost when
+several threads record into the same histogram; shards are only summed when a
+snapshot is read.
+
+Instruments is a registry of named histograms and counters:
+
+    stats.record('sensor_read', seconds)
+    with stats.timer('parse'): ...
+    loop = stats.loop('control', period=0.02); loop.tick() once per iteration
+    stats.snapshot()   -> {'histograms_ms': {...}, 'counters': {...}} for /stats
+
+FrameClock turns the T: stamp computer-bridge.py puts in every joystick frame into a
+one-way transit time. The two clocks are not synchronised, so the offset between them
+is estimated as the smallest (arrival - stamp) seen: transit is measured relative to
+the fastest frame, which is accurate to the best-case network delay (~1 ms on WiFi).
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Histogram:
+
+    def __init__(self, sub_bits=4, max_seconds=60.0):
+        self.sub_bits = sub_bits
+        self.max_us = int(max_seconds * 1e6)
+        self.size = self._index(self.max_us) + 1
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()   # only taken when a thread records for the first time
+
+    def _index(self, us):
+        if us < (2 << self.sub_bits):
+            return us
+        shift = us.bit_length() - self.sub_bits - 1
+        return ((shift + 1) << self.sub_bits) + (us >> shift) - (1 << self.sub_bits)
+
+    def _value(self, index):
+        """Middle of the bucket, in microseconds"""
+        if index < (2 << self.sub_bits):
+            return index
+        shift = (index >> self.sub_bits) - 1
+        mantissa = (index & ((1 << self.sub_bits) - 1)) + (1 << self.sub_bits)
+        return (mantissa << shift) + ((1 << shift) - 1) / 2
+
+    def _shard(self):
+        # counts per bucket followed by [count, total_us, max_us]
+        shard = [0] * (self.size + 3)
+        self._local.shard = shard
+        with self._shards_lock:
+            self._shards.append(shard)
+        return shard
+
+    def record(self, seconds):
+        us = min(self.max_us, max(0, int(seconds * 1e6)))
+        shard = getattr(self._local, 'shard', None) or self._shard()
+        shard[self._index(us)] += 1
+        shard[-3] += 1
+        shard[-2] += us
+        if us > shard[-1]:
+            shard[-1] = us
+
+    def snapshot(self, quantiles=(0.5, 0.9, 0.99)):
+        """count, mean, percentiles and max in milliseconds"""
+        shards = list(self._shards)
+        merged = [sum(column) for column in zip(*shards)] if shards else [0] * (self.size + 3)
+        count, total, maximum = merged[-3], merged[-2], max((s[-1] for s in shards), default=0)
+        result = {'count': count}
+        if not count:
+            return result
+        result['mean'] = round(total / count / 1000, 3)
+        result['sum'] = round(total / 1000, 3)
+        targets = [(q, q * count) for q in quantiles]
+        seen = 0
+        for index in range(self.size):
+            seen += merged[index]
+            while targets and seen >= targets[0][1]:
+                q = targets.pop(0)[0]
+                result[f'p{q * 100:g}'] = round(min(self._value(index), maximum) / 1000, 3)
+            if not targets:
+                break
+        result['max'] = round(maximum / 1000, 3)
+        return result
+
+    def reset(self):
+        for shard in list(self._shards):
+            shard[:] = [0] * len(shard)
+
+
+class Counter:
+    """Per-thread shards like Histogram, so incrementing needs no lock"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def add(self, n=1):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = [0]
+            with self._shards_lock:
+                self._shards.append(shard)
+        shard[0] += n
+
+    @property
+    def value(self):
+        return sum(shard[0] for shard in list(self._shards))
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.start)
+
+
+class LoopTimer:
+    """Records the period of a loop and how far it is from the intended one (jitter)"""
+
+    def __init__(self, instruments, name, period):
+        self.period = period
+        self.periods = instruments.histogram(f'{name}.period')
+        self.jitter = instruments.histogram(f'{name}.jitter')
+        self.last = None
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last is not None:
+            period = now - self.last
+            self.periods.record(period)
+            self.jitter.record(abs(period - self.period))
+        self.last = now
+
+
+class Instruments:
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()   # only for creating new names
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def counter(self, name):
+        counter = self.counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self.counters.setdefault(name, Counter())
+        return counter
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    def count(self, name, n=1):
+        self.counter(name).add(n)
+
+    def timer(self, name):
+        return _Timer(self.histogram(name))
+
+    def loop(self, name, period):
+        return LoopTimer(self, name, period)
+
+    def snapshot(self):
+        return {
+            'histograms_ms': {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+            'counters': {name: c.value for name, c in sorted(self.counters.items())},
+        }
+
+
+class FrameClock:
+    """One-way transit of stamped frames, relative to the fastest frame seen"""
+
+    def __init__(self):
+        self.offset = None
+
+    def transit(self, sent_ms, received_at):
+        """Seconds the frame stamped sent_ms (sender's clock) spent on the way"""
+        difference = received_at - sent_ms / 1000
+        if self.offset is None or difference < self.offset:
+            self.offset = difference
+        return difference - self.offset
+
+
+def serve_http(instruments, port=5010, host='127.0.0.1', routes=None):
+    """Serves instruments.snapshot() as JSON on http://host:port/stats from a daemon thread,
+    and what routes (path -> function) return on their paths"""
+    pages = {'/stats': instruments.snapshot, **(routes or {})}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = pages.get(self.path.split('?')[0].rstrip('/'))
+            body = json.dumps(page() if page is not None else {'error': 'not found', 'paths': sorted(pages)}).encode()
+            self.send_response(200 if page is not None else 404)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass   # keep the console for the car's own output
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='stats-http', daemon=True).start()
+    return server
+
+
+"""
+
+Reference:
+    HdrHistogram bucket layout: http://hdrhistogram.org/
+    Clock offset from minimum one-way delay: https://en.wikipedia.org/wiki/Network_Time_Protocol#Clock_synchronization_algorithm
+
+"""
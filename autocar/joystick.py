@@ -0,0 +1,134 @@
+"""
+HW-504 joystick frames from computer-bridge.py, received with asyncio.
+
+The bridge sends one line per reading, `X:<0..1023>|Y:<0..1023>|SW:<0|1>|T:<ms>`, over TCP
+(port 5005, like pi-receiver-mode-switcher.py). The same lines are also accepted as
+UDP datagrams (port 5006), which skips TCP's retransmission delays on a bad WiFi link.
+
+JoystickListener serves both on one asyncio event loop running in its own thread, so it
+can sit next to the Flask-SocketIO server in app.py. Every frame is handed to
+on_frame(joystick, sent_at): the perf_counter() time the frame left the computer,
+estimated from its T: stamp (see instrument.FrameClock), or its arrival time for
+frames without one. With stats, parse time and transit time are recorded too.
+"""
+
+import asyncio
+import threading
+import time
+
+from autocar.instrument import FrameClock
+
+
+DEADZONE = 100   # ignore small deviations near the centre (512)
+
+
+def parse_frame(line, joystick):
+    """Updates the joystick dict from one `X:..|Y:..|SW:..` line, returns False if malformed"""
+    try:
+        for part in line.split('|'):
+            key, val = part.split(':')
+            joystick[key] = int(val)
+        return True
+    except ValueError:
+        return False
+
+
+def get_movement(x, y, deadzone=DEADZONE):
+    x_centered = x - 512
+    y_centered = y - 512
+
+    if abs(x_centered) < deadzone and abs(y_centered) < deadzone:
+        return 'stop'
+    if y_centered > deadzone:
+        return 'forward'
+    elif y_centered < -deadzone:
+        return 'backward'
+    elif x_centered > deadzone:
+        return 'right'
+    elif x_centered < -deadzone:
+        return 'left'
+    else:
+        return 'stop'
+
+
+class _Datagrams(asyncio.DatagramProtocol):
+
+    def __init__(self, listener):
+        self.listener = listener
+
+    def datagram_received(self, data, addr):
+        self.listener._lines(data, time.perf_counter())
+
+
+class JoystickListener:
+
+    def __init__(self, on_frame, host='', tcp_port=5005, udp_port=5006, stats=None):
+        self.on_frame = on_frame
+        self.stats = stats
+        self.clock = FrameClock()
+        self.host = host
+        self.tcp_port = tcp_port
+        self.udp_port = udp_port
+        self.joystick = {'X': 512, 'Y': 512, 'SW': 0}
+        self.frames = 0
+        self.loop = None
+
+    def _lines(self, data, received_at):
+        for line in data.decode('utf-8', 'replace').split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            start = time.perf_counter()
+            self.joystick.pop('T', None)
+            if not parse_frame(line, self.joystick):
+                continue
+            self.frames += 1
+            sent_at = received_at
+            if 'T' in self.joystick:
+                transit = self.clock.transit(self.joystick['T'], received_at)
+                sent_at -= transit
+                if self.stats is not None:
+                    self.stats.record('joystick.transit', transit)
+            if self.stats is not None:
+                self.stats.record('joystick.parse', time.perf_counter() - start)
+                self.stats.count('joystick.frames')
+            self.on_frame(dict(self.joystick), sent_at)
+
+    async def _client(self, reader, writer):
+        print(f"[joystick] TCP connection from {writer.get_extra_info('peername')}")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._lines(line, time.perf_counter())
+        finally:
+            writer.close()
+            # joystick link lost: behave like a centred stick
+            self.joystick.update(X=512, Y=512, SW=0)
+            self.on_frame(dict(self.joystick), time.perf_counter())
+            print("[joystick] TCP connection closed")
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self._client, self.host or None, self.tcp_port, reuse_address=True)
+        if self.udp_port:
+            await self.loop.create_datagram_endpoint(lambda: _Datagrams(self), local_addr=(self.host or '0.0.0.0', self.udp_port))
+        print(f"[joystick] listening on TCP {self.tcp_port}" + (f" and UDP {self.udp_port}" if self.udp_port else ""))
+        async with server:
+            await server.serve_forever()
+
+    def start(self):
+        """Runs the listener's event loop on a daemon thread and returns the thread"""
+        thread = threading.Thread(target=asyncio.run, args=(self.serve(),), name='joystick', daemon=True)
+        thread.start()
+        return thread
+
+
+"""
+
+Reference:
+    asyncio streams: https://docs.python.org/3/library/asyncio-stream.html
+    asyncio datagram endpoints: https://docs.python.org/3/library/asyncio-protocol.html#datagram-protocols
+
+"""
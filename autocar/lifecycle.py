@@ -0,0 +1,125 @@
+"""
+Subsystem start-up: bring hardware up in the background while the scripts already serve.
+
+Both scripts used to build every device at import time, one after the other, before
+the web server or the TCP listener existed. Subsystems registers one init function
+per subsystem with the subsystems it needs; start() runs them on worker threads,
+each as soon as everything it requires is ready, so independent devices come up in
+parallel. Lazy subsystems are only built by the first get().
+
+status() reports the overall state ('initializing', 'ready' or 'failed') and the
+init time of each subsystem, so slow ones show up in the logs and on the dashboard.
+"""
+
+import threading
+import time
+
+
+class Subsystem:
+
+    def __init__(self, name, init, requires=(), lazy=False):
+        self.name = name
+        self.init = init
+        self.requires = tuple(requires)
+        self.lazy = lazy
+        self.state = 'pending'   # pending -> starting -> ready | failed
+        self.value = None
+        self.error = None
+        self.seconds = None
+        self.done = threading.Event()
+
+
+class Subsystems:
+
+    def __init__(self, log=print):
+        self._items = {}
+        self._lock = threading.Lock()
+        self.log = log
+        self.started_at = None
+
+    def add(self, name, init, requires=(), lazy=False):
+        """Registers init() for name, run once everything in requires is ready"""
+        self._items[name] = Subsystem(name, init, requires, lazy)
+
+    def start(self):
+        """Starts every non-lazy subsystem on its own thread and returns immediately"""
+        self.started_at = time.monotonic()
+        for item in self._items.values():
+            if not item.lazy:
+                threading.Thread(target=self._bring_up, args=(item,), name=f'init-{item.name}', daemon=True).start()
+
+    def _bring_up(self, item):
+        with self._lock:
+            if item.state != 'pending':
+                return
+            item.state = 'starting'
+
+        for required in item.requires:
+            self.get(required)
+            if self._items[required].state == 'failed':
+                item.error = f"requires {required}"
+                item.state = 'failed'
+                item.done.set()
+                return
+
+        start = time.monotonic()
+        try:
+            item.value = item.init()
+            item.state = 'ready'
+        except Exception as e:
+            item.error = str(e)
+            item.state = 'failed'
+        item.seconds = time.monotonic() - start
+        self.log(f"[init] {item.name} {item.state} in {item.seconds * 1000:.0f} ms"
+                 + (f": {item.error}" if item.error else ""))
+        item.done.set()
+
+    def get(self, name, timeout=None):
+        """Value returned by name's init function, waits (and builds lazy ones) if needed"""
+        item = self._items[name]
+        if item.state == 'pending':
+            self._bring_up(item)   # lazy, or asked for before its thread got to it
+        item.done.wait(timeout)
+        return item.value
+
+    def ready(self, name=None):
+        """True once name (or every non-lazy subsystem) is up"""
+        if name is not None:
+            return self._items[name].state == 'ready'
+        return all(item.state == 'ready' for item in self._items.values() if not item.lazy)
+
+    def wait(self, timeout=None):
+        """Waits for every non-lazy subsystem, returns ready()"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for item in self._items.values():
+            if not item.lazy:
+                item.done.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return self.ready()
+
+    def state(self):
+        items = [item for item in self._items.values() if not item.lazy]
+        if any(item.state == 'failed' for item in items):
+            return 'failed'
+        if all(item.state == 'ready' for item in items):
+            return 'ready'
+        return 'initializing'
+
+    def status(self):
+        return {
+            'state': self.state(),
+            'subsystems': {
+                item.name: {
+                    'state': item.state,
+                    'ms': None if item.seconds is None else round(item.seconds * 1000, 1),
+                    'error': item.error,
+                } for item in self._items.values()
+            },
+        }
+
+
+"""
+
+Reference:
+    threading.Event: https://docs.python.org/3/library/threading.html#event-objects
+
+"""
@@ -0,0 +1,89 @@
+"""
+Prometheus text exposition of the Instruments in instrument.py.
+
+Rendering only reads the per-thread shards, it never takes a lock the sensor or
+autonomous threads record under, so a scrape cannot delay the car. Names are mapped
+to Prometheus conventions:
+
+    counter   'motor_commands.forward'  -> autocar_motor_commands_total{direction="forward"}
+    histogram 'sensor_loop.period'      -> autocar_sensor_loop_period_seconds (summary with quantiles)
+    gauge     'clients'                 -> autocar_clients, read from a callable at scrape time
+
+The part after the first dot becomes a label when the prefix is in LABELS, otherwise
+it is folded into the metric name.
+"""
+
+import re
+
+
+PREFIX = 'autocar'
+QUANTILES = (0.5, 0.9, 0.99)
+
+LABELS = {
+    'motor_commands': 'direction',
+    'sensor_errors': 'sensor',
+    'emits': 'event',
+    'obstacles': 'sensor',
+}
+
+
+def _split(name):
+    """Metric name and label string for an instrument name"""
+    prefix, _, rest = name.partition('.')
+    if rest and prefix in LABELS:
+        return prefix, f'{{{LABELS[prefix]}="{rest}"}}'
+    return name, ''
+
+
+def _metric(name):
+    return f"{PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+
+def render(instruments, gauges=None):
+    """Prometheus text format (version 0.0.4) for every counter, histogram and gauge"""
+    lines = []
+    declared = set()
+
+    def declare(metric, kind, help_text):
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+
+    for name, counter in sorted(instruments.counters.items()):
+        base, labels = _split(name)
+        metric = _metric(base) + '_total'
+        declare(metric, 'counter', re.sub(r'[_.]', ' ', base))
+        lines.append(f"{metric}{labels} {counter.value}")
+
+    for name, histogram in sorted(instruments.histograms.items()):
+        base, labels = _split(name)
+        metric = _metric(base) + '_seconds'
+        declare(metric, 'summary', f"{re.sub(r'[_.]', ' ', base)} in seconds")
+        snapshot = histogram.snapshot(QUANTILES)
+        inner = labels[1:-1] + ',' if labels else ''
+        for q in QUANTILES:
+            value = snapshot.get(f'p{q * 100:g}')
+            if value is not None:
+                lines.append(f'{metric}{{{inner}quantile="{q}"}} {value / 1000:.6f}')
+        lines.append(f"{metric}_sum{labels} {snapshot.get('sum', 0) / 1000:.6f}")
+        lines.append(f"{metric}_count{labels} {snapshot['count']}")
+
+    for name, read in sorted((gauges or {}).items()):
+        metric = _metric(name)
+        declare(metric, 'gauge', name.replace('_', ' '))
+        try:
+            lines.append(f"{metric} {float(read())}")
+        except Exception:
+            pass   # a gauge whose source is not up yet is left out
+
+    return '\n'.join(lines) + '\n'
+
+
+"""
+
+Reference:
+    Exposition format: https://prometheus.io/docs/instrumenting/exposition_formats/
+    Metric and label naming: https://prometheus.io/docs/practices/naming/
+
+"""
@@ -0,0 +1,93 @@
+"""
+Single owner of the motors when several inputs drive the same car.
+
+With the joystick and the web dashboard in one process, every motor write goes
+through MotorOwner. It has gpiozero Robot's methods (forward, backward, left, right,
+stop, value), so GpioCar and the existing code can use it in place of the Robot, and
+it serialises writes with a lock so a joystick frame and a browser click never
+interleave. Each write records which input made it; with received_at (the
+perf_counter() time the command was sent or arrived) it also records the latency
+from that input to the motors in the <source>_to_motor histogram of stats.
+"""
+
+import threading
+import time
+
+
+class MotorOwner:
+
+    def __init__(self, robot, stats=None):
+        self.robot = robot
+        self.stats = stats   # autocar.instrument.Instruments
+        self.last_source = None
+        self.last_direction = 'stop'
+        self._lock = threading.Lock()
+
+    def move(self, direction, speed=0.5, source='auto', received_at=None):
+        """Drives in direction ('forward', 'backward', 'left', 'right' or 'stop')"""
+        with self._lock:
+            if direction == 'forward':
+                self.robot.forward(speed)
+            elif direction == 'backward':
+                self.robot.backward(speed)
+            elif direction == 'left':
+                self.robot.left(speed)
+            elif direction == 'right':
+                self.robot.right(speed)
+            else:
+                direction = 'stop'
+                self.robot.stop()
+            self.last_source = source
+            self.last_direction = direction
+        if self.stats is not None:
+            self.stats.count(f'motor_commands.{direction}')
+        if received_at is not None and self.stats is not None:
+            self.stats.record(f'{source}_to_motor', time.perf_counter() - received_at)
+
+    def drive(self, left, right, source='auto', received_at=None):
+        """Differential wheel speeds in -1..1, for analog inputs and the navigation code"""
+        with self._lock:
+            self.robot.value = (left, right)
+            self.last_source = source
+            self.last_direction = 'drive'
+        if self.stats is not None:
+            self.stats.count('motor_commands.drive')
+        if received_at is not None and self.stats is not None:
+            self.stats.record(f'{source}_to_motor', time.perf_counter() - received_at)
+
+    # ---- gpiozero Robot interface ----
+
+    def forward(self, speed=1):
+        self.move('forward', speed)
+
+    def backward(self, speed=1):
+        self.move('backward', speed)
+
+    def left(self, speed=1):
+        self.move('left', speed)
+
+    def right(self, speed=1):
+        self.move('right', speed)
+
+    def stop(self):
+        self.move('stop')
+
+    @property
+    def value(self):
+        return self.robot.value
+
+    @value.setter
+    def value(self, value):
+        self.drive(*value)
+
+    def close(self):
+        with self._lock:
+            self.robot.close()
+
+
+"""
+
+Reference:
+    gpiozero Robot: https://gpiozero.readthedocs.io/en/stable/api_boards.html#robot
+
+"""
@@ -0,0 +1,226 @@
+"""
+Autonomous navigation shared by the receiver, the web app and the simulator.
+
+Two strategies live here:
+
+  * stop-and-sweep: the original behaviour. Drive straight until something is
+    closer than the stopping threshold, stop, sweep the servo 0..180, reverse and
+    turn toward the angle with the largest distance.
+
+  * reactive: keep driving while the servo slowly oscillates around straight ahead.
+    Every reading goes into a rolling polar histogram and the wheel speeds are
+    adjusted every tick to steer toward the clearest nearby heading and slow down
+    near obstacles. The full stop-and-sweep is only used when the car is boxed in.
+
+Angles follow the servo convention used everywhere else in the project:
+0..180 degrees, 90 is straight ahead, below 90 is left, above 90 is right.
+"""
+
+
+def receiver_sweep_angles(step=5):
+    """Sweep pattern used by the receiver: 90 -> 0 -> 180 -> 90 in step degree steps"""
+    return list(range(90, -1, -step)) + \
+           list(range(0, 181, step)) + \
+           list(range(180, 89, -step))
+
+
+RECEIVER_SWEEP_ANGLES = receiver_sweep_angles(5)
+
+
+def sweep(car, angles, servo_model, on_reading=None):
+    """
+    Sweeps the servo over angles, takes one reading per unique angle, returns {angle: distance}.
+    Every step waits as long as servo_model says that move needs and pings in its tail.
+    """
+    distance_map = {}
+    for angle in angles:
+        if angle in distance_map:   # avoid duplicates
+            continue
+        delta = angle - car.servo_angle
+        car.servo(angle)
+        car.sleep(servo_model.trigger_delay(delta))
+        dist = car.distance()
+        distance_map[angle] = dist
+        if on_reading is not None:
+            on_reading(angle, dist)
+    return distance_map
+
+
+def best_angle(distance_map):
+    """Angle with the largest distance"""
+    return max(distance_map, key=lambda a: distance_map[a])
+
+
+class PolarHistogram:
+    """
+    Rolling polar histogram of the area in front of the car.
+
+    Readings are binned into sectors of sector_size degrees. Each sector keeps its
+    latest distance and when it was measured, readings older than max_age seconds
+    are ignored because the car has moved since. ReactiveNavigator raises max_age
+    to the time its scan takes to come back to a sector.
+    """
+
+    def __init__(self, sector_size=15, max_age=0.8):
+        self.sector_size = sector_size
+        self.max_age = max_age
+        self.sectors = {}   # sector centre angle -> (distance, timestamp)
+
+    def sector_of(self, angle):
+        return int(round(angle / self.sector_size)) * self.sector_size
+
+    def update(self, angle, distance, now):
+        self.sectors[self.sector_of(angle)] = (distance, now)
+
+    def fresh(self, now):
+        """{sector angle: distance} of the readings that are not stale"""
+        return {angle: dist for angle, (dist, t) in self.sectors.items()
+                if now - t <= self.max_age}
+
+    def clear(self):
+        self.sectors.clear()
+
+
+class ReactiveNavigator:
+    """
+    Continuous navigation: one tick() per control loop iteration.
+
+    Every tick reads the ultrasonic sensor at the angle the servo was moved to on
+    the previous tick, updates the histogram, sets differential wheel speeds and
+    moves the servo one step further along its oscillation. When the IR sensors
+    trip or the car is boxed in, it stops and fallback() is called
+    (the regular stop, sweep, reverse and turn of the calling script).
+    With an ObstacleFusion the readings and IR state go into it, with the
+    distance driven when there is a stopping model, and it decides whether
+    something is ahead instead of any single reading.
+    """
+
+    def __init__(self, car, fallback, cruise=0.5,
+                 scan_min=45, scan_max=135, scan_step=15,
+                 stop_distance=15, slow_distance=50, clear_distance=35,
+                 steer_gain=1.6, min_speed_ratio=0.35, stopping=None, fusion=None):
+        self.car = car
+        self.fallback = fallback
+        self.cruise = cruise                    # forward speed on open floor, 0..1
+        self.scan_min = scan_min                # servo oscillation range in degrees
+        self.scan_max = scan_max
+        self.scan_step = scan_step              # degrees per tick
+        self.stop_distance = stop_distance      # cm, boxed in below this
+        self.slow_distance = slow_distance      # cm, start slowing down below this
+        self.clear_distance = clear_distance    # cm, a sector is drivable above this
+        self.steer_gain = steer_gain
+        self.min_speed_ratio = min_speed_ratio
+        self.stopping = stopping                # StoppingModel, replaces stop/slow_distance when given
+        self.fusion = fusion                    # ObstacleFusion, replaces the IR and front checks when given
+        self.speed = 0.0                        # last commanded forward speed
+        self.last_tick = None                   # time of the last tick, the car drove since
+        self.histogram = PolarHistogram()
+        self.min_age = self.histogram.max_age   # s, readings are kept at least this long
+        self.servo_angle = 90
+        self.direction = 1
+        self.fallbacks = 0
+        self.car.servo(self.servo_angle)
+
+    def reset(self):
+        """Forget everything seen so far and point the servo straight ahead"""
+        self.histogram.clear()
+        if self.fusion is not None:
+            self.fusion.clear()
+        self.last_tick = None
+        self.servo_angle = 90
+        self.direction = 1
+        self.car.servo(self.servo_angle)
+
+    def front_distance(self, readings):
+        """Closest fresh reading within one sector of straight ahead"""
+        front = [dist for angle, dist in readings.items()
+                 if abs(angle - 90) <= self.histogram.sector_size]
+        return min(front) if front else None
+
+    def choose_heading(self, readings):
+        """Clear sector closest to straight ahead, preferring the ones with more room"""
+        candidates = {angle: dist for angle, dist in readings.items()
+                      if dist >= self.clear_distance}
+        if not candidates:
+            # nothing is clear yet, creep toward whatever has the most room
+            return max(readings, key=lambda a: readings[a])
+        return max(candidates,
+                   key=lambda a: min(candidates[a], 100) - 0.5 * abs(a - 90))
+
+    def current_stop_distance(self):
+        if self.stopping is None:
+            return self.stop_distance
+        return self.stopping.threshold(self.speed)
+
+    def wheel_speeds(self, heading, front):
+        """Differential wheel speeds steering toward heading, slowing down near obstacles"""
+        speed = self.cruise
+        if self.stopping is not None:
+            speed = self.stopping.approach_speed(self.cruise, front)
+        elif front is not None and front < self.slow_distance:
+            ratio = (front - self.stop_distance) / (self.slow_distance - self.stop_distance)
+            speed *= max(self.min_speed_ratio, min(1.0, ratio))
+
+        self.speed = speed
+        offset = (heading - 90) / 90   # -1 (left) .. 1 (right)
+        left = speed * (1 + self.steer_gain * offset)
+        right = speed * (1 - self.steer_gain * offset)
+        return max(-1.0, min(1.0, left)), max(-1.0, min(1.0, right))
+
+    def scan_ticks(self):
+        """Ticks the oscillating servo takes to come back to the same angle"""
+        return 2 * (self.scan_max - self.scan_min) // self.scan_step
+
+    def next_servo_angle(self):
+        angle = self.servo_angle + self.direction * self.scan_step
+        if angle > self.scan_max or angle < self.scan_min:
+            self.direction = -self.direction
+            angle = self.servo_angle + self.direction * self.scan_step
+        return angle
+
+    def tick(self):
+        """Runs one control step, returns False if the car had to fall back to stop-and-sweep"""
+        now = self.car.now()
+        dist = self.car.distance()
+        ir_left, ir_right = self.car.ir()
+        if self.last_tick is not None:
+            # at the receiver's 0.1 s loop a scan takes over a second, keep the readings until it comes back
+            self.histogram.max_age = max(self.min_age, self.scan_ticks() * (now - self.last_tick))
+        self.histogram.update(self.servo_angle, dist, now)
+
+        readings = self.histogram.fresh(now)
+        front = self.front_distance(readings)
+        heading = self.choose_heading(readings)
+
+        stop_distance = self.current_stop_distance()
+        if self.fusion is not None:
+            if self.stopping is not None and self.last_tick is not None:
+                self.fusion.advance(self.speed * self.stopping.max_speed * (now - self.last_tick))
+            self.fusion.observe(self.servo_angle, dist, (ir_left, ir_right), now)
+            blocked = self.fusion.blocked(stop_distance, now)
+        else:
+            blocked = ir_left == 0 or ir_right == 0 or (front is not None and front < stop_distance)
+        self.last_tick = now
+        if blocked or readings[heading] < stop_distance:
+            self.car.stop()
+            self.speed = 0.0
+            self.fallbacks += 1
+            self.fallback()
+            self.reset()
+            return False
+
+        self.car.drive(*self.wheel_speeds(heading, front))
+
+        self.servo_angle = self.next_servo_angle()
+        self.car.servo(self.servo_angle)
+        return True
+
+
+"""
+
+Reference:
+    Vector Field Histogram idea adapted from Borenstein & Koren, "The Vector Field Histogram -
+    Fast Obstacle Avoidance for Mobile Robots", IEEE Transactions on Robotics and Automation, 1991
+    Robot.value (differential wheel speeds): https://gpiozero.readthedocs.io/en/stable/api_boards.html#robot
+
+"""
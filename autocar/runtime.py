@@ -0,0 +1,110 @@
+"""
+Dashboard background work on the web server's event loop instead of on OS threads.
+
+app.py serves with eventlet without monkey-patching, so time.sleep() and threading
+stay real. socketio.emit() from a real thread only queues the packet for eventlet's
+hub, which sends it when it next wakes for something else, if at all: in
+benchmarks/emits.py none of 50 events emitted from a thread at 10 Hz reached the
+client. Runtime keeps the two sides apart:
+
+  * spawn(fn) runs fn as a green thread on the hub and sleep() yields to it, so the
+    periodic loops (sensor monitor, input watchdog) emit from the hub and are sent at once
+  * offload(fn, *args) runs a blocking call (an ultrasonic ping, a servo move, waiting
+    for the hardware to come up) in a bounded pool of real threads (eventlet.tpool),
+    the green thread waits for the result without blocking the hub. Called from a real
+    thread it simply calls fn
+  * emit(event, data) sends at once from the hub. From a real thread (the supervised
+    autonomous and sweep tasks, the joystick listener, the pool) the event is queued
+    for a green thread that sends it, woken through the pool, so it goes out in under
+    a millisecond instead of whenever the hub wakes
+
+The long driving tasks stay on the Supervisor's threads: a sweep or turn is a chain
+of blocking servo moves and pings that would need an offload per step.
+
+With any other async_mode there is no hub: spawn starts a thread, offload and emit
+call directly.
+
+    runtime = Runtime(socketio, threads=4, instruments=stats)
+    runtime.start()                      # before socketio.run()
+    runtime.spawn(loop)                  # loop() calls runtime.offload(read) and runtime.sleep(0.1)
+"""
+
+import queue
+import threading
+import time
+
+_CLOSE = object()
+
+
+class Runtime:
+
+    def __init__(self, socketio, threads=4, instruments=None):
+        self.socketio = socketio
+        self.instruments = instruments   # records emit_handoff, how long a queued event waited
+        self.green = socketio.async_mode == 'eventlet'
+        self.loop_thread = None          # OS thread running the hub, known once the emitter runs
+        self._outbox = queue.SimpleQueue()
+        self._tpool = None
+        if self.green:
+            from eventlet import tpool
+            tpool.set_num_threads(threads)   # one of them waits for queued events
+            self._tpool = tpool
+
+    def start(self):
+        """Starts the green thread sending the events queued by real threads"""
+        if self.green:
+            self.spawn(self._emitter)
+
+    def close(self):
+        """Ends the emitter, which stops the pool from the hub's thread"""
+        self._outbox.put(_CLOSE)
+
+    def on_loop(self):
+        """True in a green thread on the hub, where nothing may block"""
+        return self.green and threading.get_ident() == self.loop_thread
+
+    def spawn(self, fn, *args):
+        return self.socketio.start_background_task(fn, *args)
+
+    def sleep(self, seconds):
+        self.socketio.sleep(seconds)
+
+    def offload(self, fn, *args):
+        """fn(*args) in the thread pool when called on the hub, directly otherwise"""
+        if self.on_loop():
+            return self._tpool.execute(fn, *args)
+        return fn(*args)
+
+    def emit(self, event, data):
+        """socketio.emit() to every client, from the hub or any thread"""
+        if self.green and not self.on_loop():
+            self._outbox.put((event, data, time.perf_counter()))
+        else:
+            self.socketio.emit(event, data)
+
+    def _emitter(self):
+        self.loop_thread = threading.get_ident()
+        while True:
+            item = self._tpool.execute(self._outbox.get)
+            while item is not _CLOSE:
+                event, data, queued = item
+                self.socketio.emit(event, data)
+                if self.instruments is not None:
+                    self.instruments.record('emit_handoff', time.perf_counter() - queued)
+                try:
+                    item = self._outbox.get_nowait()
+                except queue.Empty:
+                    break
+            if item is _CLOSE:
+                self._tpool.killall()
+                return
+
+
+"""
+
+Reference:
+    Flask-SocketIO and eventlet (background tasks, monkey patching): https://flask-socketio.readthedocs.io/en/latest/deployment.html#using-multiple-workers
+    eventlet.tpool: https://eventlet.readthedocs.io/en/latest/threading.html#tpool-simple-thread-pool
+    Flask-SocketIO start_background_task / sleep: https://flask-socketio.readthedocs.io/en/latest/api.html#flask_socketio.SocketIO.start_background_task
+
+"""
@@ -0,0 +1,90 @@
+"""
+Servo motion model: how long the SG90 needs for a move, instead of fixed sleeps.
+
+The old sweeps slept the same 0.03 + 0.05 s (receiver) or 0.05 + 0.1 s (app.py) for
+every step, whether the servo moved 5 degrees or 180. A move really takes
+
+    slew * degrees + settle
+
+(SG90 datasheet: 0.1 s per 60 degrees at 4.8 V, slower under load). The ultrasonic
+is read on demand (see ultrasonic.py), so the ping does not have to wait until the
+servo is completely at rest: the last few degrees of motion do not change what a
+30 degree wide ultrasonic beam sees. trigger_lead is how much earlier than the end
+of the move the ping is sent.
+
+slew, settle and trigger_lead are measured once with
+raspberry-pi/servo-settle-benchmark.py, which writes the calibration file loaded here.
+A calibration file that cannot be read is reported and the defaults are used.
+"""
+
+import json
+import math
+import os
+
+
+class ServoModel:
+
+    def __init__(self, slew=0.002, settle=0.03, trigger_lead=0.01, path=None):
+        self.slew = slew                    # seconds per degree
+        self.settle = settle                # seconds for the horn to stop ringing after the move
+        self.trigger_lead = trigger_lead    # seconds the ping may be sent before the move ends
+        self.path = path
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def move_time(self, degrees):
+        """Seconds until the servo is at rest after moving by degrees"""
+        return self.slew * abs(degrees) + self.settle
+
+    def trigger_delay(self, degrees):
+        """Seconds to wait after commanding a move before pinging the ultrasonic"""
+        return max(0.0, self.move_time(degrees) - self.trigger_lead)
+
+    def sweep_time(self, angles, start=90):
+        """Total waiting time of a sweep over angles, starting from start"""
+        total = 0.0
+        previous = start
+        for angle in angles:
+            total += self.trigger_delay(angle - previous)
+            previous = angle
+        return total
+
+    def load(self):
+        """Timings from the calibration file, keeps the current ones if the file cannot be read"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            values = (float(data['slew']), float(data['settle']), float(data.get('trigger_lead', self.trigger_lead)))
+            if not all(math.isfinite(v) and v >= 0 for v in values):
+                raise ValueError(f"timings {values} are not all >= 0")
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"[servo] {self.path} unreadable ({e}), using slew {self.slew} s/deg, settle {self.settle} s")
+            return
+        self.slew, self.settle, self.trigger_lead = values
+
+    def save(self, path=None):
+        """Writes a temporary file and renames it over the calibration, never leaving half a file"""
+        path = path or self.path
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'slew': self.slew, 'settle': self.settle, 'trigger_lead': self.trigger_lead}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+def point_servo(car, angle, model):
+    """Moves the servo and waits exactly as long as that move needs, angle clamped to 0..180 like car.servo()"""
+    angle = max(0, min(180, angle))
+    delta = angle - car.servo_angle
+    car.servo(angle)
+    car.sleep(model.move_time(delta))
+
+
+"""
+
+Reference:
+    SG90 datasheet (operating speed 0.1 s/60 degrees): http://www.ee.ic.ac.uk/pcheung/teaching/DE1_EE/stores/sg90_datasheet.pdf
+    os.replace (atomic rename on POSIX): https://docs.python.org/3/library/os.html#os.replace
+
+"""
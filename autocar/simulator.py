@@ -0,0 +1,657 @@
+"""
+2D simulator of the car, used to compare navigation strategies without hardware.
+
+The world is a rectangular arena (cm) with round obstacles. SimCar implements the
+same interface as GpioCar (see car.py), but sleep() advances a simulated clock and
+integrates differential-drive kinematics, so the navigation code runs unchanged and
+a minute of driving takes a fraction of a second.
+
+Run from the repository root:
+
+    python -m autocar.simulator                 # compare strategies over 20 seeds
+    python -m autocar.simulator --seeds 50 --duration 120
+    python -m autocar.simulator --sweeps        # servo sweep time and accuracy, fixed sleeps vs model
+    python -m autocar.simulator --ir            # IR reaction time, polled vs edge callbacks
+    python -m autocar.simulator --fusion        # false stops and collisions, raw checks vs ObstacleFusion
+    python -m autocar.simulator --check reactive   # exits with 1 if reactive collides more than sweep
+    python -m autocar.simulator --check sweep --period 0.12   # and the other way round at the receiver's rate
+
+By default the sensors only have Gaussian range noise. run_episode(faults=...) adds the
+ways they fail on the car: dark obstacles the IR does not see, soft ones the ultrasonic
+mostly gets no echo from, and spurious short echoes.
+"""
+
+import argparse
+import math
+import random
+import sys
+
+from autocar.braking import StoppingModel
+from autocar.fusion import ObstacleFusion
+from autocar.infrared import IrWatch
+from autocar.navigation import RECEIVER_SWEEP_ANGLES, ReactiveNavigator, best_angle, receiver_sweep_angles, sweep
+from autocar.servo import ServoModel, point_servo
+from autocar.turning import TurnModel, reverse, turn
+
+
+class World:
+
+    def __init__(self, width=400, height=300, obstacles=None, dark=(), soft=()):
+        self.width = width
+        self.height = height
+        self.obstacles = obstacles or []   # list of (x, y, radius) in cm
+        self.dark = frozenset(dark)        # indices of obstacles the IR sensors do not see
+        self.soft = frozenset(soft)        # indices of obstacles that mostly send no echo back
+
+    @classmethod
+    def random(cls, seed, count=10, width=400, height=300, dark=0.0, soft=0.0):
+        """Arena with count random obstacles, keeping the centre free for the start position"""
+        rng = random.Random(seed)
+        obstacles = []
+        while len(obstacles) < count:
+            r = rng.uniform(6, 18)
+            x = rng.uniform(r, width - r)
+            y = rng.uniform(r, height - r)
+            if math.hypot(x - width / 2, y - height / 2) > r + 40:
+                obstacles.append((x, y, r))
+        # own generator, the same seed gives the same obstacles with or without kinds
+        kinds = random.Random(f'{seed}-kinds')
+        dark_ones = [i for i in range(count) if kinds.random() < dark]
+        soft_ones = [i for i in range(count) if kinds.random() < soft]
+        return cls(width, height, obstacles, dark_ones, soft_ones)
+
+    def collides(self, x, y, radius):
+        if x - radius < 0 or y - radius < 0 or x + radius > self.width or y + radius > self.height:
+            return True
+        return any(math.hypot(x - ox, y - oy) < radius + r for ox, oy, r in self.obstacles)
+
+    def raycast(self, x, y, angle, max_range, skip=()):
+        """Distance from (x, y) along angle (radians) to the first wall or obstacle not in skip, capped at max_range"""
+        dx, dy = math.cos(angle), math.sin(angle)
+        hit = max_range
+
+        # arena walls
+        if dx > 1e-9:
+            hit = min(hit, (self.width - x) / dx)
+        elif dx < -1e-9:
+            hit = min(hit, -x / dx)
+        if dy > 1e-9:
+            hit = min(hit, (self.height - y) / dy)
+        elif dy < -1e-9:
+            hit = min(hit, -y / dy)
+
+        # round obstacles: solve |p + t*d - c| = r for the nearest t >= 0
+        for i, (ox, oy, r) in enumerate(self.obstacles):
+            if i in skip:
+                continue
+            fx, fy = x - ox, y - oy
+            b = fx * dx + fy * dy
+            c = fx * fx + fy * fy - r * r
+            disc = b * b - c
+            if disc < 0:
+                continue
+            t = -b - math.sqrt(disc)
+            if 0 <= t < hit:
+                hit = t
+        return max(0.0, hit)
+
+
+class SimCar:
+    """Simulated car, same interface as GpioCar"""
+
+    MAX_SPEED = 60.0      # cm/s at full PWM
+    WHEEL_BASE = 13.0     # cm
+    RADIUS = 9.0          # cm, footprint used for collisions
+    SENSOR_RANGE = 100.0  # cm, gpiozero DistanceSensor default max_distance is 1 m
+    BEAM_HALF_ANGLE = 15  # degrees, HC-SR04 cone
+    IR_RANGE = 10.0       # cm beyond the body, set with the potentiometer on the module
+    IR_ANGLE = 25         # degrees either side of straight ahead
+    MOTOR_LAG = 0.12      # s, time constant of the wheels following a new PWM value
+    SERVO_SLEW = 0.0022   # s per degree, SG90 under load
+    SERVO_DEADTIME = 0.015  # s before a new servo position takes effect (20 ms PWM frame)
+    IR_EDGE_LATENCY = 0.03  # s, LineSensor averages 5 samples at 100 Hz, 25 ms measured on mock pins
+    STEP = 0.01           # s, integration step
+
+    def __init__(self, world, x=None, y=None, heading=0.0, seed=0, noise=1.0, turn_efficiency=0.4,
+                 soft_miss=0.8, echo_spurious=0.0):
+        self.world = world
+        self.turn_efficiency = turn_efficiency   # skid-steer slip, battery and floor all lower the real turn rate
+        self.soft_miss = soft_miss               # chance a ping gets no echo from a soft obstacle
+        self.echo_spurious = echo_spurious       # chance a reading is a random short echo
+        self.x = world.width / 2 if x is None else x
+        self.y = world.height / 2 if y is None else y
+        self.heading = heading   # radians, counter-clockwise
+        self.rng = random.Random(seed)
+        self.noise = noise
+        self.t = 0.0
+        self.left = 0.0           # commanded wheel speeds
+        self.right = 0.0
+        self.wheel_left = 0.0     # actual wheel speeds, lag behind the commands
+        self.wheel_right = 0.0
+        self.servo_angle = 90     # commanded servo angle
+        self.servo_actual = 90.0  # where the servo really points, follows with SERVO_SLEW
+        self.servo_moved_at = 0.0
+
+        # statistics of the run
+        self.travelled = 0.0
+        self.forward_travelled = 0.0
+        self.collisions = 0
+        self.stops = 0
+        self.in_contact = False
+
+        # IR trips, only followed after track_ir() or watch_ir()
+        self.preempted = False
+        self.ir_watch = None
+        self.ir_tracked = False
+        self.ir_raw = (1, 1)
+        self.ir_pending = []      # (time, side, blocked) edges still in LineSensor's smoothing queue
+        self.ir_onset = None      # (time, forward_travelled) when an IR sensor tripped while driving forward
+        self.ir_reactions = []    # (seconds, cm driven) from a trip to the stop
+        self.ir_missed = 0        # trips that cleared again before the car stopped
+
+    # ---- car interface ----
+
+    def now(self):
+        return self.t
+
+    def sleep(self, seconds):
+        end = self.t + seconds
+        while self.t < end - 1e-9:
+            dt = min(self.STEP, end - self.t)
+            self._integrate(dt)
+            self.t += dt
+            if self.ir_tracked:
+                self._follow_ir()
+
+    def distance(self):
+        centre = self.heading + math.radians(90 - self.servo_actual)
+        half = math.radians(self.BEAM_HALF_ANGLE)
+        skip = {i for i in self.world.soft if self.rng.random() < self.soft_miss} if self.world.soft else ()
+        dist = min(self.world.raycast(self.x, self.y, centre + offset * half, self.SENSOR_RANGE + self.RADIUS, skip)
+                   for offset in (-1, -0.5, 0, 0.5, 1)) - self.RADIUS
+        dist += self.rng.gauss(0, self.noise)
+        if self.echo_spurious and self.rng.random() < self.echo_spurious:
+            dist = self.rng.uniform(2.0, self.SENSOR_RANGE)
+        return max(2.0, min(self.SENSOR_RANGE, dist))
+
+    def clearance(self, half_angle=25):
+        """True distance to the nearest obstacle ahead, every obstacle seen, for scoring the sensors"""
+        return min(self.world.raycast(self.x, self.y, self.heading + math.radians(offset), self.SENSOR_RANGE + self.RADIUS)
+                   for offset in range(-half_angle, half_angle + 1, 5)) - self.RADIUS
+
+    def ir(self):
+        if self.ir_watch is not None:
+            return self.ir_watch.state()
+        return self._read_ir()
+
+    def _read_ir(self):
+        values = []
+        for side in (1, -1):   # left sensor points left of straight ahead
+            angle = self.heading + side * math.radians(self.IR_ANGLE)
+            hit = self.world.raycast(self.x, self.y, angle, self.RADIUS + self.IR_RANGE, self.world.dark)
+            values.append(0 if hit < self.RADIUS + self.IR_RANGE else 1)
+        return tuple(values)
+
+    def servo(self, deg):
+        self.servo_angle = max(0, min(180, deg))
+        self.servo_moved_at = self.t
+
+    def drive(self, left, right):
+        if self.preempted and (left > 0 or right > 0):
+            return
+        self.left = max(-1.0, min(1.0, left))
+        self.right = max(-1.0, min(1.0, right))
+
+    def stop(self):
+        if self.left or self.right:
+            self.stops += 1
+            self._stopped()
+        self.left = self.right = 0.0
+        self.preempted = False
+
+    def preempt(self):
+        if self.left <= 0 and self.right <= 0:
+            return False
+        self.stops += 1
+        self._stopped()
+        self.left = self.right = 0.0
+        self.preempted = True
+        return True
+
+    # ---- IR trips ----
+
+    def track_ir(self):
+        """Measures the time from an IR trip to the stop, for the loops that poll ir()"""
+        self.ir_tracked = True
+        self.ir_raw = self._read_ir()
+
+    def watch_ir(self, release=0.05):
+        """Edge callbacks like the scripts: ir() is the debounced state and a trip preempts"""
+        self.track_ir()
+        self.ir_watch = IrWatch(release=release, on_trip=lambda event: self.preempt(), clock=self.now)
+        for side, value in enumerate(self.ir_raw):
+            if value == 0:
+                self.ir_watch.edge(side, True)
+        return self.ir_watch
+
+    def _follow_ir(self):
+        raw = self._read_ir()
+        for side in (0, 1):
+            if raw[side] != self.ir_raw[side] and self.ir_watch is not None:
+                self.ir_pending.append((self.t + self.IR_EDGE_LATENCY, side, raw[side] == 0))
+        tripped = 0 in raw and 0 not in self.ir_raw
+        self.ir_raw = raw
+        if tripped and self.ir_onset is None and (self.left > 0 or self.right > 0):
+            self.ir_onset = (self.t, self.forward_travelled)
+        elif 0 not in raw and self.ir_onset is not None:
+            self.ir_missed += 1
+            self.ir_onset = None
+        while self.ir_pending and self.ir_pending[0][0] <= self.t + 1e-9:
+            _, side, blocked = self.ir_pending.pop(0)
+            self.ir_watch.edge(side, blocked)
+
+    def _stopped(self):
+        if self.ir_onset is not None:
+            started, travelled = self.ir_onset
+            self.ir_reactions.append((self.t - started, self.forward_travelled - travelled))
+            self.ir_onset = None
+
+    # ---- physics ----
+
+    def _integrate(self, dt):
+        if self.t + dt - self.servo_moved_at > self.SERVO_DEADTIME:
+            step = dt / self.SERVO_SLEW
+            error = self.servo_angle - self.servo_actual
+            self.servo_actual += max(-step, min(step, error))
+
+        k = min(1.0, dt / self.MOTOR_LAG)
+        self.wheel_left += (self.left - self.wheel_left) * k
+        self.wheel_right += (self.right - self.wheel_right) * k
+        v = (self.wheel_left + self.wheel_right) / 2 * self.MAX_SPEED
+        w = (self.wheel_right - self.wheel_left) * self.MAX_SPEED / self.WHEEL_BASE * self.turn_efficiency
+        heading = self.heading + w * dt
+        x = self.x + v * math.cos(heading) * dt
+        y = self.y + v * math.sin(heading) * dt
+        if self.world.collides(x, y, self.RADIUS):
+            if not self.in_contact:
+                self.collisions += 1
+            self.in_contact = True
+            self.heading = heading   # wheels can still spin the car in place
+            return
+        self.in_contact = False
+        self.heading = heading
+        self.x, self.y = x, y
+        self.travelled += abs(v) * dt
+        if v > 0:
+            self.forward_travelled += v * dt
+
+
+# ---- strategies, written against the car interface exactly like the scripts ----
+
+# original receiver sweep: sleep(0.03) in set_servo_deg + sleep(0.05) per step, whatever the move
+FIXED_SWEEP_DELAY = ServoModel(slew=0.0, settle=0.03 + 0.05, trigger_lead=0.0)
+
+# calibrated to the simulated servo, like servo-settle-benchmark.py does on the car
+SERVO_MODEL = ServoModel(slew=SimCar.SERVO_SLEW, settle=SimCar.SERVO_DEADTIME + 0.01, trigger_lead=0.01)
+
+# settings of the car scripts (autocar/config.py names) the strategies below take
+DEFAULT_SETTINGS = {'stop_margin': 12.0, 'reverse_time': 0.4, 'sweep_step': 5, 'obstacle_fusion': True}
+
+# sensor failures for --fusion: share of dark and soft obstacles, spurious echoes per reading
+FUSION_FAULTS = {'dark': 0.3, 'soft': 0.3, 'echo_spurious': 0.02}
+
+
+def record_stop(car, stats, threshold):
+    """Scores a stop for an obstacle against the real clearance: false when nothing was near, late when too near"""
+    clearance = car.clearance()
+    stats['obstacle_stops'] += 1
+    if clearance > threshold + 10:
+        stats['false_stops'] += 1
+    elif clearance < 5:
+        stats['late_stops'] += 1
+
+
+def sweep_and_turn(car, stats, turn_model=None, threshold=25, angles=RECEIVER_SWEEP_ANGLES, reverse_time=0.4,
+                   fusion=None):
+    """
+    Receiver behaviour: sweep 90 -> 0 -> 180 -> 90, reverse, turn toward the best angle.
+    Without turn_model it uses the original open-loop REVERSE_TIME/TURN_TIME sleeps.
+    The sweep readings go into fusion, turned with the car.
+    """
+    if car.now() - stats['last_sweep'] < 1.0:
+        stats['repeat_sweeps'] += 1   # the previous turn did not get the car clear
+    stats['sweeps'] += 1
+    started = car.now()
+    try:
+        _sweep_and_turn(car, stats, turn_model, threshold, angles, reverse_time, fusion)
+    finally:
+        stats['clear_time'] += car.now() - started   # stopped until the car drives on
+
+
+def _sweep_and_turn(car, stats, turn_model, threshold, angles, reverse_time, fusion):
+
+    on_reading = None if fusion is None else fusion.observe_distance
+    if turn_model is None:
+        distance_map = sweep(car, angles, FIXED_SWEEP_DELAY, on_reading=on_reading)
+        car.servo(90)
+        car.sleep(0.03)
+    else:
+        distance_map = sweep(car, angles, SERVO_MODEL, on_reading=on_reading)
+        point_servo(car, 90, SERVO_MODEL)
+    angle = best_angle(distance_map)
+
+    if turn_model is not None:
+        reverse(car, 1.0, reverse_time / 2, reverse_time, clearance=threshold * 1.5)
+        car.sleep(0.1)
+        turn(car, turn_model, angle, distance_map, 1.0)
+        if fusion is not None:
+            fusion.rotate(angle - 90)
+        car.sleep(0.1)
+        stats['last_sweep'] = car.now()
+        return
+
+    car.drive(-1, -1)   # robot.backward()
+    car.sleep(reverse_time)
+    car.stop()
+    car.sleep(0.1)
+    if 80 <= angle <= 100:
+        stats['last_sweep'] = car.now()
+        return
+    car.drive(-1, 1) if angle < 80 else car.drive(1, -1)   # robot.left() / robot.right()
+    car.sleep(0.55)
+    car.stop()
+    car.sleep(0.1)
+    stats['last_sweep'] = car.now()
+
+
+def run_sweep(car, duration, stats, turn_model=None, stopping=None, speed=0.5, period=0.02, settings=None):
+    """
+    Straight ahead until something is close, then stop-and-sweep. Without stopping
+    model it uses the original fixed 25 cm FRONT_THRESHOLD at constant speed.
+    """
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    angles = receiver_sweep_angles(settings['sweep_step'])
+    fusion = ObstacleFusion(clock=car.now) if settings['obstacle_fusion'] and stopping is not None else None
+    threshold = 25
+    while car.now() < duration:
+        dist = car.distance()
+        ir_left, ir_right = car.ir()
+        current = speed
+        if stopping is not None:
+            current = stopping.approach_speed(speed, dist)
+            threshold = stopping.threshold(current)
+        if fusion is not None:
+            fusion.observe(car.servo_angle, dist, (ir_left, ir_right))
+            obstacle = fusion.blocked(threshold)
+        else:
+            obstacle = ir_left == 0 or ir_right == 0 or dist < threshold
+        if obstacle:
+            record_stop(car, stats, threshold)
+            car.stop()
+            car.sleep(0.1)
+            sweep_and_turn(car, stats, turn_model,
+                           threshold if stopping is None else stopping.threshold(speed),
+                           angles, settings['reverse_time'], fusion)
+        else:
+            car.drive(current, current)
+            if fusion is not None:
+                fusion.advance(current * stopping.max_speed * period)
+        car.sleep(period)
+
+
+def run_open_loop(car, duration, stats, speed=0.5, period=0.02, settings=None):
+    """The project before closed-loop turns, dynamic threshold and reactive navigation (ignores settings)"""
+    run_sweep(car, duration, stats, speed=speed, period=period)
+
+
+def run_closed_loop(car, duration, stats, speed=0.5, period=0.02, settings=None):
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    stopping = StoppingModel(max_speed=SimCar.MAX_SPEED, sample_period=period, margin=settings['stop_margin'])
+    run_sweep(car, duration, stats, TurnModel(), stopping, speed=speed, period=period, settings=settings)
+
+
+def run_reactive(car, duration, stats, speed=0.5, period=0.02, settings=None):
+    """Continuous navigation, falling back to stop-and-sweep only when boxed in"""
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    turn_model = TurnModel()
+    stopping = StoppingModel(max_speed=SimCar.MAX_SPEED, sample_period=period, margin=settings['stop_margin'])
+    angles = receiver_sweep_angles(settings['sweep_step'])
+    fusion = ObstacleFusion(clock=car.now) if settings['obstacle_fusion'] else None
+
+    def fallback():
+        record_stop(car, stats, stopping.threshold(speed))
+        sweep_and_turn(car, stats, turn_model, stopping.threshold(speed), angles, settings['reverse_time'], fusion)
+
+    nav = ReactiveNavigator(car, fallback, cruise=speed, stopping=stopping, fusion=fusion)
+    while car.now() < duration:
+        nav.tick()
+        car.sleep(period)
+
+
+STRATEGIES = {
+    'open-loop': run_open_loop,
+    'sweep': run_closed_loop,
+    'reactive': run_reactive,
+}
+
+
+def run_episode(strategy, seed, duration=60.0, obstacles=10, speed=0.5, settings=None, ir=None, period=0.02,
+                faults=None):
+    """
+    Runs one strategy in a random world, returns the statistics of the run.
+    ir='poll' measures IR reaction times of the loops polling car.ir(), ir='edge' uses edge callbacks.
+    faults like FUSION_FAULTS makes the sensors miss obstacles and see spurious ones.
+    """
+    faults = faults or {}
+    world = World.random(seed, count=obstacles, dark=faults.get('dark', 0.0), soft=faults.get('soft', 0.0))
+    rng = random.Random(seed)
+    car = SimCar(world, heading=rng.uniform(0, 2 * math.pi), seed=seed,
+                 turn_efficiency=rng.uniform(0.25, 0.55), echo_spurious=faults.get('echo_spurious', 0.0))
+    if ir == 'poll':
+        car.track_ir()
+    elif ir == 'edge':
+        car.watch_ir()
+    stats = {'sweeps': 0, 'repeat_sweeps': 0, 'last_sweep': -math.inf, 'clear_time': 0.0,
+             'obstacle_stops': 0, 'false_stops': 0, 'late_stops': 0}
+    STRATEGIES[strategy](car, duration, stats, speed=speed, period=period, settings=settings)
+
+    metres = car.forward_travelled / 100
+    result = {
+        'strategy': strategy,
+        'seed': seed,
+        'speed': speed,
+        'duration': duration,
+        'distance_m': round(metres, 2),
+        'mean_speed_cm_s': round(car.forward_travelled / duration, 1),
+        'stops': car.stops,
+        'stops_per_m': round(car.stops / metres, 2) if metres > 0 else None,
+        'sweeps': stats['sweeps'],
+        'repeat_sweeps': stats['repeat_sweeps'],
+        'time_to_clear_s': round(stats['clear_time'] / stats['sweeps'], 2) if stats['sweeps'] else 0.0,
+        'collisions': car.collisions,
+        'obstacle_stops': stats['obstacle_stops'],
+        'false_stops': stats['false_stops'],
+        'late_stops': stats['late_stops'],
+    }
+    if ir is not None:
+        result['ir_reactions'] = car.ir_reactions
+        result['ir_missed'] = car.ir_missed
+    return result
+
+
+def compare(strategies, seeds, duration, obstacles, speed=0.5, period=0.02):
+    """Mean statistics per strategy over the same set of worlds"""
+    summary = {}
+    for strategy in strategies:
+        runs = [run_episode(strategy, seed, duration, obstacles, speed, period=period) for seed in range(seeds)]
+        metres = sum(r['distance_m'] for r in runs)
+        stops = sum(r['stops'] for r in runs)
+        summary[strategy] = {
+            'mean_speed_cm_s': round(sum(r['mean_speed_cm_s'] for r in runs) / len(runs), 1),
+            'stops_per_m': round(stops / metres, 2) if metres > 0 else None,
+            'sweeps': round(sum(r['sweeps'] for r in runs) / len(runs), 1),
+            'repeat_sweeps': round(sum(r['repeat_sweeps'] for r in runs) / len(runs), 1),
+            'collisions': round(sum(r['collisions'] for r in runs) / len(runs), 2),
+        }
+    return summary
+
+
+# the scripts' navigation and the period their driving loop runs at
+SCRIPT_NAVIGATION = {
+    'app.py': ('reactive', 0.05),   # auto_period, the ping comes on top
+    'receiver': ('sweep', 0.12),    # loop delay + recv timeout, reactive collides more at this rate
+}
+
+
+def check(summary, navigation='reactive'):
+    """Regressions in a compare() summary: the navigation a script drives with must not collide more than the other"""
+    problems = []
+    for other in ('reactive', 'sweep'):
+        if other != navigation and navigation in summary and other in summary \
+                and summary[navigation]['collisions'] > summary[other]['collisions']:
+            problems.append(f"{navigation} collides more than {other}: {summary[navigation]['collisions']} "
+                            f"against {summary[other]['collisions']} per run")
+    return problems
+
+
+# app.py sweep: 10 degree steps, set_servo_angle sleep(0.05) + sleep(0.1) per step
+APP_SWEEP_ANGLES = list(range(0, 181, 10))
+APP_SWEEP_DELAY = ServoModel(slew=0.0, settle=0.05 + 0.1, trigger_lead=0.0)
+
+SWEEP_TIMINGS = {
+    'receiver fixed': (RECEIVER_SWEEP_ANGLES, FIXED_SWEEP_DELAY),
+    'receiver model': (RECEIVER_SWEEP_ANGLES, SERVO_MODEL),
+    'app fixed': (APP_SWEEP_ANGLES, APP_SWEEP_DELAY),
+    'app model': (APP_SWEEP_ANGLES, SERVO_MODEL),
+}
+
+
+def compare_sweeps(seeds, obstacles):
+    """Sweep duration and reading error (vs the servo at rest) per sweep timing, noise-free sensor"""
+    summary = {}
+    for name, (angles, model) in SWEEP_TIMINGS.items():
+        times, errors = [], []
+        for seed in range(seeds):
+            rng = random.Random(seed)
+            car = SimCar(World.random(seed, count=obstacles), heading=rng.uniform(0, 2 * math.pi), noise=0.0)
+            start = car.now()
+            readings = sweep(car, angles, model)
+            times.append(car.now() - start)
+            for angle, dist in readings.items():
+                car.servo_actual = angle
+                errors.append(abs(dist - car.distance()))
+        summary[name] = {
+            'sweep_s': round(sum(times) / len(times), 2),
+            'error_cm': round(sum(errors) / len(errors), 2),
+            'bad_readings': round(sum(e > 5 for e in errors) / len(errors), 3),
+        }
+    return summary
+
+
+def compare_ir(strategies, seeds, duration, obstacles, speed=0.5, period=0.02):
+    """Time and distance from an IR trip to the stop, loops polling car.ir() vs edge callbacks"""
+    summary = {}
+    for strategy in strategies:
+        for ir in ('poll', 'edge'):
+            runs = [run_episode(strategy, seed, duration, obstacles, speed, ir=ir, period=period)
+                    for seed in range(seeds)]
+            reactions = sorted(r for run in runs for r in run['ir_reactions'])
+            times = sorted(t for t, _ in reactions)
+            summary[f'{strategy} {ir}'] = {
+                'trips': len(reactions),
+                'mean_ms': round(1000 * sum(times) / len(times), 1) if times else None,
+                'p95_ms': round(1000 * times[int(0.95 * (len(times) - 1))], 1) if times else None,
+                'max_ms': round(1000 * times[-1], 1) if times else None,
+                'overshoot_cm': round(sum(d for _, d in reactions) / len(reactions), 2) if reactions else None,
+                'missed': sum(run['ir_missed'] for run in runs),
+                'collisions': round(sum(run['collisions'] for run in runs) / len(runs), 2),
+                'mean_speed_cm_s': round(sum(run['mean_speed_cm_s'] for run in runs) / len(runs), 1),
+            }
+    return summary
+
+
+def compare_fusion(strategies, seeds, duration, obstacles, speed=0.5, period=0.02):
+    """Raw sensor checks against ObstacleFusion, with clean sensors and with FUSION_FAULTS"""
+    summary = {}
+    for faults_name, faults in (('clean', None), ('faulty', FUSION_FAULTS)):
+        for strategy in strategies:
+            for fused in (False, True):
+                runs = [run_episode(strategy, seed, duration, obstacles, speed, {'obstacle_fusion': fused},
+                                    period=period, faults=faults) for seed in range(seeds)]
+                stops = sum(r['obstacle_stops'] for r in runs)
+                summary[f"{strategy} {'fused' if fused else 'raw'} {faults_name}"] = {
+                    'stops': stops,
+                    'false_stops': round(sum(r['false_stops'] for r in runs) / stops, 3) if stops else None,
+                    'late_stops': sum(r['late_stops'] for r in runs),
+                    'collisions': round(sum(r['collisions'] for r in runs) / len(runs), 2),
+                    'mean_speed_cm_s': round(sum(r['mean_speed_cm_s'] for r in runs) / len(runs), 1),
+                }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare autonomous navigation strategies in simulation")
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument('--seeds', type=int, default=20, help="number of random worlds")
+    parser.add_argument('--duration', type=float, default=60.0, help="simulated seconds per run")
+    parser.add_argument('--obstacles', type=int, default=10)
+    parser.add_argument('--speed', type=float, default=0.5, help="commanded forward speed, 0..1")
+    parser.add_argument('--sweeps', action='store_true', help="compare servo sweep timings instead")
+    parser.add_argument('--ir', action='store_true', help="compare IR reaction times, polling vs edge callbacks")
+    parser.add_argument('--fusion', action='store_true',
+                        help="compare false stops and collisions, raw sensor checks vs ObstacleFusion")
+    parser.add_argument('--period', type=float, default=0.02,
+                        help="control loop period in s, the receiver's is about 0.12 with the recv timeout")
+    parser.add_argument('--check', choices=('reactive', 'sweep'),
+                        help="exit with 1 if this navigation collides more than the other one")
+    args = parser.parse_args()
+
+    if args.ir:
+        strategies = [s for s in args.strategies if s != 'open-loop']
+        print(f"{'IR handling':<15} {'trips':>6} {'mean ms':>8} {'p95 ms':>7} {'max ms':>7} {'overshoot cm':>13} "
+              f"{'missed':>7} {'collisions':>11} {'cm/s':>6}")
+        summary = compare_ir(strategies, args.seeds, args.duration, args.obstacles, args.speed, args.period)
+        for name, s in summary.items():
+            print(f"{name:<15} {s['trips']:>6} {s['mean_ms']!s:>8} {s['p95_ms']!s:>7} {s['max_ms']!s:>7} "
+                  f"{s['overshoot_cm']!s:>13} {s['missed']:>7} {s['collisions']:>11} {s['mean_speed_cm_s']:>6}")
+        return
+
+    if args.fusion:
+        strategies = [s for s in args.strategies if s != 'open-loop']
+        print(f"{'obstacle check':<22} {'stops':>6} {'false':>6} {'late':>5} {'collisions':>11} {'cm/s':>6}")
+        summary = compare_fusion(strategies, args.seeds, args.duration, args.obstacles, args.speed, args.period)
+        for name, s in summary.items():
+            print(f"{name:<22} {s['stops']:>6} {s['false_stops']!s:>6} {s['late_stops']:>5} "
+                  f"{s['collisions']:>11} {s['mean_speed_cm_s']:>6}")
+        return
+
+    if args.sweeps:
+        print(f"{'sweep timing':<15} {'sweep s':>8} {'error cm':>9} {'>5 cm':>6}")
+        for name, s in compare_sweeps(args.seeds, args.obstacles).items():
+            print(f"{name:<15} {s['sweep_s']:>8} {s['error_cm']:>9} {s['bad_readings']:>6}")
+        return
+
+    summary = compare(args.strategies, args.seeds, args.duration, args.obstacles, args.speed, args.period)
+    print(f"{'strategy':<10} {'speed cm/s':>11} {'stops/m':>8} {'sweeps':>7} {'repeats':>8} {'collisions':>11}")
+    for strategy, s in summary.items():
+        print(f"{strategy:<10} {s['mean_speed_cm_s']:>11} {s['stops_per_m']!s:>8} "
+              f"{s['sweeps']:>7} {s['repeat_sweeps']:>8} {s['collisions']:>11}")
+    if args.check:
+        problems = check(summary, args.check)
+        for problem in problems:
+            print(f"[simulator] {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
+
+
+"""
+
+Reference:
+    Differential drive kinematics: https://en.wikipedia.org/wiki/Differential_wheeled_robot
+    Ray-circle intersection: https://en.wikipedia.org/wiki/Line%E2%80%93sphere_intersection
+
+"""
@@ -0,0 +1,97 @@
+"""
+Versioned dashboard state, so a browser that connects or reconnects is brought up to date
+in one message instead of waiting for the next events.
+
+Every event the dashboard broadcasts goes through Snapshot.record(), which gives it the
+next version number ('v' in the payload) and keeps what a new client needs:
+
+  * robot_state, sensor_update: only the newest, an older one is never needed again
+  * sweep_start, sweep_data: the readings of the current sweep, one per angle
+  * status: the last statuses messages
+
+The sweep readings and status messages are also kept in a bounded log. A client sends
+the epoch and the last version it applied when it connects (Socket.IO auth):
+
+    snapshot.since(epoch, version)
+    -> {'epoch': 'a1b2c3d4', 'version': 812, 'full': False, 'events': [[event, data], ...]}
+
+If the version is still covered by the log, events holds only what changed after it,
+in version order: the logged events plus the newest robot_state / sensor_update if they
+changed. Otherwise (first connect, server restarted, log overflowed) it is the full
+state (full=True). Either way the client replays events through its usual handlers and
+then applies live events with a higher v.
+"""
+
+import secrets
+import threading
+from collections import deque
+
+
+class Snapshot:
+
+    LATEST = ('robot_state', 'sensor_update')
+    EVENTS = LATEST + ('sweep_start', 'sweep_data', 'status')
+
+    def __init__(self, statuses=20, log=512):
+        self.epoch = secrets.token_hex(4)   # changes with every server start
+        self.version = 0
+        self.latest = {}                    # event -> newest payload
+        self.sweep_start = None
+        self.sweep = {}                     # angle -> reading of the current sweep
+        self.statuses = deque(maxlen=statuses)
+        self.log = deque(maxlen=log)        # (event, payload) of sweeps and statuses
+        self.horizon = 0                    # versions up to this one have left the log
+        self.full_sent = 0
+        self.resumed = 0
+        self._lock = threading.Lock()
+
+    def record(self, event, data):
+        """Payload with its version, for an event in EVENTS"""
+        with self._lock:
+            self.version += 1
+            data = dict(data, v=self.version)
+            if event in self.LATEST:
+                self.latest[event] = data
+                return data
+            if event == 'sweep_start':
+                self.sweep_start = data
+                self.sweep.clear()
+            elif event == 'sweep_data':
+                self.sweep[data['angle']] = data
+            elif event == 'status':
+                self.statuses.append(data)
+            if len(self.log) == self.log.maxlen:
+                self.horizon = self.log[0][1]['v']
+            self.log.append((event, data))
+            return data
+
+    def since(self, epoch=None, version=None):
+        """Events after version, or the full state when the client cannot resume from it"""
+        with self._lock:
+            resumable = (epoch == self.epoch and isinstance(version, int)
+                         and self.horizon <= version <= self.version)
+            if resumable:
+                events = [(e, d) for e, d in self.log if d['v'] > version]
+                self.resumed += 1
+            else:
+                version = 0
+                events = []
+                if self.sweep_start is not None:
+                    events.append(('sweep_start', self.sweep_start))
+                events += [('sweep_data', d) for d in self.sweep.values()]
+                events += [('status', d) for d in self.statuses]
+                self.full_sent += 1
+            events += [(e, d) for e, d in self.latest.items() if d['v'] > version]
+            events.sort(key=lambda item: item[1]['v'])
+            return {'epoch': self.epoch, 'version': self.version, 'full': not resumable,
+                    'events': [[e, d] for e, d in events]}
+
+
+"""
+
+Reference:
+    Socket.IO connection state recovery: https://socket.io/docs/v4/connection-state-recovery
+    Socket.IO client auth option: https://socket.io/docs/v4/client-options/#auth
+    Flask-SocketIO connect handler auth: https://flask-socketio.readthedocs.io/en/latest/getting_started.html#connection-events
+
+"""
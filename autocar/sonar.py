@@ -0,0 +1,175 @@
+"""
+Several HC-SR04s read as one sensor array, pinged in interleaved slots.
+
+The car has one HC-SR04 on the servo, so seeing to the sides means sweeping it for a
+second or more. More sensors can be mounted at fixed angles, but an HC-SR04 cannot
+tell its own ping from another's: two of them pinging at the same time into
+overlapping beams each measure whichever echo comes back first (crosstalk). Pinging
+them one after the other avoids that and divides the rate by the number of sensors.
+
+SonarArray groups the sensors into slots: sensors whose mount angles are at least
+separation degrees apart (the beam is about 30 degrees wide) ping together, the
+slots follow each other with guard seconds between them for the last echoes to die
+down. Slots come from a greedy colouring by angle, which for this conflict rule (an
+interval graph) uses the fewest slots there can be: sensors 0, 45, 90, 135, 180
+degrees ping in 2 slots, not 5, so each one is read 2.5 times as often.
+
+  * Sonar(name, sensor, angle): an Ultrasonic and its mount angle (servo angles, 90 is
+    straight ahead), None for the one on the servo, whose angle is servo_angle()
+  * cycle(names) pings every sensor (or those named) once, slot by slot, returns the
+    Readings, distances in cm and None when a ping failed
+  * ping(name) reads one sensor now, between the slots of a running cycle
+  * run(names) cycles until the task running it is cancelled (autocar/tasks.py)
+  * latest() has the last reading of each sensor, rates() each sensor's effective Hz
+    over the last window seconds and the total
+
+    array = SonarArray([Sonar('front', ultra, None), Sonar('left', Ultrasonic(5, 6), 135),
+                        Sonar('right', Ultrasonic(20, 21), 45)], servo_angle=lambda: car.servo_angle)
+    array.slots()               -> [['right', 'left'], ['front']]  (front pointing ahead)
+    array.cycle()               -> [Reading(name='right', angle=45, distance=42.3, time=...), ...]
+    array.rates()               -> {'front': 32.5, 'left': 32.5, 'right': 32.5, 'total': 97.5}
+
+python -m benchmarks --only sonar compares the schedules on mock pins with simulated echoes.
+"""
+
+import time
+from collections import deque, namedtuple
+
+from autocar import tasks
+from autocar.ultrasonic import Ultrasonic
+
+Sonar = namedtuple('Sonar', 'name sensor angle')
+Reading = namedtuple('Reading', 'name angle distance time')
+
+
+def fixed_mounts(values):
+    """Config's flat (echo, trigger, angle, ...) as (echo, trigger, angle) triples, ValueError if it does not fit"""
+    values = tuple(values or ())
+    if len(values) % 3:
+        raise ValueError(f"sonar mounts come as echo, trigger, angle triples, got {len(values)} values")
+    mounts = [values[i:i + 3] for i in range(0, len(values), 3)]
+    for echo, trigger, angle in mounts:
+        if not 0 <= angle <= 180:
+            raise ValueError(f"sonar mount angle {angle} is not within 0..180")
+    return mounts
+
+
+class SonarArray:
+
+    def __init__(self, sonars, servo_angle=None, separation=60, guard=0.01, window=2.0,
+                 on_reading=None, instruments=None):
+        self.sonars = {sonar.name: sonar for sonar in sonars}
+        self.servo_angle = servo_angle          # angle of the servo-mounted sensor, 90 if not given
+        self.separation = separation            # degrees between sensors that may ping together
+        self.guard = guard                      # s after a slot for the echoes to die down
+        self.window = window                    # s the rates are counted over
+        self.on_reading = on_reading            # called with every successful Reading
+        self.instruments = instruments          # records sonar_cycle, counts sonar.failed
+        self._latest = {}
+        self._times = {name: deque() for name in self.sonars}
+
+    def angle(self, name):
+        angle = self.sonars[name].angle
+        if angle is None:
+            return self.servo_angle() if self.servo_angle is not None else 90
+        return angle
+
+    def slots(self, names=None):
+        """Names grouped into slots that can ping together, in the order they ping"""
+        names = list(self.sonars) if names is None else list(names)
+        slots = []   # [names, angles]
+        for angle, name in sorted((self.angle(name), name) for name in names):
+            for slot, angles in slots:
+                if all(abs(angle - other) >= self.separation for other in angles):
+                    slot.append(name)
+                    angles.append(angle)
+                    break
+            else:
+                slots.append(([name], [angle]))
+        return [slot for slot, _ in slots]
+
+    # ---- pinging ----
+
+    def _slot(self, names):
+        """Pings names together, returns their Readings"""
+        sensors = [self.sonars[name].sensor for name in names]
+        angles = [self.angle(name) for name in names]
+        # ECHO_LOCK keeps every other ping (a slot, Ultrasonic.distance) out of the air meanwhile
+        with Ultrasonic.ECHO_LOCK:
+            started = []
+            try:
+                for sensor in sensors:
+                    started.append(sensor.trigger())
+            finally:
+                # every sensor trigger() sent a ping for is held until its collect()
+                distances = [None if t is None else sensor.collect(t) for sensor, t in zip(sensors, started)]
+            time.sleep(self.guard)
+        now = time.monotonic()
+        readings = []
+        for name, angle, distance in zip(names, angles, distances):
+            if distance is None and self.instruments is not None:
+                self.instruments.count('sonar.failed')
+            readings.append(self._record(Reading(name, angle, None if distance is None else distance * 100, now)))
+        return readings
+
+    def _record(self, reading):
+        if reading.distance is not None:
+            self._latest[reading.name] = reading
+            times = self._times[reading.name]
+            times.append(reading.time)
+            while times and times[0] < reading.time - self.window:
+                times.popleft()
+            if self.on_reading is not None:
+                self.on_reading(reading)
+        return reading
+
+    def cycle(self, names=None):
+        """Pings every sensor (or those named) once, slot by slot"""
+        start = time.perf_counter()
+        readings = []
+        for slot in self.slots(names):
+            readings.extend(self._slot(slot))
+        if self.instruments is not None:
+            self.instruments.record('sonar_cycle', time.perf_counter() - start)
+        return readings
+
+    def ping(self, name):
+        """One reading of the sensor name now, its distance None if the ping failed"""
+        return self._slot([name])[0]
+
+    def run(self, names=None, period=0.0):
+        """Cycles names every period s (0: back to back) until the task is cancelled"""
+        next_cycle = time.monotonic()
+        while True:
+            tasks.check()
+            self.cycle(names)
+            next_cycle = max(next_cycle + period, time.monotonic())
+            tasks.sleep(next_cycle - time.monotonic())
+
+    # ---- readings ----
+
+    def latest(self):
+        """name -> last successful Reading"""
+        return dict(self._latest)
+
+    def rates(self, now=None):
+        """Successful readings per second of each sensor over the last window s, and their total"""
+        now = time.monotonic() if now is None else now
+        rates = {name: round(sum(1 for t in list(times) if t >= now - self.window) / self.window, 1)
+                 for name, times in self._times.items()}
+        rates['total'] = round(sum(rates.values()), 1)
+        return rates
+
+    def close(self):
+        for sonar in self.sonars.values():
+            sonar.sensor.close()
+
+
+"""
+
+Reference:
+    HC-SR04 datasheet (60 ms measurement cycle, 15 degree beam): https://cdn.sparkfun.com/datasheets/Sensors/Proximity/HCSR04.pdf
+    Firing several ultrasonic sensors without crosstalk: Borenstein & Koren, Error Eliminating Rapid Ultrasonic Firing, IEEE Transactions on Robotics and Automation, 1995
+    Interval graph colouring (greedy by left endpoint is optimal): https://en.wikipedia.org/wiki/Interval_graph
+
+"""
@@ -0,0 +1,168 @@
+"""
+Text-to-speech on one worker thread.
+
+speak() used to start a thread per phrase, all sharing one pyttsx3 engine, so an
+obstacle ("Object detected", "Scanning environment", "Clear path found") piled up
+threads that fought over the engine. Speaker keeps a small queue instead:
+
+    - say() only puts the phrase in the queue and returns, it never waits for audio
+    - a phrase that is already queued is not queued twice, the lower priority wins
+    - when the queue is full the least important, oldest phrase is dropped
+    - phrases older than max_age are dropped, the car has moved on by then
+
+pyttsx3 is imported and initialised by the worker on first use, so it does not slow
+down startup (and a missing TTS engine only disables speech). Phrases passed in
+`phrases` are rendered to WAV files in cache_dir while the worker is idle and are
+then played with aplay, which is much quicker than synthesising them every time.
+The worker runs at a lower CPU priority than the control loop.
+"""
+
+import hashlib
+import os
+import subprocess
+import threading
+import time
+
+
+ALERT = 0    # obstacle warnings
+STATUS = 1   # mode changes
+INFO = 2     # progress chatter, first to be dropped
+
+
+class Speaker:
+
+    def __init__(self, rate=150, max_queue=4, max_age=3.0, cache_dir=None, phrases=(),
+                 player=('aplay', '-q'), nice=10):
+        self.rate = rate
+        self.max_queue = max_queue
+        self.max_age = max_age
+        self.cache_dir = cache_dir
+        self.phrases = list(phrases)   # fixed phrases rendered ahead of time
+        self.player = player
+        self.nice = nice
+        self.dropped = 0
+        self._queue = {}               # text -> (priority, queued_at)
+        self._speaking = None
+        self._cond = threading.Condition()
+        self._engine = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='speaker', daemon=True)
+        self._thread.start()
+
+    def say(self, text, priority=STATUS):
+        """Queues text and returns immediately"""
+        now = time.monotonic()
+        with self._cond:
+            if text == self._speaking:
+                return
+            if text in self._queue:
+                priority = min(priority, self._queue[text][0])
+            elif len(self._queue) >= self.max_queue:
+                # drop the least important, oldest phrase, possibly the new one
+                victim = max(self._queue, key=lambda t: (self._queue[t][0], -self._queue[t][1]))
+                if self._queue[victim][0] < priority:
+                    self.dropped += 1
+                    return
+                del self._queue[victim]
+                self.dropped += 1
+            self._queue[text] = (priority, now)
+            self._cond.notify()
+
+    @property
+    def pending(self):
+        """Phrases waiting to be spoken"""
+        return len(self._queue)
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    # ---- worker ----
+
+    def _next(self):
+        """Most important queued phrase that is not stale, None if there is none"""
+        now = time.monotonic()
+        for text, (_, queued_at) in list(self._queue.items()):
+            if now - queued_at > self.max_age:
+                del self._queue[text]
+                self.dropped += 1
+        if not self._queue:
+            return None
+        text = min(self._queue, key=lambda t: self._queue[t])
+        del self._queue[text]
+        return text
+
+    def _run(self):
+        try:
+            # on Linux this only lowers this thread (and the players it starts)
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+        except (AttributeError, OSError):
+            pass
+
+        while True:
+            with self._cond:
+                text = self._next()
+                while text is None and self._running and not self.phrases:
+                    self._cond.wait()
+                    text = self._next()
+                if not self._running:
+                    return
+                self._speaking = text
+
+            if text is None:
+                self._prerender(self.phrases.pop(0))   # idle: render one cached phrase
+                continue
+            try:
+                self._speak(text)
+            except Exception as e:
+                print(f"[speech] {e}")
+            with self._cond:
+                self._speaking = None
+
+    def _get_engine(self):
+        if self._engine is None:
+            import pyttsx3   # imported here so a slow or missing TTS engine does not delay startup
+            self._engine = pyttsx3.init()
+            self._engine.setProperty('rate', self.rate)
+        return self._engine
+
+    def _cache_path(self, text):
+        if self.cache_dir is None:
+            return None
+        key = hashlib.sha1(f"{self.rate}:{text}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, key + '.wav')
+
+    def _prerender(self, text):
+        path = self._cache_path(text)
+        if path is None or os.path.exists(path):
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            engine = self._get_engine()
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+        except Exception as e:
+            print(f"[speech] could not cache '{text}': {e}")
+            self.phrases = []   # the engine is not usable, do not retry every phrase
+
+    def _speak(self, text):
+        path = self._cache_path(text)
+        if path is not None and os.path.exists(path) and os.path.getsize(path) > 0:
+            try:
+                subprocess.run([*self.player, path], check=True)
+                return
+            except (OSError, subprocess.CalledProcessError):
+                pass   # no player, synthesise instead
+        engine = self._get_engine()
+        engine.say(text)
+        engine.runAndWait()
+
+
+"""
+
+Reference:
+    pyttsx3 (say, save_to_file, runAndWait): https://pyttsx3.readthedocs.io/en/latest/engine.html
+    Per-thread nice value on Linux: https://man7.org/linux/man-pages/man2/setpriority.2.html
+
+"""
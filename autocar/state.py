@@ -0,0 +1,101 @@
+"""
+Shared robot state with one writer path and lock-free reads, the same idea as LiveConfig.
+
+RobotState is a small __slots__ record that is never changed once published. StateStore
+holds the current one: update(**fields) builds a copy with the changes under a lock,
+gives it the next version and swaps it in, so
+
+  * readers take store.current (one attribute read) and see every field of one version,
+    never half of a multi-field update
+  * an update that changes nothing is dropped: no new version, no notification
+  * subscribers are called after every change, outside the lock, with
+    (old, new, changed_names), optionally only when some of their fields changed
+
+    store = StateStore(RobotState(mode='manual', speed=50))
+    store.subscribe(lambda old, new, changed: print(changed), fields=('mode',))
+    store.update(mode='autonomous')       -> ('mode',)
+    store.current.mode                    -> 'autonomous'
+"""
+
+import threading
+
+
+class RobotState:
+
+    __slots__ = ('version', 'mode', 'speed', 'servo_angle', 'ultrasonic_distance', 'ir_left', 'ir_right',
+                 'is_moving', 'last_movement', 'hardware', 'autonomous', 'running')
+
+    # what the dashboard gets as robot_state
+    PUBLIC = ('mode', 'speed', 'servo_angle', 'ultrasonic_distance', 'ir_left', 'ir_right',
+              'is_moving', 'last_movement', 'hardware')
+
+    DEFAULTS = {
+        'version': 0,
+        'mode': 'manual',              # 'manual' or 'autonomous'
+        'speed': 50,                   # PWM speed percentage (0-100)
+        'servo_angle': 90,
+        'ultrasonic_distance': 0,
+        'ir_left': 0,
+        'ir_right': 0,
+        'is_moving': False,
+        'last_movement': 'stop',
+        'hardware': 'initializing',    # 'initializing', 'ready' or 'failed'
+        'autonomous': False,           # the autonomous loop should run
+        'running': True,               # cleared on shutdown, every loop ends
+    }
+
+    def __init__(self, **fields):
+        unknown = set(fields) - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"unknown state fields: {', '.join(sorted(unknown))}")
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name, self.DEFAULTS[name]))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RobotState is read-only, use StateStore.update()")
+
+    def _replace(self, **fields):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(fields)
+        return RobotState(**values)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.PUBLIC}
+
+    def __repr__(self):
+        return 'RobotState(' + ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__) + ')'
+
+
+class StateStore:
+
+    def __init__(self, initial=None):
+        self.current = initial or RobotState()
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def subscribe(self, callback, fields=None):
+        """callback(old, new, changed_names) after every change, or only when one of fields changed"""
+        self._subscribers.append((callback, frozenset(fields) if fields else None))
+
+    def update(self, **fields):
+        """Publishes a new state with these fields, returns the names that changed"""
+        with self._lock:
+            old = self.current
+            changed = tuple(name for name, value in fields.items() if getattr(old, name) != value)
+            if not changed:
+                return ()
+            new = old._replace(version=old.version + 1, **{name: fields[name] for name in changed})
+            self.current = new
+        for callback, wanted in self._subscribers:
+            if wanted is None or wanted.intersection(changed):
+                callback(old, new, changed)
+        return changed
+
+
+"""
+
+Reference:
+    __slots__: https://docs.python.org/3/reference/datamodel.html#slots
+    Copy-on-write: https://en.wikipedia.org/wiki/Copy-on-write
+
+"""
@@ -0,0 +1,218 @@
+"""
+Background tasks with one instance per name and cooperative cancellation.
+
+Supervisor.start(name, target) runs target() in a daemon thread with its own CancelToken:
+
+  * policy='ignore': a second start while the task runs is refused (returns None),
+    for requests like a sweep button clicked twice
+  * policy='replace': the running one is cancelled and the new one starts as soon as it
+    has ended, never both at once (autonomous mode switched off and on again)
+
+cancel(name) sets the token. It is checked between steps, not by killing the thread:
+sleep() raises Cancelled at once when the token is set, and GpioCar.sleep() goes
+through it, so a sweep, reverse or turn in progress stops at its next servo step or
+poll. Cancelled derives from BaseException like asyncio's CancelledError, so the
+`except Exception` around a loop iteration does not swallow it. Code that is not
+running in a task (the receiver, the simulator) sleeps normally.
+
+track(name) registers work that runs elsewhere, a green thread on the web server's
+event loop (autocar/runtime.py), under the same name, token and status: the loop
+checks token.cancelled itself, nothing is joined.
+
+status() lists the running tasks with how long they have run and the last finished
+ones with their outcome ('done', 'cancelled' or 'failed'), for /tasks.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class Cancelled(BaseException):
+    pass
+
+
+class CancelToken:
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled()
+
+    def wait(self, seconds):
+        """Sleeps up to seconds, returns True early when cancelled"""
+        return self._event.wait(seconds)
+
+    def sleep(self, seconds):
+        """Sleeps, raises Cancelled as soon as the token is cancelled"""
+        if self._event.wait(seconds):
+            raise Cancelled()
+
+
+def current():
+    """Token of the task running in this thread, None outside a task"""
+    return getattr(_local, 'token', None)
+
+
+def sleep(seconds):
+    """time.sleep() that a cancelled task wakes from with Cancelled"""
+    token = current()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.sleep(seconds)
+
+
+def check():
+    """Raises Cancelled if the task running in this thread was cancelled"""
+    token = current()
+    if token is not None:
+        token.check()
+
+
+class Task:
+
+    def __init__(self, name, target, args):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.token = CancelToken()
+        self.started = None
+        self.ended = None
+        self.outcome = None
+        self.thread = None
+
+    def seconds(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.monotonic()) - self.started
+
+    def info(self):
+        return {'name': self.name, 'seconds': round(self.seconds(), 3), 'cancelled': self.token.cancelled,
+                'outcome': self.outcome}
+
+
+class Supervisor:
+
+    def __init__(self, instruments=None, keep=20):
+        self.instruments = instruments   # records task.<name> durations and tasks.<outcome> counts
+        self.tasks = {}                  # name -> Task, running or about to
+        self.finished = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def start(self, name, target, *args, policy='ignore'):
+        """Runs target(*args) as the only task called name, returns the Task or None if refused"""
+        with self._lock:
+            previous = self.tasks.get(name)
+            if previous is not None and previous.outcome is None:
+                if policy == 'ignore' and not previous.token.cancelled:
+                    return None
+                previous.token.cancel()
+            else:
+                previous = None
+            task = Task(name, target, args)
+            self.tasks[name] = task
+            task.thread = threading.Thread(target=self._run, args=(task, previous), name=f'task-{name}',
+                                           daemon=True)
+        task.thread.start()
+        return task
+
+    def _run(self, task, previous):
+        if previous is not None:
+            previous.thread.join()   # the cancelled one ends at its next step
+        _local.token = task.token
+        task.started = time.monotonic()
+        try:
+            task.token.check()
+            task.target(*task.args)
+            task.outcome = 'done'
+        except Cancelled:
+            task.outcome = 'cancelled'
+        except Exception as e:
+            task.outcome = 'failed'
+            print(f"[tasks] {task.name} failed: {e}")
+        finally:
+            _local.token = None
+            self._finish(task)
+
+    @contextmanager
+    def track(self, name):
+        """Registers the code in the with block as task name, yields its token"""
+        task = Task(name, None, ())
+        with self._lock:
+            previous = self.tasks.get(name)
+            if previous is not None and previous.outcome is None:
+                previous.token.cancel()
+            self.tasks[name] = task
+        task.started = time.monotonic()
+        try:
+            yield task.token
+            task.outcome = 'cancelled' if task.token.cancelled else 'done'
+        except Cancelled:
+            task.outcome = 'cancelled'
+        except Exception as e:
+            task.outcome = 'failed'
+            print(f"[tasks] {task.name} failed: {e}")
+        finally:
+            self._finish(task)
+
+    def _finish(self, task):
+        task.ended = time.monotonic()
+        with self._lock:
+            if self.tasks.get(task.name) is task:
+                del self.tasks[task.name]
+            self.finished.append(task)
+        if self.instruments is not None:
+            self.instruments.record(f'task.{task.name}', task.seconds())
+            self.instruments.count(f'tasks.{task.outcome}')
+
+    def running(self, name):
+        task = self.tasks.get(name)
+        return task is not None and not task.token.cancelled
+
+    def cancel(self, name, timeout=None):
+        """Cancels the task, waits up to timeout s for it to end (0: not at all), True if it is gone"""
+        task = self.tasks.get(name)
+        if task is None:
+            return True
+        task.token.cancel()
+        if task.thread is None:   # tracked, ends at its next check
+            return task.outcome is not None
+        if timeout != 0 and task.thread is not threading.current_thread():
+            task.thread.join(timeout)
+        return not task.thread.is_alive()
+
+    def cancel_all(self, timeout=None):
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.token.cancel()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for task in tasks:
+            if task.thread is not None and task.thread is not threading.current_thread():
+                task.thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def status(self):
+        return {'running': [task.info() for task in list(self.tasks.values())],
+                'finished': [task.info() for task in reversed(self.finished)]}
+
+
+"""
+
+Reference:
+    threading.Event: https://docs.python.org/3/library/threading.html#event-objects
+    asyncio.CancelledError is a BaseException: https://docs.python.org/3/library/asyncio-exceptions.html#asyncio.CancelledError
+    Cooperative cancellation (cancellation tokens): https://learn.microsoft.com/en-us/dotnet/standard/threading/cancellation-in-managed-threads
+
+"""
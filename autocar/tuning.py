@@ -0,0 +1,300 @@
+"""
+Offline tuning of the obstacle avoidance settings in the simulator.
+
+Instead of trial and error on the car, candidate settings are run through many
+simulated episodes (simulator.run_episode) on a process pool, one task per
+(candidate, world) so every core stays busy, and scored by
+
+    score = mean speed (cm/s) - collision_weight x collisions per minute
+                              - clear_weight x time to clear an obstacle (s)
+
+Tuned settings, named like in autocar/config.py so the output is a config file:
+
+    navigation      'reactive' or 'sweep'
+    forward_speed   cruise speed, 0..1
+    stop_margin     cm kept to obstacles (what FRONT_THRESHOLD was before the stopping model)
+    reverse_time    longest reverse before turning
+    sweep_step      degrees between sweep readings
+    obstacle_fusion stop on the fused obstacle estimate (fusion.py) or on any single reading
+
+The turn time is not tuned any more: turns are closed-loop with a learned rotation
+rate (turning.py). The joystick deadzone does not affect autonomous driving.
+
+Searches:
+    grid     every combination of --grid-points values per setting
+    random   --trials samples from the ranges
+    tpe      a lightweight Tree-structured Parzen Estimator: random samples first, then
+             candidates drawn around the best quarter so far, keeping those more likely
+             under the good results than under the rest
+
+Episodes are deterministic for a (settings, world seed) pair and candidates come from
+one seeded generator in the parent, so a run gives the same result with any number
+of workers. The best settings are re-run on held-out worlds next to the defaults.
+
+The receiver is what drives with the tuned settings, so episodes run at its loop
+period (0.12 s, --period) and the defaults are the receiver's, stop-and-sweep.
+
+Run from the repository root:
+
+    python -m autocar.tuning --search tpe --trials 96 --seeds 12 --out tuned.json
+    python -m autocar.tuning --search grid --grid-points 3 --fix navigation=reactive
+    python ./raspberry-pi/pi-receiver-mode-switcher.py --config tuned.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from autocar.config import FIELDS_BY_NAME
+from autocar.simulator import DEFAULT_SETTINGS, SCRIPT_NAVIGATION, run_episode
+
+HELD_OUT_SEED = 10000   # first world seed of the validation worlds, never used in the search
+RECEIVER_NAVIGATION, RECEIVER_PERIOD = SCRIPT_NAVIGATION['receiver']   # the script the settings are for
+
+
+class Param:
+
+    def __init__(self, name, low=None, high=None, choices=None):
+        self.name = name
+        self.low = low
+        self.high = high
+        self.choices = choices   # categorical or discrete settings
+
+    def sample(self, rng):
+        if self.choices:
+            return rng.choice(self.choices)
+        return round(rng.uniform(self.low, self.high), 3)
+
+    def grid(self, points):
+        if self.choices:
+            return list(self.choices)
+        return [round(self.low + (self.high - self.low) * i / (points - 1), 3) for i in range(points)]
+
+    def perturb(self, value, rng, width=0.15):
+        if self.choices:
+            return value if rng.random() < 0.7 else rng.choice(self.choices)
+        value = rng.gauss(value, (self.high - self.low) * width)
+        return round(max(self.low, min(self.high, value)), 3)
+
+    def density(self, value, values, width=0.15):
+        """Parzen estimate of how likely value is under values"""
+        if self.choices:
+            return (values.count(value) + 1) / (len(values) + len(self.choices))
+        sigma = (self.high - self.low) * width
+        return sum(math.exp(-0.5 * ((value - v) / sigma) ** 2) for v in values) / (len(values) * sigma)
+
+
+SPACE = [
+    Param('navigation', choices=('reactive', 'sweep')),
+    Param('forward_speed', 0.3, 1.0),
+    Param('stop_margin', 4.0, 30.0),
+    Param('reverse_time', 0.1, 1.0),
+    Param('sweep_step', choices=(5, 10, 15, 20)),
+    Param('obstacle_fusion', choices=(False, True)),
+]
+
+DEFAULTS = dict(DEFAULT_SETTINGS, navigation=RECEIVER_NAVIGATION, forward_speed=0.5)
+
+
+# ---- evaluation ----
+
+def _episode(task):
+    """One episode, runs in a pool worker"""
+    index, params, seed, duration, obstacles, period = task
+    settings = {k: params[k] for k in DEFAULT_SETTINGS}
+    return index, run_episode(params['navigation'], seed, duration, obstacles, params['forward_speed'], settings,
+                              period=period)
+
+
+class Tuner:
+
+    def __init__(self, seeds=10, duration=60.0, obstacles=10, collision_weight=10.0, clear_weight=2.0,
+                 workers=None, first_seed=0, period=RECEIVER_PERIOD):
+        self.seeds = list(range(first_seed, first_seed + seeds))
+        self.duration = duration
+        self.obstacles = obstacles
+        self.period = period             # s, control loop period the episodes simulate
+        self.collision_weight = collision_weight
+        self.clear_weight = clear_weight
+        self.workers = workers or os.cpu_count()
+        self.pool = None
+        self.history = []    # every evaluated candidate, in the order they were proposed
+        self.episodes = 0
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.pool = Pool(self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.terminate()
+
+    def score(self, runs):
+        minutes = self.duration / 60
+        speed = sum(r['mean_speed_cm_s'] for r in runs) / len(runs)
+        collisions = sum(r['collisions'] for r in runs) / len(runs) / minutes
+        clear = sum(r['time_to_clear_s'] for r in runs) / len(runs)
+        return {
+            'score': round(speed - self.collision_weight * collisions - self.clear_weight * clear, 3),
+            'mean_speed_cm_s': round(speed, 2),
+            'collisions_per_min': round(collisions, 3),
+            'time_to_clear_s': round(clear, 2),
+            'sweeps': round(sum(r['sweeps'] for r in runs) / len(runs), 1),
+        }
+
+    def run(self, candidates, seeds=None):
+        """Scores for candidates (list of params dicts), every candidate on every seed"""
+        seeds = self.seeds if seeds is None else seeds
+        tasks = [(i, params, seed, self.duration, self.obstacles, self.period)
+                 for i, params in enumerate(candidates) for seed in seeds]
+        runs = [[] for _ in candidates]
+        if self.pool is None:
+            results = map(_episode, tasks)
+        else:
+            results = self.pool.imap_unordered(_episode, tasks)
+        for index, result in results:
+            runs[index].append(result)
+        self.episodes += len(tasks)
+        # episodes finish in any order, sort so the floating point sums do not depend on it
+        return [self.score(sorted(r, key=lambda r: r['seed'])) for r in runs]
+
+    def evaluate(self, candidates):
+        """Scores candidates on the search worlds and adds them to the history"""
+        for params, result in zip(candidates, self.run(candidates)):
+            self.history.append(dict(result, params=params))
+
+    def best(self, count=1):
+        # ties go to the earlier candidate, so the ranking is reproducible
+        ranked = sorted(enumerate(self.history), key=lambda item: (-item[1]['score'], item[0]))
+        return [entry for _, entry in ranked[:count]]
+
+
+# ---- searches ----
+
+def fixed(params, fixes):
+    return dict(params, **fixes)
+
+
+def grid_search(tuner, space, fixes, points):
+    values = [[fixes[p.name]] if p.name in fixes else p.grid(points) for p in space]
+    tuner.evaluate([dict(zip([p.name for p in space], combo)) for combo in itertools.product(*values)])
+
+
+def random_search(tuner, space, fixes, trials, rng):
+    tuner.evaluate([fixed({p.name: p.sample(rng) for p in space}, fixes) for _ in range(trials)])
+
+
+def tpe_search(tuner, space, fixes, trials, rng, batch=None, gamma=0.25, draws=32):
+    batch = batch or max(4, tuner.workers)
+    start = max(2 * batch, trials // 4)
+    random_search(tuner, space, fixes, min(start, trials), rng)
+    free = [p for p in space if p.name not in fixes]
+    while len(tuner.history) < trials:
+        ranked = tuner.best(len(tuner.history))
+        split = max(2, int(len(ranked) * gamma))
+        good = [entry['params'] for entry in ranked[:split]]
+        bad = [entry['params'] for entry in ranked[split:]] or good
+
+        proposals = []
+        for _ in range(min(batch, trials - len(tuner.history))):
+            best, best_ratio = None, -math.inf
+            for _ in range(draws):
+                base = rng.choice(good)
+                candidate = fixed({p.name: p.perturb(base[p.name], rng) for p in space}, fixes)
+                ratio = sum(math.log(p.density(candidate[p.name], [g[p.name] for g in good]) + 1e-12) -
+                            math.log(p.density(candidate[p.name], [b[p.name] for b in bad]) + 1e-12)
+                            for p in free)
+                if ratio > best_ratio:
+                    best, best_ratio = candidate, ratio
+            proposals.append(best)
+        tuner.evaluate(proposals)
+
+
+def parse_fix(text):
+    name, _, value = text.partition('=')
+    if name not in {p.name for p in SPACE}:
+        raise argparse.ArgumentTypeError(f"{name} is not tuned ({', '.join(p.name for p in SPACE)})")
+    return name, FIELDS_BY_NAME[name].convert(value, '--fix')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the obstacle avoidance settings in the simulator")
+    parser.add_argument('--search', choices=('grid', 'random', 'tpe'), default='tpe')
+    parser.add_argument('--trials', type=int, default=64, help="candidates for random and tpe")
+    parser.add_argument('--grid-points', type=int, default=3, help="values per continuous setting for grid")
+    parser.add_argument('--seeds', type=int, default=10, help="worlds every candidate drives in")
+    parser.add_argument('--validate-seeds', type=int, default=20, help="held-out worlds for the final comparison")
+    parser.add_argument('--duration', type=float, default=60.0, help="simulated seconds per episode")
+    parser.add_argument('--obstacles', type=int, default=10)
+    parser.add_argument('--period', type=float, default=RECEIVER_PERIOD,
+                        help="control loop period in s, default the receiver's, which drives with the output")
+    parser.add_argument('--collision-weight', type=float, default=10.0, help="cm/s of speed one collision per minute costs")
+    parser.add_argument('--clear-weight', type=float, default=2.0, help="cm/s of speed one second to clear an obstacle costs")
+    parser.add_argument('--fix', type=parse_fix, action='append', default=[], metavar='NAME=VALUE',
+                        help="keep a setting at this value")
+    parser.add_argument('--workers', type=int, help="processes, default all cores")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the search, same seed same result")
+    parser.add_argument('--out', help="write the best settings here, usable as --config FILE")
+    parser.add_argument('--report', help="write every candidate and its scores here")
+    args = parser.parse_args()
+
+    fixes = dict(args.fix)
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    with Tuner(args.seeds, args.duration, args.obstacles, args.collision_weight, args.clear_weight,
+               args.workers, period=args.period) as tuner:
+        print(f"{args.search} search, {args.seeds} worlds per candidate, {args.period} s loop, "
+              f"{tuner.workers} workers")
+        if args.search == 'grid':
+            grid_search(tuner, SPACE, fixes, args.grid_points)
+        elif args.search == 'random':
+            random_search(tuner, SPACE, fixes, args.trials, rng)
+        else:
+            tpe_search(tuner, SPACE, fixes, args.trials, rng)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n{len(tuner.history)} candidates, {tuner.episodes} episodes in {elapsed:.1f} s "
+              f"({tuner.episodes / elapsed:.1f} episodes/s)\n")
+        names = [p.name for p in SPACE]
+        print(' '.join(f"{n:>13}" for n in names) + f" {'score':>8} {'cm/s':>6} {'coll/min':>8} {'clear s':>7}")
+        for entry in tuner.best(5):
+            print(' '.join(f"{entry['params'][n]!s:>13}" for n in names) +
+                  f" {entry['score']:>8} {entry['mean_speed_cm_s']:>6} {entry['collisions_per_min']:>8}"
+                  f" {entry['time_to_clear_s']:>7}")
+
+        # the search worlds flatter the winner, compare on worlds it has not seen
+        best = tuner.best()[0]['params']
+        validation = list(range(HELD_OUT_SEED, HELD_OUT_SEED + args.validate_seeds))
+        default_score, best_score = tuner.run([fixed(DEFAULTS, fixes), best], validation)
+        print(f"\nheld-out worlds ({args.validate_seeds}):")
+        print(f"  defaults  {default_score}")
+        print(f"  tuned     {best_score}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(best, f, indent=2)
+        print(f"\nBest settings written to {args.out}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'args': {k: v for k, v in vars(args).items() if k != 'fix'}, 'fixed': fixes,
+                       'candidates': tuner.history, 'validation': {'defaults': default_score, 'tuned': best_score}},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
+
+
+"""
+
+Reference:
+    Tree-structured Parzen Estimator: Bergstra et al., Algorithms for Hyper-Parameter Optimization (NeurIPS 2011)
+    multiprocessing.Pool: https://docs.python.org/3/library/multiprocessing.html#module-multiprocessing.pool
+
+"""
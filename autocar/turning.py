@@ -0,0 +1,169 @@
+"""
+Closed-loop reversing and turning.
+
+The original code reversed for REVERSE_TIME and turned for TURN_TIME no matter how
+far the chosen angle was from straight ahead. Here the turn duration comes from a
+rotation rate model (degrees per second at full PWM) and the forward ultrasonic
+reading is checked during the turn. The moment it clears tells where the car is
+pointing (the sweep says at which angle the obstacle ends), so the rest of the
+turn is timed from there and the observed rate is fed back into the model. The
+rate follows battery voltage and floor surface over time.
+
+The learned rate can be stored in a small JSON file and is loaded on the next start.
+The file is replaced in one step when saved, and one that cannot be read (cut short
+by a power loss, edited by hand) is reported and the default rate used instead.
+"""
+
+import json
+import math
+import os
+
+
+class TurnModel:
+
+    def __init__(self, rate=200.0, path=None, alpha=0.3, min_rate=40.0, max_rate=720.0):
+        self.rate = rate            # degrees per second when turning at full speed
+        self.path = path
+        self.alpha = alpha          # how quickly observations move the estimate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.observations = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def duration(self, degrees, speed):
+        """Seconds needed to rotate by degrees at the given PWM speed (0..1)"""
+        return abs(degrees) / (self.rate * speed)
+
+    def observe(self, degrees, seconds, speed):
+        """Updates the rate from a turn that rotated by degrees in seconds"""
+        if seconds <= 0 or speed <= 0:
+            return
+        measured = abs(degrees) / (seconds * speed)
+        measured = max(self.min_rate, min(self.max_rate, measured))
+        self.rate += self.alpha * (measured - self.rate)
+        self.observations += 1
+
+    def load(self):
+        """Rate from the calibration file, keeps the current one if the file cannot be read"""
+        try:
+            with open(self.path) as f:
+                rate = float(json.load(f)['rate'])
+            if not math.isfinite(rate):
+                raise ValueError(f"rate is {rate}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[turning] {self.path} unreadable ({e}), using {self.rate} deg/s")
+            return
+        self.rate = max(self.min_rate, min(self.max_rate, rate))
+
+    def save(self):
+        """Writes a temporary file and renames it over the calibration, never leaving half a file"""
+        if self.path is None:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'rate': round(self.rate, 1), 'observations': self.observations}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+def reverse(car, speed, min_time, max_time, clearance, poll=0.02):
+    """
+    Reverses for at least min_time (the IR sensors can trip on things the ultrasonic
+    does not see), then until the front reading is at least clearance cm or max_time passes.
+    """
+    car.drive(-speed, -speed)
+    start = car.now()
+    while car.now() - start < max_time:
+        car.sleep(poll)
+        if car.now() - start >= min_time and car.distance() >= clearance:
+            break
+    car.stop()
+    return car.now() - start
+
+
+def clear_edge(distance_map, target_angle, looks_clear):
+    """
+    Where the obstacle in front ends on the way to target_angle, as
+    (first swept angle that looks clear, distance of the last blocked reading before it)
+    """
+    step = -1 if target_angle < 90 else 1
+    blocked = distance_map.get(90, looks_clear)
+    for angle in sorted(distance_map, key=lambda a: abs(a - 90)):
+        if (angle - 90) * step < 0:
+            continue
+        if distance_map[angle] >= looks_clear:
+            return angle, blocked
+        blocked = distance_map[angle]
+    return target_angle, blocked
+
+
+def bearing_after_reverse(angle, distance, backed_up):
+    """Degrees from straight ahead of a point seen at angle/distance, after reversing backed_up cm"""
+    phi = math.radians(abs(angle - 90))
+    return math.degrees(math.atan2(distance * math.sin(phi), distance * math.cos(phi) + backed_up))
+
+
+def turn(car, model, target_angle, distance_map, speed,
+         deadband=10, clear_distance=50, min_fraction=0.3, max_fraction=1.5,
+         sensor_range=100, poll=0.02):
+    """
+    Rotates toward target_angle (servo convention, 90 is straight ahead) using the
+    sweep in distance_map as a landmark.
+
+    The sweep tells at which angle the obstacle in front ends. While turning, the
+    forward reading jumps to clear when the car points past that edge: the time it
+    took corrects the rate model and the rest of the turn is timed with the
+    corrected rate. Reversing since the sweep moved everything further away, the
+    front reading before turning tells by how much. If the edge is never seen, the
+    turn gives up after max_fraction of the expected time.
+
+    The turn ends early when an IR trip preempts it (car.preempted).
+
+    Returns the seconds spent turning, 0 if target_angle is within deadband of straight ahead.
+    """
+    degrees = abs(target_angle - 90)
+    if degrees <= deadband:
+        return 0.0
+
+    front = car.distance()
+    backed_up = 0.0
+    if 90 in distance_map and max(front, distance_map[90]) < sensor_range:
+        backed_up = max(0.0, front - distance_map[90])
+
+    looks_clear = min(0.8 * distance_map[target_angle], clear_distance)
+    edge, edge_distance = clear_edge(distance_map, target_angle, looks_clear)
+    edge_degrees = min(degrees, bearing_after_reverse(edge, edge_distance, backed_up))
+    end = model.duration(degrees, speed) * max_fraction
+
+    if target_angle < 90:
+        car.drive(-speed, speed)   # left
+    else:
+        car.drive(speed, -speed)   # right
+
+    start = car.now()
+    edge_seen = False
+    while car.now() - start < end:
+        car.sleep(poll)
+        if car.preempted:
+            break   # an IR sensor tripped during the turn and already stopped the car
+        if edge_seen:
+            continue
+        elapsed = car.now() - start
+        if elapsed >= model.duration(edge_degrees, speed) * min_fraction \
+                and car.distance() >= min(looks_clear + backed_up, sensor_range):
+            edge_seen = True
+            model.observe(edge_degrees, elapsed, speed)
+            end = elapsed + model.duration(degrees - edge_degrees, speed)
+    car.stop()
+    return car.now() - start
+
+
+"""
+
+Reference:
+    Exponential moving average: https://en.wikipedia.org/wiki/Exponential_smoothing
+    os.replace (atomic rename on POSIX): https://docs.python.org/3/library/os.html#os.replace
+
+"""
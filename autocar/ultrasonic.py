@@ -0,0 +1,137 @@
+"""
+HC-SR04 read on demand.
+
+gpiozero's DistanceSensor pings in a background thread every 60 ms and reports the
+median of the last 9 pings, so a reading taken right after a servo move mostly
+describes where the sensor pointed half a second ago. Ultrasonic pings when
+.distance is read, so the caller decides exactly when the measurement happens
+(e.g. in the tail of a servo move) and gets a reading of that moment.
+
+.distance is in metres and capped at max_distance, like gpiozero's DistanceSensor,
+so existing `ultra.distance * 100` code keeps working.
+
+A ping can also be taken in two steps, so SonarArray (autocar/sonar.py) sends the
+pings of several sensors before waiting for their echoes:
+
+    with Ultrasonic.ECHO_LOCK:              # nothing else pings meanwhile
+        started = [s.trigger() for s in sensors]
+        metres = [None if t is None else s.collect(t) for s, t in zip(sensors, started)]
+
+trigger() holds the sensor until collect() returns, None means the ping was not sent
+and there is nothing to collect. Locks are always taken ECHO_LOCK first, then the
+sensor's own.
+"""
+
+import threading
+import time
+
+from gpiozero import DigitalOutputDevice, InputDevice
+
+
+class Ultrasonic:
+
+    SPEED_OF_SOUND = 343.26   # m/s
+    ECHO_LOCK = threading.Lock()   # one ping in the air at a time, sensors hear each other (SonarArray
+                                   # holds it for a slot of sensors pinging together, autocar/sonar.py)
+
+    def __init__(self, echo, trigger, max_distance=1.0, pin_factory=None):
+        self.max_distance = max_distance
+        self._trigger = DigitalOutputDevice(trigger, pin_factory=pin_factory)
+        self._echo = InputDevice(echo, pull_up=False, pin_factory=pin_factory)
+        self._pin = self._echo.pin
+        self._pin.edges = 'both'
+        self._pin.bounce = None
+        self._pin.when_changed = self._echo_changed
+        self._event = threading.Event()
+        self._rise = None
+        self._fall = None
+        self._last = max_distance
+        self._lock = threading.Lock()
+
+    def _echo_changed(self, ticks, state):
+        if state:
+            self._rise = ticks
+        else:
+            self._fall = ticks
+            self._event.set()
+
+    @property
+    def ping_time(self):
+        """s from the trigger until an echo from max_distance is back"""
+        return 0.005 + 2 * self.max_distance / self.SPEED_OF_SOUND
+
+    def _start(self):
+        """Sends the trigger pulse, returns when (monotonic), None if the previous echo did not end"""
+        # a previous echo that ran past max_distance can still be high, wait for it to end
+        if self._pin.state:
+            self._event.clear()
+            if not self._event.wait(0.05):
+                return None
+        self._event.clear()
+        self._rise = self._fall = None
+
+        started = time.monotonic()
+        self._trigger.on()
+        time.sleep(0.00001)
+        self._trigger.off()
+        return started
+
+    def _result(self, started):
+        """Distance in metres of the echo to the ping sent at started (monotonic), None if it failed"""
+        # echo starts ~0.5 ms after the trigger and lasts 2 * distance / speed of sound
+        if not self._event.wait(max(0.0, started + self.ping_time - time.monotonic())):
+            return self.max_distance if self._rise is not None else None
+        if self._rise is None:
+            return None   # echo was too short to see the rising edge
+        seconds = self._echo.pin_factory.ticks_diff(self._fall, self._rise)
+        return min(self.max_distance, seconds * self.SPEED_OF_SOUND / 2)
+
+    def trigger(self):
+        """Sends a ping and returns when (monotonic) for collect(), None if it could not be sent.
+        The sensor stays held until collect() returns"""
+        self._lock.acquire()
+        try:
+            started = self._start()
+        except BaseException:
+            self._lock.release()
+            raise
+        if started is None:
+            self._lock.release()
+        return started
+
+    def collect(self, started):
+        """Waits for the echo of the ping trigger() sent at started, returns metres or None if it failed"""
+        try:
+            distance = self._result(started)
+        finally:
+            self._lock.release()
+        if distance is not None:
+            self._last = distance
+        return distance
+
+    @property
+    def distance(self):
+        """Pings now and returns the distance in metres, the previous reading if the ping failed"""
+        with Ultrasonic.ECHO_LOCK:
+            started = self.trigger()
+            if started is not None:
+                self.collect(started)
+        return self._last
+
+    @property
+    def last(self):
+        """The last successful reading in metres, without pinging"""
+        return self._last
+
+    def close(self):
+        self._trigger.close()
+        self._echo.close()
+
+
+"""
+
+Reference:
+    Code adapted from gpiozero DistanceSensor: https://github.com/gpiozero/gpiozero/blob/master/gpiozero/input_devices.py
+    HC-SR04 timing: https://cdn.sparkfun.com/datasheets/Sensors/Proximity/HCSR04.pdf
+
+"""
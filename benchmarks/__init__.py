@@ -0,0 +1,18 @@
+"""
+Benchmarks of the project's hot paths, runnable on any Linux computer.
+
+Everything runs on gpiozero's mock pins, no Raspberry Pi or Arduino needed. Run from
+the repository root and keep the JSON to compare later commits against:
+
+    python -m benchmarks --json bench-before.json
+    python -m benchmarks --json bench-after.json --compare bench-before.json
+    python -m benchmarks --only joystick dashboard
+
+Modules:
+  joystick.py   - parse_frame() throughput and get_movement() cost per sample
+  dashboard.py  - calculate_statistics() per window size, sensor_update Socket.IO encoding, /history queries
+  bridge.py     - computer-bridge.py forwarding from the sketch emulator to loopback TCP, with corrupted input
+  sweep.py      - servo sweep duration on mock pins and in the simulator
+  emits.py      - emit latency and loop timing, OS threads against green threads with an offload pool
+  sonar.py      - sample rate and crosstalk of several HC-SR04s pinged one by one, together and in slots
+"""
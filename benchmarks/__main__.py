@@ -0,0 +1,75 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.common import ROOT, use_mock_pins
+
+sys.path.insert(0, ROOT)
+
+MODULES = ['joystick', 'dashboard', 'bridge', 'sweep', 'emits', 'sonar']
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Prints every numeric result next to the baseline's, with the ratio new / old"""
+    print(f"\nCompared with {baseline['meta'].get('commit')}:")
+    for module, values in results.items():
+        old = baseline['results'].get(module, {})
+        for key, value in values.items():
+            before = old.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+                continue
+            ratio = f"{value / before:6.2f}x" if before else "     -"
+            print(f"  {module}.{key:<36} {before:>12} -> {value:<12} {ratio}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the project's hot paths on mock pins")
+    parser.add_argument('--only', nargs='+', choices=MODULES, default=MODULES)
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--compare', help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    use_mock_pins()
+    results = {}
+    for name in args.only:
+        module = importlib.import_module(f'benchmarks.{name}')
+        start = time.perf_counter()
+        results[name] = module.run()
+        print(f"{name} ({time.perf_counter() - start:.1f} s)")
+        for key, value in results[name].items():
+            print(f"  {key:<40} {value}")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWritten to {os.path.abspath(args.json)}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
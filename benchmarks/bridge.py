@@ -0,0 +1,206 @@
+"""
+computer-bridge.py forwarding joystick lines from a serial port to the Pi over TCP.
+
+The HW-504 sketch emulator (autocar/arduino.py) stands in for the Arduino and a
+loopback TCP server for the Pi, so the real bridge script runs unchanged as a
+subprocess. Measured:
+
+  latency      time from writing one line into the pty until it arrives over TCP
+  throughput   lines per second forwarded from the emulator's stress mode (no baud pacing, bursts)
+  cpu          share of one CPU core the bridge uses over the latency and throughput runs
+  corrupted    the stress mode with 2% of lines corrupted: share of lines still forwarded
+               and whether the bridge survived
+  stick_to_tcp real-time emulation, time from a stick movement until it arrives over TCP,
+               with the sketch as flashed (text, 9600 baud, 50 ms loop) and with the fast
+               link (binary frames, 115200 baud, 5 ms loop, change-only sending)
+
+Every measurement except stick_to_tcp runs for the text and the binary protocol.
+"""
+
+import os
+import select
+import socket
+import subprocess
+import sys
+import threading
+import time
+from functools import partial
+
+from autocar.arduino import Emulator, Sketch, circle, corners
+from autocar.framing import SAMPLE, encode
+from benchmarks.common import ROOT
+
+BRIDGE = os.path.join(ROOT, 'computer', 'computer-bridge.py')
+
+
+class Bridge:
+    """The bridge script between the serial port at serial_path and a loopback TCP server"""
+
+    def __init__(self, serial_path, extra_args=()):
+        self.server = socket.create_server(('127.0.0.1', 0))
+        port = self.server.getsockname()[1]
+        self.proc = subprocess.Popen(
+            [sys.executable, BRIDGE, '--serial', serial_path, '--host', '127.0.0.1', '--port', str(port), *extra_args],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.server.settimeout(10)
+        self.conn, _ = self.server.accept()
+        self.conn.settimeout(5)
+        self.buffer = b''
+
+    def read_lines(self, count):
+        """Waits for count lines over TCP"""
+        lines = []
+        while len(lines) < count:
+            while b'\n' not in self.buffer:
+                self.buffer += self.conn.recv(65536)
+            line, self.buffer = self.buffer.split(b'\n', 1)
+            lines.append(line)
+        return lines
+
+    def drain(self, idle=1.0):
+        """Reads lines until nothing arrives for idle seconds or the bridge hangs up"""
+        self.conn.settimeout(idle)
+        data = self.buffer
+        try:
+            while chunk := self.conn.recv(65536):
+                data += chunk
+        except socket.timeout:
+            pass
+        self.buffer = b''
+        return data.split(b'\n')[:-1]
+
+    def close(self):
+        """Stops the bridge, returns the CPU seconds it used"""
+        self.conn.close()
+        self.server.close()
+        if self.proc.returncode is not None:   # already exited and reaped
+            return None
+        self.proc.terminate()
+        _, _, usage = os.wait4(self.proc.pid, 0)
+        return usage.ru_utime + usage.ru_stime
+
+
+def stress_emulator(binary=False, corrupt=0.0):
+    emulator = Emulator(circle, baud=0, period=0.0, burst=50, corrupt=corrupt, block=True, sketch=Sketch(binary))
+    emulator.sketch.sending = True
+    return emulator, emulator.open()
+
+
+def bridge_args(binary, baud=9600):
+    return ['--baud', str(baud), '--binary' if binary else '--no-binary']
+
+
+def forwarding(binary, lines, pings):
+    """Ping-pong latency, stress throughput and CPU of the bridge"""
+    emulator, path = stress_emulator(binary)
+    bridge = Bridge(path, bridge_args(binary))
+    start = time.perf_counter()
+    try:
+        frame = encode(SAMPLE, 0, 512, 900, 0) if binary else b"X:512|Y:900|SW:0\r\n"
+
+        # latency, one line at a time
+        time.sleep(0.2)   # let the bridge open the port
+        delays = []
+        for _ in range(pings):
+            sent = time.perf_counter()
+            emulator.write(frame)
+            bridge.read_lines(1)
+            delays.append(time.perf_counter() - sent)
+        delays.sort()
+
+        # throughput, the emulator in its own thread because the pty buffer fills up
+        writer = threading.Thread(target=emulator.run, kwargs={'lines': lines})
+        burst = time.perf_counter()
+        writer.start()
+        bridge.read_lines(lines)
+        elapsed = time.perf_counter() - burst
+        writer.join()
+    finally:
+        cpu = bridge.close()
+        emulator.close()
+    wall = time.perf_counter() - start
+    return {
+        'latency_p50_ms': round(delays[len(delays) // 2] * 1000, 3),
+        'latency_p99_ms': round(delays[int(len(delays) * 0.99)] * 1000, 3),
+        'throughput_lines_per_s': round(lines / elapsed),
+        'cpu_percent': round(cpu / wall * 100, 1),
+    }
+
+
+def corrupted(binary, lines):
+    """Share of lines forwarded when 2% of them are corrupted, and whether the bridge survived"""
+    emulator, path = stress_emulator(binary, corrupt=0.02)
+    bridge = Bridge(path, bridge_args(binary))
+    try:
+        time.sleep(0.2)
+        writer = threading.Thread(target=emulator.run, kwargs={'lines': lines}, daemon=True)
+        writer.start()
+        forwarded = bridge.drain()
+        try:
+            bridge.proc.wait(0.5)
+            alive = False
+        except subprocess.TimeoutExpired:
+            alive = True
+    finally:
+        bridge.close()
+        # a bridge that died leaves the emulator blocked on a full pty, read the rest away
+        while writer.is_alive():
+            if select.select([emulator.slave], [], [], 0.1)[0]:
+                os.read(emulator.slave, 65536)
+        emulator.close()
+    return {
+        'corrupted_forwarded_ratio': round(len(forwarded) / lines, 3),
+        'corrupted_bridge_survived': alive,
+    }
+
+
+def stick_to_tcp(binary, baud, period, changes_only, duration=3.0, hold=0.2371):
+    """
+    Real-time emulation with the stick jumping between positions every hold seconds (not a
+    multiple of the loop period, so the jumps land anywhere in the loop):
+    time from the jump until the new position arrives over TCP, and bytes per second on the wire.
+    """
+    sketch = Sketch(binary, changes_only)
+    sketch.sending = True
+    emulator = Emulator(partial(corners, hold=hold), baud=baud, period=period, noise=0, sketch=sketch)
+    bridge = Bridge(emulator.open(), bridge_args(binary, baud))
+    bridge.conn.settimeout(0.5)
+    delays = []
+    try:
+        time.sleep(0.2)
+        writer = threading.Thread(target=emulator.run, kwargs={'duration': duration})
+        writer.start()
+        last = None
+        while True:
+            try:
+                line = bridge.read_lines(1)[0]
+            except socket.timeout:
+                break
+            position = line.split(b'|')[:2]
+            if last is not None and position != last:
+                since_start = time.monotonic() - emulator.started
+                delays.append(since_start % hold)
+            last = position
+        writer.join()
+    finally:
+        bridge.close()
+        emulator.close()
+    delays.sort()
+    return round(delays[len(delays) // 2] * 1000, 1), round(emulator.stats['bytes'] / duration)
+
+
+def run(lines=5000, pings=200):
+    result = forwarding(False, lines, pings)
+    result.update(corrupted(False, lines))
+    for key, value in forwarding(True, lines, pings).items():
+        result['binary_' + key] = value
+    for key, value in corrupted(True, lines).items():
+        result['binary_' + key] = value
+
+    # what the stick feels like: the sketch as flashed, and the fast link
+    for name, binary, baud, period, changes_only in (('text_9600_50ms', False, 9600, 0.05, False),
+                                                      ('binary_115200_5ms_changes', True, 115200, 0.005, True)):
+        delay, rate = stick_to_tcp(binary, baud, period, changes_only)
+        result[f'stick_to_tcp_{name}_ms'] = delay
+        result[f'wire_{name}_bytes_per_s'] = rate
+    return result
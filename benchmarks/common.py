@@ -0,0 +1,38 @@
+"""
+Timing helpers shared by the benchmark modules.
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def per_call(fn, repeat=5):
+    """Best time per call of fn() in microseconds, each repeat runs for at least 0.2 s"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return round(best / number * 1e6, 3)
+
+
+def use_mock_pins():
+    """Makes gpiozero use mock pins for everything created afterwards"""
+    from gpiozero import Device
+    from gpiozero.pins.mock import MockFactory, MockPWMPin
+    if Device.pin_factory is not None:
+        Device.pin_factory.close()
+    Device.pin_factory = MockFactory(pin_class=MockPWMPin)
+    return Device.pin_factory
+
+
+def import_app():
+    """app.py as a module (it builds no hardware at import), None if its dependencies are missing"""
+    sys.path.insert(0, os.path.join(ROOT, 'iot-autocar-web'))
+    try:
+        import app
+        return app
+    except ImportError as e:
+        print(f"[skip] app.py not importable: {e}")
+        return None
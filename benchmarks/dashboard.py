@@ -0,0 +1,68 @@
+"""
+Work app.py does for every sensor_update it sends to the dashboard (10 times a second),
+and for a /history query over a full hour of ticks.
+"""
+
+import random
+
+from benchmarks.common import import_app, per_call
+
+WINDOWS = (10, 100, 1000)
+HOUR = 36000   # sensor ticks at 10 Hz
+
+
+def sensor_update(app):
+    """The payload sensor_monitor() emits, with a full distance history"""
+    return {
+        't': 1718000000.123,
+        'distance': 42.5,
+        'ir_left': 1,
+        'ir_right': 1,
+        'servo_angle': 90,
+        'statistics': app.calculate_statistics(),
+    }
+
+
+def run():
+    app = import_app()
+    if app is None:
+        return {'skipped': 'app.py dependencies (flask, flask-socketio, eventlet) not installed'}
+    from engineio import packet as engineio_packet
+    from socketio import packet as socketio_packet
+
+    from autocar.history import History
+
+    rng = random.Random(0)
+    original, original_window = app.history, app.STATS_WINDOW
+    result = {}
+    try:
+        # an hour of ticks, timestamps ending now
+        app.history = History(app.HISTORY_CHANNELS, capacity=HOUR)
+        end = app.history.clock()
+        for i in range(HOUR):
+            app.history.append({'distance': rng.uniform(2, 100), 'ir_left': 1, 'ir_right': 1, 'servo_angle': 90},
+                               now=end - (HOUR - i) * 0.1)
+        result['history_append_us'] = per_call(lambda: app.history.append({'distance': 42.5}))
+
+        for window in WINDOWS:
+            app.STATS_WINDOW = window
+            result[f'calculate_statistics_{window}_us'] = per_call(app.calculate_statistics)
+        app.STATS_WINDOW = original_window
+
+        for method in ('minmax', 'lttb'):
+            query = {'seconds': 3600, 'points': 500, 'channels': 'distance', 'method': method}
+            result[f'history_hour_{method}_ms'] = round(per_call(lambda: app.history_window(query)) / 1000, 3)
+
+        # what python-socketio does in emit(): JSON encoding into a Socket.IO event, wrapped in an Engine.IO message
+        payload = sensor_update(app)
+
+        def encode():
+            encoded = socketio_packet.Packet(socketio_packet.EVENT, data=['sensor_update', payload], namespace='/').encode()
+            return engineio_packet.Packet(engineio_packet.MESSAGE, data=encoded).encode()
+
+        result['sensor_update_encode_us'] = per_call(encode)
+        result['sensor_update_bytes'] = len(encode())
+        result['sensor_update_total_us'] = per_call(lambda: (app.calculate_statistics(), encode()))
+    finally:
+        app.history, app.STATS_WINDOW = original, original_window
+    return result
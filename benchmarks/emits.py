@@ -0,0 +1,185 @@
+"""
+Emit latency and loop timing of the dashboard's background work: OS threads calling
+socketio.emit() and time.sleep(), as app.py used to run it, against green threads on
+the event loop with an offload pool (autocar/runtime.py).
+
+A Flask-SocketIO server in eventlet mode, not monkey-patched like app.py, on loopback
+and a websocket client in the benchmark. Measured:
+
+  emit_*   50 events at 10 Hz, time from the emit until the client has it, and how many
+           arrived (the client waits 2 s after the last one is sent)
+             thread    socketio.emit() from a real thread, the old design
+             handoff   Runtime.emit() from a real thread (the supervised driving tasks)
+             green     Runtime.emit() from a green thread (the sensor loop)
+  loop_*   a 10 Hz loop making an 11 ms blocking call per tick (a ping without echo),
+           jitter of its period
+             thread    real thread, time.sleep(period) after the call (the old sensor loop)
+             green     green thread, the call offloaded, sleeping to the next deadline
+  rtt_*    Socket.IO acknowledgement round trip while the green loop runs
+             blocking  the loop makes the call on the hub itself
+             offload   the call in the pool
+"""
+
+import json
+import socket
+import threading
+import time
+
+from autocar.instrument import Instruments
+
+COUNT = 50
+PERIOD = 0.1
+CALL = 0.011     # ultrasonic ping timing out at max_distance 1 m
+TICKS = 30
+
+
+def add_quantiles(result, prefix, ms):
+    """prefix_p50_ms, _p99_ms and _max_ms of the samples in ms"""
+    ms = sorted(ms)
+    if ms:
+        result[f'{prefix}_p50_ms'] = round(ms[len(ms) // 2], 2)
+        result[f'{prefix}_p99_ms'] = round(ms[int(len(ms) * 0.99)], 2)
+        result[f'{prefix}_max_ms'] = round(ms[-1], 2)
+
+
+class Client:
+    """Socket.IO over a plain websocket, only what the benchmark needs"""
+
+    def __init__(self, port, simple_websocket):
+        self.ws = simple_websocket.Client.connect(f'ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket')
+        self.ws.receive()       # engine.io open
+        self.ws.send('40')
+        self.ws.receive()       # socket.io connect
+
+    def send(self, event, data=None, ack=None):
+        self.ws.send(f'42{"" if ack is None else ack}' + json.dumps([event, data or {}]))
+
+    def events(self, until):
+        """(packet type, payload) until the monotonic time until"""
+        while (left := until - time.monotonic()) > 0:
+            message = self.ws.receive(timeout=left)
+            if message is None:
+                continue
+            if message == '2':
+                self.ws.send('3')
+            elif message.startswith('42') or message.startswith('43'):
+                body = message[2:]
+                ack = body[:body.index('[')]
+                yield message[:2], int(ack) if ack else None, json.loads(body[len(ack):])
+
+    def close(self):
+        self.ws.close()
+
+
+def emit_latency(result, client, name, start):
+    """Receives the COUNT events of run name started by start()"""
+    start()
+    received = []
+    deadline = time.monotonic() + COUNT * PERIOD + 2.0
+    for kind, _, payload in client.events(deadline):
+        # the thread run's events can come out much later, during another run
+        if payload[0] == 'bench' and payload[1]['run'] == name:
+            received.append((time.perf_counter() - payload[1]['t']) * 1000)
+            if len(received) == COUNT:
+                break
+    add_quantiles(result, f'emit_{name}', received)
+    result[f'emit_{name}_received'] = len(received)
+
+
+def run():
+    try:
+        import simple_websocket
+        from flask import Flask
+        from flask_socketio import SocketIO
+    except ImportError as e:
+        return {'skipped': f'flask-socketio, eventlet or simple-websocket not installed ({e})'}
+    from autocar.runtime import Runtime
+
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='eventlet')
+    runtime = Runtime(socketio, threads=4)
+    stats = Instruments()
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    def bench_events(name, emit, sleep):
+        for _ in range(COUNT):
+            emit('bench', {'run': name, 't': time.perf_counter()})
+            sleep(PERIOD)
+
+    def thread_loop():
+        loop = stats.loop('loop_thread', PERIOD)
+        for _ in range(TICKS):
+            loop.tick()
+            time.sleep(CALL)
+            time.sleep(PERIOD)
+
+    def green_loop(name, call):
+        loop = stats.loop(name, PERIOD)
+        next_tick = time.monotonic()
+        for _ in range(TICKS):
+            loop.tick()
+            call(time.sleep, CALL)
+            next_tick = max(next_tick + PERIOD, time.monotonic())
+            runtime.sleep(next_tick - time.monotonic())
+
+    @socketio.on('start')
+    def start(data):
+        what = data['what']
+        if what == 'green_emit':
+            runtime.spawn(bench_events, 'green', runtime.emit, runtime.sleep)
+        elif what == 'blocking':
+            runtime.spawn(green_loop, 'loop_blocking', lambda fn, *args: fn(*args))
+        elif what == 'offload':
+            runtime.spawn(green_loop, 'loop_green', runtime.offload)
+
+    @socketio.on('echo')
+    def echo(data):
+        return data
+
+    def serve():
+        runtime.start()
+        socketio.run(app, host='127.0.0.1', port=port, log_output=False)
+
+    threading.Thread(target=serve, daemon=True).start()
+    time.sleep(0.5)
+    client = Client(port, simple_websocket)
+    result = {}
+    try:
+        emit_latency(result, client, 'handoff', lambda: threading.Thread(
+            target=bench_events, args=('handoff', runtime.emit, time.sleep), daemon=True).start())
+        emit_latency(result, client, 'green', lambda: client.send('start', {'what': 'green_emit'}))
+
+        thread = threading.Thread(target=thread_loop, daemon=True)
+        thread.start()
+        thread.join()
+
+        for what in ('blocking', 'offload'):
+            client.send('start', {'what': what})
+            rtt = []
+            deadline = time.monotonic() + TICKS * PERIOD
+            while time.monotonic() < deadline:
+                client.send('echo', {'t': time.perf_counter()}, ack=len(rtt))
+                for kind, _, payload in client.events(time.monotonic() + 1.0):
+                    if kind == '43':
+                        rtt.append((time.perf_counter() - payload[0]['t']) * 1000)
+                        break
+                time.sleep(0.013)   # off the loop's beat, lands anywhere in its tick
+            add_quantiles(result, f'rtt_{what}', rtt)
+            time.sleep(0.3)
+
+        # last: the events emitted from a thread stall the hub, later runs would see no events at all
+        emit_latency(result, client, 'thread', lambda: threading.Thread(
+            target=bench_events, args=('thread', socketio.emit, time.sleep), daemon=True).start())
+
+        histograms = stats.snapshot()['histograms_ms']
+        for name in ('loop_thread', 'loop_blocking', 'loop_green'):
+            jitter = histograms[f'{name}.jitter']
+            for q in ('p50', 'p99', 'max'):
+                result[f'{name}_jitter_{q}_ms'] = jitter[q]
+    finally:
+        client.close()
+        runtime.close()
+        time.sleep(0.2)
+    return result
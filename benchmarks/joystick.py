@@ -0,0 +1,48 @@
+"""
+Joystick frame parsing and movement decision, run for every frame on the Pi, and the
+serial decoding computer-bridge.py does for every sample (text lines vs binary frames).
+"""
+
+import random
+
+from autocar.framing import SAMPLE, Decoder, encode, parse_line
+from autocar.joystick import get_movement, parse_frame
+from benchmarks.common import per_call
+
+
+def run():
+    rng = random.Random(0)
+    lines = [f"X:{rng.randint(0, 1023)}|Y:{rng.randint(0, 1023)}|SW:{rng.randint(0, 1)}|T:{rng.randint(0, 10**9)}"
+             for _ in range(1000)]
+    samples = [(rng.randint(0, 1023), rng.randint(0, 1023)) for _ in range(1000)]
+    joystick = {}
+
+    def parse_all():
+        for line in lines:
+            parse_frame(line, joystick)
+
+    def decide_all():
+        for x, y in samples:
+            get_movement(x, y)
+
+    serial_lines = [b"X:%d|Y:%d|SW:0\r\n" % sample for sample in samples]
+    serial_frames = b''.join(encode(SAMPLE, i, x, y, 0) for i, (x, y) in enumerate(samples))
+
+    def parse_serial_lines():
+        for line in serial_lines:
+            parse_line(line)
+
+    def decode_serial_frames():
+        decoder = Decoder()
+        for i in range(0, len(serial_frames), 64):   # as if read from the port in 64 byte chunks
+            decoder.feed(serial_frames[i:i + 64])
+
+    parse_us = per_call(parse_all) / len(lines)
+    movement_us = per_call(decide_all) / len(samples)
+    return {
+        'parse_frame_us': round(parse_us, 3),
+        'parse_frame_per_s': round(1e6 / parse_us),
+        'get_movement_us': round(movement_us, 3),
+        'bridge_parse_line_us': round(per_call(parse_serial_lines) / len(samples), 3),
+        'bridge_decode_frame_us': round(per_call(decode_serial_frames) / len(samples), 3),
+    }
@@ -0,0 +1,149 @@
+"""
+Sample rate and crosstalk of several HC-SR04s pinged as one array (autocar/sonar.py).
+
+Five sensors at 0, 45, 90, 135 and 180 degrees on mock pins, each in front of an
+obstacle at its own distance. A trigger pin answers with the echo of that distance,
+unless another sensor whose beam overlaps (less than 60 degrees apart) pinged while
+its echo was in flight: then it hears the nearer of the two obstacles, like the real
+sensors do. The echo edges carry the exact times of the simulated pulse, like the
+timestamps pigpio and lgpio take in C: gpiozero's MockTriggerPin stamps them when its
+Python thread wakes, often a millisecond late (17 cm) with several sensors pinging.
+Every schedule cycles the array for DURATION s:
+
+  sequential    one sensor at a time (separation above 180 degrees)
+  together      all five at once (separation 0)
+  interleaved   the slots SonarArray makes with the default 60 degrees
+
+  *_hz            effective readings per second of each sensor (the mean), min_hz of the slowest
+                  and total_hz of all of them, interleaved_<name>_hz for each one
+  *_crosstalk     share of the pings that heard another sensor's echo (from the simulation,
+                  so exactly 0 when the schedule keeps overlapping beams apart)
+  *_errors        share of the readings more than 5 cm from the sensor's own obstacle
+  *_cycle_ms      time for one cycle of the array, *_slots how many slots it pings in
+"""
+
+import threading
+import time
+
+from gpiozero.pins.mock import MockFactory, MockPin, MockTriggerPin
+
+from autocar.sonar import Sonar, SonarArray
+from autocar.ultrasonic import Ultrasonic
+
+DURATION = 2.0
+SOUND = Ultrasonic.SPEED_OF_SOUND * 100   # cm/s
+SENSORS = [   # name, angle, cm to its obstacle, echo and trigger pins
+    ('right', 0, 25.0, 5, 6),
+    ('front_right', 45, 60.0, 20, 21),
+    ('front', 90, 40.0, 26, 16),
+    ('front_left', 135, 75.0, 23, 24),
+    ('left', 180, 30.0, 17, 27),
+]
+BEAM = 60   # degrees apart below which two sensors hear each other's pings
+
+
+class Air:
+    """The pings in flight, so a trigger can hear the others'"""
+
+    def __init__(self):
+        self.pings = {}   # trigger pin -> (angle, cm, sent)
+        self.sent = 0
+        self.crossed = 0  # pings that heard another sensor's echo instead of their own
+        self.lock = threading.Lock()
+
+    def send(self, pin, now):
+        with self.lock:
+            self.pings[pin] = (pin.angle, pin.cm, now)
+            heard = pin.cm
+            for other, (angle, cm, sent) in self.pings.items():
+                # the other's echo reaches this sensor while it listens for its own
+                if other is not pin and abs(angle - pin.angle) < BEAM and now - sent < 2 * cm / SOUND + 0.001:
+                    heard = min(heard, cm)
+            self.sent += 1
+            self.crossed += heard != pin.cm
+        return heard
+
+
+class SimEchoPin(MockPin):
+    """MockPin whose edges are stamped with a given time instead of when they are driven"""
+
+    def drive_at(self, state, ticks):
+        if self._change_state(state):
+            self._last_change = ticks
+            if self._edges in ('both', 'rising' if state else 'falling') and self._when_changed is not None:
+                self._call_when_changed()
+
+
+class SimTriggerPin(MockTriggerPin):
+    """MockTriggerPin with the echo of an obstacle at cm, or of a nearer one it hears instead"""
+
+    def __init__(self, factory, info, echo_pin=None, air=None, angle=90, cm=50.0):
+        super().__init__(factory, info, echo_pin=echo_pin, echo_time=2 * cm / SOUND)
+        self.air = air
+        self.angle = angle
+        self.cm = cm
+        self.sent = None
+
+    def _set_state(self, value):
+        if value:
+            self.sent = time.monotonic()
+        super()._set_state(value)
+
+    def _echo(self):
+        rise = self.sent + 0.0005
+        fall = rise + 2 * self.air.send(self, self.sent) / SOUND
+        time.sleep(max(0.0, rise - time.monotonic()))
+        self.echo_pin.drive_at(True, rise)
+        time.sleep(max(0.0, fall - time.monotonic()))
+        self.echo_pin.drive_at(False, fall)
+
+
+def make_array(factory, air, separation):
+    sonars = []
+    for name, angle, cm, echo, trigger in SENSORS:
+        echo_pin = factory.pin(echo, pin_class=SimEchoPin)
+        factory.pin(trigger, pin_class=SimTriggerPin, echo_pin=echo_pin, air=air, angle=angle, cm=cm)
+        sonars.append(Sonar(name, Ultrasonic(echo, trigger, pin_factory=factory), angle if name != 'front' else None))
+    return SonarArray(sonars, servo_angle=lambda: 90, separation=separation, window=DURATION)
+
+
+def measure(array, air):
+    truth = {name: cm for name, _, cm, _, _ in SENSORS}
+    readings = []
+    cycles = 0
+    start = time.monotonic()
+    while time.monotonic() - start < DURATION:
+        readings.extend(r for r in array.cycle() if r.distance is not None)
+        cycles += 1
+    wall = time.monotonic() - start
+    rates = array.rates()
+    wrong = sum(1 for r in readings if abs(r.distance - truth[r.name]) > 5.0)
+    return {
+        'hz': round(rates['total'] / len(SENSORS), 1),
+        'min_hz': min(rates[name] for name in truth),
+        'total_hz': rates['total'],
+        'crosstalk': round(air.crossed / max(1, air.sent), 3),
+        'errors': round(wrong / max(1, len(readings)), 3),
+        'cycle_ms': round(wall / cycles * 1000, 1),
+        'slots': len(array.slots()),
+    }, rates
+
+
+def run():
+    result = {}
+    for schedule, separation in (('sequential', 181), ('together', 0), ('interleaved', 60)):
+        # plain mock pins, the trigger pins are not PWM pins like those of use_mock_pins()
+        factory = MockFactory()
+        air = Air()
+        array = make_array(factory, air, separation)
+        try:
+            values, rates = measure(array, air)
+        finally:
+            array.close()
+            factory.close()
+        for key, value in values.items():
+            result[f'{schedule}_{key}'] = value
+        if schedule == 'interleaved':
+            for name, _, _, _, _ in SENSORS:
+                result[f'interleaved_{name}_hz'] = rates[name]
+    return result
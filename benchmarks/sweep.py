@@ -0,0 +1,44 @@
+"""
+Servo sweep duration: the receiver's sweep on mock pins, and every sweep timing in the simulator.
+
+On mock pins nothing answers the HC-SR04 trigger, so the car reads a constant
+distance; the wall time is then the servo waits plus the GPIO overhead of the sweep.
+"""
+
+import math
+import random
+import time
+
+from autocar.car import GpioCar
+from autocar.navigation import RECEIVER_SWEEP_ANGLES, sweep
+from autocar.simulator import SERVO_MODEL, SimCar, World, compare_sweeps
+from benchmarks.common import per_call
+
+
+def mock_car():
+    """GpioCar on the receiver's pins, with a fixed distance reading"""
+    from gpiozero import LineSensor, Robot, Servo
+    return GpioCar(Robot(left=(7, 8), right=(9, 10)), Servo(19), LineSensor(17), LineSensor(27), lambda: 50.0)
+
+
+def run(seeds=5, obstacles=10):
+    car = mock_car()
+    start = time.perf_counter()
+    sweep(car, RECEIVER_SWEEP_ANGLES, SERVO_MODEL)
+    wall = time.perf_counter() - start
+    expected = SERVO_MODEL.sweep_time(dict.fromkeys(RECEIVER_SWEEP_ANGLES))
+    result = {
+        'receiver_mock_sweep_s': round(wall, 3),
+        'receiver_mock_overhead_ms': round((wall - expected) * 1000, 2),   # time not spent waiting for the servo
+    }
+
+    for name, timing in compare_sweeps(seeds, obstacles).items():
+        key = name.replace(' ', '_')
+        result[f'sim_{key}_sweep_s'] = timing['sweep_s']
+        result[f'sim_{key}_bad_readings'] = timing['bad_readings']
+
+    # cost of one simulated sweep, which bounds how fast the strategy comparisons run
+    rng = random.Random(0)
+    sim = SimCar(World.random(0, count=obstacles), heading=rng.uniform(0, 2 * math.pi), noise=0.0)
+    result['sim_sweep_cpu_us'] = per_call(lambda: sweep(sim, RECEIVER_SWEEP_ANGLES, SERVO_MODEL), repeat=3)
+    return result
@@ -15,42 +15,92 @@ The order of running the code:
        
 """
 
+import argparse
+import os
 import serial
 import socket
+import sys
+import time
 
-# --- config ---
-SERIAL_PORT = '/dev/cu.usbmodem1101'  # Serial port shown at the top in Arduino IDE
-BAUD_RATE = 9600
+# shared autocar/ package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from autocar.config import cli_parser, load
+from autocar.framing import SAMPLE, SENDING_OFF, SENDING_ON, Decoder, parse_line
 
-RPi_IP = 'jamescameronpi3.local'  # Dynamic Raspberry Pi IP, if it fails then use a static IP address
-RPi_PORT = 5005
+# --- config ---
+# serial (the port shown at the top in Arduino IDE), baud, binary (BAUD_RATE and BINARY_FRAMES
+# in the sketch), host (the Pi, a static IP address if the .local name fails) and port come
+# from autocar/config.py: autocar-config.json, AUTOCAR_* environment variables or these flags
+parser = argparse.ArgumentParser(description="Forward joystick lines from the Arduino to the Raspberry Pi",
+                                 parents=[cli_parser()])
+parser.parse_args()
+cfg = load()
 
 # --- setup ---
-ser = serial.Serial(SERIAL_PORT, BAUD_RATE)
+ser = serial.Serial(cfg.serial, cfg.baud, timeout=0.1)  # reads block until data arrives, no busy polling
 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-sock.connect((RPi_IP, RPi_PORT))
+sock.connect((cfg.pi_host, cfg.port))
+sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
 print("Bridge running...")
 
+
+def stamp(x, y, sw):
+    # T: send time in ms, lets the Pi measure joystick-to-motor latency
+    return f"X:{x}|Y:{y}|SW:{sw}|T:{int(time.monotonic() * 1000)}\n"
+
+
+def read_text():
+    """Samples from the text protocol, lines that do not parse are dropped"""
+    global bad_lines
+    line = ser.readline()
+    if not line:
+        return []
+    sample = parse_line(line)
+    if sample is not None:
+        return [sample]
+    if line.startswith(b"SENDING_ON"):
+        print("[INFO] Sending enabled")
+    elif line.startswith(b"SENDING_OFF"):
+        print("[INFO] Sending disabled")
+    else:
+        bad_lines += 1
+    return []
+
+
+def read_binary():
+    """Samples from the binary protocol, everything that arrived since the last call"""
+    samples = []
+    for kind, x, y, sw in decoder.feed(ser.read(ser.in_waiting or 1)):
+        if kind == SAMPLE:
+            samples.append((x, y, sw))
+        elif kind == SENDING_ON:
+            print("[INFO] Sending enabled")
+        elif kind == SENDING_OFF:
+            print("[INFO] Sending disabled")
+    return samples
+
+
+decoder = Decoder()
+bad_lines = 0
+read = read_binary if cfg.binary else read_text
+
 try:
     while True:
-        if ser.in_waiting > 0:  # check if there is data to read
-            line = ser.readline().decode('utf-8').strip()
-
-            if line.startswith("X:"):  # joystick coordinates
-                sock.sendall((line + "\n").encode('utf-8'))
-            elif line.startswith("SENDING_ON"):
-                print("[INFO] Sending enabled")
-            elif line.startswith("SENDING_OFF"):
-                print("[INFO] Sending disabled")
-                
+        samples = read()
+        if samples:
+            sock.sendall(''.join(stamp(*sample) for sample in samples).encode('utf-8'))
+
 except KeyboardInterrupt:
     print("Exiting...")
 finally:
+    if cfg.binary:
+        print(f"[INFO] {decoder.stats}")
+    elif bad_lines:
+        print(f"[INFO] {bad_lines} corrupted lines dropped")
     sock.close()
     ser.close()
 
-
 """
 
 Reference:
@@ -5,16 +5,41 @@ Access from browser: http://[PI_IP]:5000
 
 Requirements:
 pip install flask flask-socketio eventlet gpiozero pyserial pyttsx3
+pip install pigpio  # optional, hardware-timed PWM (run: sudo pigpiod)
 """
 
-from flask import Flask, render_template
+import math
+import os
+import sys
+from flask import Flask, Response, jsonify, render_template, request
 from flask_socketio import SocketIO, emit
-from gpiozero import Robot, OutputDevice, LineSensor, DistanceSensor, Servo
-import threading
+from gpiozero import Robot, OutputDevice, LineSensor, Servo
 import time
-import pyttsx3
-from collections import deque
-import statistics
+import numpy as np
+
+# Shared autocar package lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from autocar.braking import StoppingModel
+from autocar.car import GpioCar
+from autocar.config import LiveConfig
+from autocar.fusion import ObstacleFusion
+from autocar.hardware import select_pin_factory, servo_settle
+from autocar.history import History
+from autocar.infrared import IrWatch
+from autocar.instrument import Instruments
+from autocar.lifecycle import Subsystems
+from autocar.metrics import render as render_metrics
+from autocar.motors import MotorOwner
+from autocar.navigation import ReactiveNavigator, sweep
+from autocar.runtime import Runtime
+from autocar.servo import ServoModel, point_servo
+from autocar.snapshot import Snapshot
+from autocar.sonar import Sonar, SonarArray, fixed_mounts
+from autocar.state import RobotState, StateStore
+from autocar.tasks import Supervisor, current as current_task
+from autocar.speech import ALERT, INFO, STATUS, Speaker
+from autocar.turning import TurnModel, reverse, turn
+from autocar.ultrasonic import Ultrasonic
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -23,224 +48,549 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
 
 # ===== HARDWARE SETUP ===== 
 # Reference: https://gpiozero.readthedocs.io/en/stable/recipes.html
+# Nothing is created at import: each init function runs in the background once
+# subsystems.start() is called, so the web server answers while the hardware comes up
+
+subsystems = Subsystems()
+
+# Stage timings, latencies and loop jitter, served at /stats and on the 'stats' channel,
+# counters and timings also at /metrics for Prometheus
+stats = Instruments()
+
+# Created up front so recording never has to register a new name
+for name in ('sensor_reads', 'sensor_errors.ultrasonic', 'sensor_errors.monitor', 'obstacles.ultrasonic',
+             'obstacles.ir', 'obstacles.ir_preempt', 'obstacles.boxed_in', 'sweeps', 'motor_commands.forward', 'motor_commands.backward',
+             'motor_commands.left', 'motor_commands.right', 'motor_commands.stop', 'motor_commands.drive',
+             'emits.sensor_update', 'emits.robot_state', 'emits.sweep_start', 'emits.sweep_data', 'emits.status',
+             'emits.stats', 'emits.input_config', 'emits.input_lapsed', 'web.commands', 'web.keepalives', 'web.lapses',
+             'tasks.done', 'tasks.cancelled', 'tasks.failed', 'sonar.failed'):
+    stats.counter(name)
+for name in ('sensor_read', 'actuate', 'decide', 'sweep', 'web_to_motor', 'joystick_to_motor', 'ir_to_stop',
+             'sensor_loop.period', 'sensor_loop.jitter', 'auto_loop.period', 'auto_loop.jitter',
+             'task.autonomous', 'task.sweep', 'task.sensors', 'task.input_watchdog', 'task.sonar', 'emit_handoff',
+             'sonar_cycle'):
+    stats.histogram(name)
+
+# Background work runs as named tasks, one instance each: a second sweep request is refused,
+# switching autonomous off cancels the loop at its next step, even in the middle of a sweep.
+# Running and recent tasks, the green loops too, are shown at /tasks
+supervisor = Supervisor(stats)
+
+# Pins, ports and driving parameters from autocar/config.py (autocar-config.json, AUTOCAR_*
+# environment variables or --flags). cfg is read once, the loops read config.current,
+# which follows the file while running. Shown at /config.
+config = LiveConfig(defaults={'sweep_step': 10})
+cfg = config.current
+
+# The sensor monitor and input watchdog run as green threads on the server's event loop,
+# their blocking hardware calls in a pool of executor_threads real threads. Events emitted
+# from the driving tasks' threads are handed to the loop (autocar/runtime.py)
+runtime = Runtime(socketio, threads=cfg.executor_threads, instruments=stats)
+
+# GPIO backend: pin_factory none picks the best available (pigpio, lgpio, rpigpio, native), mock pins off the Pi
+pin_factory = settle_time = None
+
+def init_gpio():
+    global pin_factory, settle_time
+    # Must happen before any gpiozero device is created
+    pin_factory = select_pin_factory(cfg.pin_factory)
+    settle_time = servo_settle(pin_factory, cfg.servo_settle)
+    print(f"GPIO backend: {pin_factory} (servo settle {settle_time * 1000:.0f} ms)")
+
+subsystems.add('gpio', init_gpio)
+
+ena = enb = robot = motors = None
+
+def init_motors():
+    global ena, enb, robot, motors
+    # L298N Enable pins
+    ena = OutputDevice(cfg.motor_enable[0])
+    enb = OutputDevice(cfg.motor_enable[1])
+    ena.on()
+    enb.on()
+
+    # Robot motor control (IN1, IN2, IN3, IN4)
+    robot = Robot(left=cfg.motor_left, right=cfg.motor_right)
+    
+    # Every motor write goes through here, also the joystick's in unified-runtime.py
+    motors = MotorOwner(robot, stats=stats)
 
-# L298N Enable pins
-ena = OutputDevice(12)
-enb = OutputDevice(13)
-ena.on()
-enb.on()
+subsystems.add('motors', init_motors, requires=('gpio',))
 
-# Robot motor control (IN1, IN2, IN3, IN4)
-robot = Robot(left=(7, 8), right=(9, 10))
+ultra = sonar = None
 
-# Ultrasonic sensor (HC-SR04)
-# Reference: https://gpiozero.readthedocs.io/en/stable/api_input.html#distancesensor-hc-sr04
-ultra = DistanceSensor(echo=26, trigger=16)
+def on_sonar_reading(reading):
+    """The fixed sensors' readings go into the obstacle estimate, the servo's come from the loops that move it"""
+    if reading.name != 'front':
+        fusion.observe_distance(reading.angle, reading.distance, reading.time)
 
-# IR sensors (MH Infrared Obstacle Sensor Module)
-# Reference: https://projects.raspberrypi.org/en/projects/rpi-python-line-following/6
-left_ir = LineSensor(17)
-right_ir = LineSensor(27)
+def init_ultrasonic():
+    global ultra, sonar
+    # Ultrasonic sensor (HC-SR04)
+    # Reference: https://gpiozero.readthedocs.io/en/stable/api_input.html#distancesensor-hc-sr04
+    # Pings on demand so sweep readings belong to the current servo angle (autocar/ultrasonic.py)
+    ultra = Ultrasonic(echo=cfg.ultrasonic_echo, trigger=cfg.ultrasonic_trigger)
+    
+    # Extra sensors at fixed angles, pinged together with the servo's in interleaved slots (autocar/sonar.py)
+    sonars = [Sonar('front', ultra, None)]
+    for echo, trigger, angle in fixed_mounts(cfg.sonar_fixed):
+        sonars.append(Sonar(f'sonar{angle}', Ultrasonic(echo=echo, trigger=trigger), angle))
+    sonar = SonarArray(sonars, servo_angle=lambda: car.servo_angle if car is not None else 90,
+                       separation=cfg.sonar_separation, guard=cfg.sonar_guard,
+                       on_reading=on_sonar_reading, instruments=stats)
+
+subsystems.add('ultrasonic', init_ultrasonic, requires=('gpio',))
+
+left_ir = right_ir = ir_watch = None
+
+def on_ir_trip(event):
+    """gpiozero callback thread: stop at once, even in the middle of a turn (only autonomous mode drives the car)"""
+    if car is not None and car.preempt():
+        stats.count('obstacles.ir_preempt')
+        stats.record('ir_to_stop', time.monotonic() - event.time)
+
+def init_ir():
+    global left_ir, right_ir, ir_watch
+    # IR sensors (MH Infrared Obstacle Sensor Module)
+    # Reference: https://projects.raspberrypi.org/en/projects/rpi-python-line-following/6
+    left_ir = LineSensor(cfg.ir_left)
+    right_ir = LineSensor(cfg.ir_right)
+    # Edge callbacks with a debounced state instead of reading the pins once per loop (autocar/infrared.py)
+    ir_watch = IrWatch(left_ir, right_ir, on_trip=on_ir_trip)
+
+subsystems.add('ir', init_ir, requires=('gpio',))
+
+servo = None
+
+def init_servo():
+    global servo
+    # Servo motor (SG90)
+    # Reference: https://gpiozero.readthedocs.io/en/stable/api_output.html#servo
+    servo = Servo(cfg.servo_pin)
+
+subsystems.add('servo', init_servo, requires=('gpio',))
+
+# Text-to-Speech on one worker thread, pyttsx3 is loaded on first use
+# Reference: https://pyttsx3.readthedocs.io/en/latest/
+SPEECH_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'speech-cache')
+PHRASES = ["Object detected", "Scanning environment", "Clear path found",
+           "Autonomous mode activated", "Manual mode activated", "Performing servo sweep"]
+speaker = None
 
-# Servo motor (SG90)
-# Reference: https://gpiozero.readthedocs.io/en/stable/api_output.html#servo
-servo = Servo(19)
+def init_speech():
+    global speaker
+    speaker = Speaker(rate=150, cache_dir=SPEECH_CACHE, phrases=PHRASES)  # Speed of speech: 150
 
-# Text-to-Speech engine
-# Reference: https://pyttsx3.readthedocs.io/en/latest/
-tts_engine = pyttsx3.init()
-tts_engine.setProperty('rate', 150)  # Speed of speech
+subsystems.add('speech', init_speech)
 
 # ===== GLOBAL STATE =====
-robot_state = {
-    'mode': 'manual',  # 'manual' or 'autonomous'
-    'speed': 50,  # PWM speed percentage (0-100)
-    'servo_angle': 90,
-    'ultrasonic_distance': 0,
-    'ir_left': 0,
-    'ir_right': 0,
-    'is_moving': False,
-    'last_movement': 'stop'
-}
-
-# Distance history for statistics (store last 100 readings)
-distance_history = deque(maxlen=100)
-
-# Thread control
-running = True
-autonomous_active = False
+# The one source of truth: state.current is a read-only RobotState, read it once and use
+# that copy, change it only with state.update(...). Subscribers below react to changes
+# (dashboard broadcast, autonomous thread) instead of polling.
+state = StateStore(RobotState())
+
+# Every sensor tick for the last history_samples ticks (1 h at 10 Hz), served downsampled at
+# /history and on the 'history' event so a reconnecting dashboard gets its charts back
+HISTORY_CHANNELS = ('distance', 'ir_left', 'ir_right', 'servo_angle')
+history = History(HISTORY_CHANNELS, capacity=cfg.history_samples)
+STATS_WINDOW = 100   # readings the statistics card is computed from
+
+# Versioned copy of what the dashboard shows (state, sensors, current sweep, recent status
+# messages). A connecting browser gets it in one 'snapshot', a reconnecting one only what it
+# missed, then every broadcast event carries its version 'v'
+snapshot = Snapshot()
+snapshot.record('robot_state', state.current.as_dict())   # for clients connecting before the first change
+
+connected_clients = 0
 
 # ===== HELPER FUNCTIONS =====
 
 def set_servo_angle(angle):
     """Set servo to specific angle (0-180 degrees)"""
     # Reference: https://randomnerdtutorials.com/raspberry-pi-pico-servo-motor-micropython/
-    angle = max(0, min(180, angle))
-    servo.value = (angle - 90) / 90  # Convert 0-180 to -1 to 1
-    robot_state['servo_angle'] = angle
-    time.sleep(0.05)
+    point_servo(car, angle, servo_model)  # Waits as long as this move needs
+    state.update(servo_angle=car.servo_angle)
 
 def get_distance():
     """Get distance from ultrasonic sensor in cm"""
     try:
-        dist = ultra.distance * 100  # Convert meters to cm
+        with stats.timer('sensor_read'):
+            dist = sonar.ping('front').distance  # cm, waits for a slot of the fixed sensors in the air
+        if dist is None:
+            dist = ultra.last * 100  # the ping failed, keep the previous reading
+        stats.count('sensor_reads')
         return round(dist, 1)
     except:
+        stats.count('sensor_errors.ultrasonic')
         return 0
 
-def speak(text):
-    """Non-blocking text-to-speech"""
-    def _speak():
-        tts_engine.say(text)
-        tts_engine.runAndWait()
-    threading.Thread(target=_speak, daemon=True).start()
+def broadcast(event, data):
+    """Emit to every connected client, counted for /metrics, versioned for the snapshot"""
+    stats.count(f'emits.{event}')
+    if event in Snapshot.EVENTS:
+        data = snapshot.record(event, data)
+    runtime.emit(event, data)
+
+def broadcast_state(old, new, changed):
+    """robot_state to the clients when something they show changed, the sensors go in sensor_update"""
+    broadcast('robot_state', new.as_dict())
+
+state.subscribe(broadcast_state, fields=('mode', 'speed', 'is_moving', 'last_movement', 'hardware'))
+
+def speak(text, priority=STATUS):
+    """Non-blocking text-to-speech, duplicates and stale phrases are dropped"""
+    if speaker is not None:
+        speaker.say(text, priority)
+
+def hardware_ready():
+    """True once every device is up, tells the client to wait otherwise"""
+    if subsystems.ready():
+        return True
+    emit('status', {'message': f"Hardware {subsystems.state()}..."})
+    return False
 
 def calculate_statistics():
-    """Calculate statistics from distance history"""
-    # Reference: https://docs.python.org/3/library/statistics.html
-    if len(distance_history) < 5:
+    """Calculate statistics from the last STATS_WINDOW distance readings"""
+    # Reference: https://numpy.org/doc/stable/reference/routines.statistics.html
+    recent = history.latest('distance', STATS_WINDOW)
+    if len(recent) < 5:
         return None
     
     return {
-        'mean': round(statistics.mean(distance_history), 1),
-        'median': round(statistics.median(distance_history), 1),
-        'min': round(min(distance_history), 1),
-        'max': round(max(distance_history), 1),
-        'stdev': round(statistics.stdev(distance_history), 1) if len(distance_history) > 1 else 0
+        'mean': round(float(np.mean(recent)), 1),
+        'median': round(float(np.median(recent)), 1),
+        'min': round(float(recent.min()), 1),
+        'max': round(float(recent.max()), 1),
+        'stdev': round(float(np.std(recent, ddof=1)), 1)
     }
 
+def query_number(query, name, kind=float, default=None):
+    """Parameter name of a query as kind, ValueError with a fixed message if it is not one"""
+    raw = query.get(name)
+    if raw is None or raw == '':
+        return default
+    try:
+        value = kind(raw)
+        valid = math.isfinite(value) and not (isinstance(raw, float) and value != raw)
+    except (TypeError, ValueError, OverflowError):
+        valid = False
+    if not valid:
+        raise ValueError(f"{name} must be {'an integer' if kind is int else 'a number'}")
+    return value
+
+def history_window(query):
+    """Downsampled history for a /history or 'history' query, ValueError on a bad one"""
+    if not isinstance(query, dict):
+        raise ValueError("the query must be an object")
+    channels = query.get('channels')
+    if isinstance(channels, str):
+        channels = [c for c in channels.split(',') if c]
+    elif channels is not None and not isinstance(channels, list):
+        raise ValueError("channels must be a list or comma-separated names")
+    points = query_number(query, 'points', int, 500)
+    if not 2 <= points <= 5000:
+        raise ValueError("points must be between 2 and 5000")
+    method = query.get('method', 'minmax')
+    if not isinstance(method, str):
+        raise ValueError("method must be a name")
+    return history.window(start=query_number(query, 'start'), end=query_number(query, 'end'),
+                          seconds=query_number(query, 'seconds'), points=points, channels=channels or None,
+                          method=method)
+
 # ===== MOTOR CONTROL =====
 # Reference: https://projects.raspberrypi.org/en/projects/physical-computing/14
 
-def move_robot(direction, speed_percent=50):
+def move_robot(direction, speed_percent=50, source='web', received_at=None):
     """Control robot movement with speed control"""
     speed = speed_percent / 100.0  # Convert to 0.0-1.0 range
+    with stats.timer('actuate'):
+        motors.move(direction, speed, source, received_at)
     
-    if direction == 'forward':
-        robot.forward(speed)
-    elif direction == 'backward':
-        robot.backward(speed)
-    elif direction == 'left':
-        robot.left(speed)
-    elif direction == 'right':
-        robot.right(speed)
-    elif direction == 'stop':
-        robot.stop()
-    
-    robot_state['last_movement'] = direction
-    robot_state['is_moving'] = (direction != 'stop')
-
-# ===== SENSOR MONITORING THREAD =====
+    state.update(last_movement=direction, is_moving=(direction != 'stop'))
+
+def analog_direction(x, y, deadzone=0.1):
+    """Closest of the joystick directions to an analog command, for the dashboard state"""
+    if max(abs(x), abs(y)) < deadzone:
+        return 'stop'
+    if abs(y) >= abs(x):
+        return 'forward' if y > 0 else 'backward'
+    return 'right' if x > 0 else 'left'
+
+def drive_robot(x, y, source='web', received_at=None):
+    """Analog control: y drives (-1 back..1 forward), x turns (-1 left..1 right), scaled by the speed slider"""
+    direction = analog_direction(x, y)
+    if direction == 'stop':
+        move_robot('stop', source=source, received_at=received_at)
+        return
+    scale = state.current.speed / 100.0
+    left = max(-1.0, min(1.0, y + x)) * scale
+    right = max(-1.0, min(1.0, y - x)) * scale
+    with stats.timer('actuate'):
+        motors.drive(left, right, source, received_at)
+    state.update(last_movement=direction, is_moving=True)
+
+# ===== SENSOR MONITORING =====
 
 def sensor_monitor():
-    """Continuously monitor sensors and emit updates"""
-    global running
-    
-    while running:
+    """Continuously monitor sensors and emit updates, a green thread on the event loop"""
+    with supervisor.track('sensors') as token:
+        # Report the hardware state to the dashboard once every subsystem is up
+        runtime.offload(subsystems.wait)
+        state.update(hardware=subsystems.state())
+        if not subsystems.ready():
+            print(f"Hardware failed to start: {subsystems.status()}")
+            return
+        fixed = [name for name in sonar.sonars if name != 'front']
+        if fixed:
+            supervisor.start('sonar', sonar.run, fixed)
+        monitor_sensors(token)
+
+def monitor_sensors(token):
+    """The 10 Hz loop, until shutdown or the 'sensors' task is cancelled"""
+    loop = stats.loop('sensor_loop', cfg.sensor_period)
+    updates = 0
+    next_tick = time.monotonic()
+    while state.current.running and not token.cancelled:
         try:
-            # Read sensors
-            dist = get_distance()
-            ir_l = int(left_ir.value)
-            ir_r = int(right_ir.value)
+            loop.tick()
+            
+            # Read sensors, the ping in the pool, IR from the edge callbacks
+            dist = runtime.offload(get_distance)
+            ir_l, ir_r = car.ir()
+            for event in ir_watch.drain():
+                if event.blocked:
+                    broadcast('status', {'message': f"IR {'left' if event.side == 0 else 'right'} obstacle"})
             
-            # Update state
-            robot_state['ultrasonic_distance'] = dist
-            robot_state['ir_left'] = ir_l
-            robot_state['ir_right'] = ir_r
+            # Update state, the three readings together
+            state.update(ultrasonic_distance=dist, ir_left=ir_l, ir_right=ir_r)
+            servo_angle = state.current.servo_angle
             
-            # Add to history for statistics
-            distance_history.append(dist)
+            # Add to history for statistics and /history
+            history.append({'distance': dist, 'ir_left': ir_l, 'ir_right': ir_r, 'servo_angle': servo_angle})
             
             # Emit sensor data to all connected clients
-            socketio.emit('sensor_update', {
+            broadcast('sensor_update', {
+                't': round(time.time(), 3),
                 'distance': dist,
                 'ir_left': ir_l,
                 'ir_right': ir_r,
-                'servo_angle': robot_state['servo_angle'],
+                'servo_angle': servo_angle,
                 'statistics': calculate_statistics()
             })
             
-            time.sleep(0.1)  # Update rate: 10 Hz
+            # Timing statistics once per second
+            updates += 1
+            if updates % 10 == 0:
+                broadcast('stats', stats.snapshot())
+            
+            # Update rate: 10 Hz by default, the ping's time included
+            next_tick = max(next_tick + config.current.sensor_period, time.monotonic())
+            runtime.sleep(next_tick - time.monotonic())
         except Exception as e:
+            stats.count('sensor_errors.monitor')
             print(f"Sensor monitor error: {e}")
-            time.sleep(0.5)
+            runtime.sleep(0.5)
 
 # ===== AUTONOMOUS MODE =====
 
+# Speeds, distances and timings are in autocar/config.py, calibrations are learned into these files
+TURN_CALIBRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'turn-calibration.json')
+SERVO_CALIBRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'servo-calibration.json')
+
+turn_model = TurnModel(rate=cfg.turn_rate, path=TURN_CALIBRATION)
+car = servo_model = None
+
+def init_navigation():
+    global car, servo_model
+    # Same devices behind the interface used by the shared autocar code
+    car = GpioCar(motors, servo, left_ir, right_ir, get_distance, ir_watch=ir_watch)
+
+    # Servo waits scale with the size of the move, written by servo-settle-benchmark.py
+    servo_model = ServoModel(settle=settle_time, path=SERVO_CALIBRATION)
+
+subsystems.add('navigation', init_navigation, requires=('motors', 'ultrasonic', 'ir', 'servo'))
+
+# Obstacle distance limit computed from the commanded speed instead of a fixed threshold
+stopping = StoppingModel(cfg.max_speed, cfg.braking_distance, cfg.sample_period, cfg.stop_margin)
+
+# IR state and ultrasonic readings of the driving loops and sweeps, one obstacle estimate per sector
+fusion = ObstacleFusion()
+
+def apply_config(old, new, changed):
+    """Tunable values held by objects instead of read from config.current"""
+    stopping.max_speed = new.max_speed
+    stopping.braking_distance = new.braking_distance
+    stopping.sample_period = new.sample_period
+    stopping.margin = new.stop_margin
+    if set(changed) & {'web_input_rate', 'web_keepalive', 'web_input_timeout'}:
+        broadcast('input_config', input_settings(new))
+
+config.on_change(apply_config)
+
+def avoid_obstacle():
+    """Stop, sweep for the clearest direction, reverse and turn toward it"""
+    car.stop()
+    speak("Object detected", ALERT)
+    broadcast('status', {'message': 'Obstacle detected! Scanning...'})
+    
+    # Perform servo sweep
+    speak("Scanning environment", INFO)
+    best_angle, distance_map = sweep_and_find_path()
+    
+    # Return servo to center
+    set_servo_angle(90)
+    
+    # Reverse until there is room, then turn using the learned rotation rate
+    clearance = stopping.threshold(state.current.speed / 100.0) * 1.5
+    reverse_time = config.current.reverse_time
+    reverse(car, 0.5, reverse_time / 2, reverse_time, clearance=clearance)
+    turn(car, turn_model, best_angle, distance_map, 0.5)
+    turn_model.save()
+    fusion.rotate(best_angle - 90)
+    
+    speak("Clear path found", INFO)
+    broadcast('status', {'message': f'Clear path at {best_angle}°'})
+
+def on_autonomous(old, new, changed):
+    """Starts or cancels the autonomous task, the newest state decides if notifications cross"""
+    current = state.current
+    if current.autonomous and current.running:
+        supervisor.start('autonomous', autonomous_mode, policy='replace')
+    else:
+        supervisor.cancel('autonomous', timeout=0)
+
+state.subscribe(on_autonomous, fields=('autonomous', 'running'))
+
 def autonomous_mode():
-    """Autonomous obstacle avoidance logic"""
-    global autonomous_active
+    """Autonomous obstacle avoidance logic, the 'autonomous' task, runs until cancelled"""
+    token = current_task()
+    supervisor.cancel('sweep', timeout=1.0)   # a manual sweep would fight over the servo
     
-    FRONT_THRESHOLD = 25  # cm
-    REVERSE_TIME = 0.4
-    TURN_TIME = 0.55
+    # Reactive navigation only stops and sweeps when boxed in
+    navigator = ReactiveNavigator(car, fallback=avoid_obstacle, stopping=stopping)
+    loop = stats.loop('auto_loop', cfg.auto_period)
+    car.stop()   # clears an IR preempt left from the last autonomous run
+    fusion.clear()
+    driving = None   # (speed, time) of the last forward command, how far the car got goes into fusion
     
-    while autonomous_active:
-        try:
-            dist = get_distance()
-            ir_l = int(left_ir.value)
-            ir_r = int(right_ir.value)
-            
-            # Check for obstacles
-            if ir_l == 0 or ir_r == 0 or dist < FRONT_THRESHOLD:
-                robot.stop()
-                speak("Object detected")
-                socketio.emit('status', {'message': 'Obstacle detected! Scanning...'})
-                
-                # Perform servo sweep
-                speak("Scanning environment")
-                best_angle = sweep_and_find_path()
-                
-                # Return servo to center
-                set_servo_angle(90)
-                
-                # Reverse and turn
-                robot.backward(0.5)
-                time.sleep(REVERSE_TIME)
-                robot.stop()
-                
-                if best_angle < 80:
-                    robot.left(0.5)
-                    time.sleep(TURN_TIME)
-                elif best_angle > 100:
-                    robot.right(0.5)
-                    time.sleep(TURN_TIME)
+    try:
+        while not token.cancelled:
+            try:
+                loop.tick()
+                c = config.current
+                if c.navigation == 'reactive':
+                    navigator.cruise = state.current.speed / 100.0
+                    navigator.fusion = fusion if c.obstacle_fusion else None
+                    with stats.timer('decide'):
+                        clear = navigator.tick()
+                    if not clear:
+                        stats.count('obstacles.boxed_in')
+                    state.update(servo_angle=car.servo_angle)
+                else:
+                    dist = get_distance()
+                    ir_l, ir_r = car.ir()   # debounced, stays 0 from the trip until the sensor is clear
+                    
+                    # Slow down near obstacles, the stopping limit shrinks with the speed
+                    speed = stopping.approach_speed(state.current.speed / 100.0, dist)
+                    
+                    # Check for obstacles, on the fused estimate or on any single reading
+                    if driving is not None:
+                        fusion.advance(driving[0] * stopping.max_speed * (time.monotonic() - driving[1]))
+                        driving = None
+                    if c.obstacle_fusion:
+                        fusion.observe(car.servo_angle, dist, (ir_l, ir_r))
+                        obstacle = fusion.blocked(stopping.threshold(speed))
+                    else:
+                        obstacle = ir_l == 0 or ir_r == 0 or stopping.must_stop(speed, dist)
+                    if obstacle:
+                        stats.count('obstacles.ir' if ir_l == 0 or ir_r == 0 else 'obstacles.ultrasonic')
+                        avoid_obstacle()
+                    else:
+                        # Move forward, ignored after an IR preempt until avoid_obstacle() stops
+                        car.drive(speed, speed)
+                        driving = (speed, time.monotonic())
                 
-                robot.stop()
-                speak("Clear path found")
-                socketio.emit('status', {'message': f'Clear path at {best_angle}°'})
-            else:
-                # Move forward
-                speed = robot_state['speed'] / 100.0
-                robot.forward(speed)
-            
-            time.sleep(0.05)
-        except Exception as e:
-            print(f"Autonomous mode error: {e}")
-            time.sleep(0.5)
+                # raises Cancelled at once when switched to manual, so do car.sleep() calls in a sweep or turn
+                token.sleep(c.auto_period)
+            except Exception as e:
+                print(f"Autonomous mode error: {e}")
+                token.sleep(0.5)
+    finally:
+        # a turn or reverse cut short must not leave the wheels running, unless manual driving took over
+        if motors.last_source == 'auto':
+            car.stop()
 
 def sweep_and_find_path():
-    """Sweep servo 0-180 and find best direction"""
+    """Sweep servo 0-180, returns best direction and all readings"""
     # Reference: https://www.geeksforgeeks.org/python/python-max-function/
     
-    distance_map = {}
-    angles = list(range(0, 181, 10))  # Sweep in 10-degree steps
+    angles = list(range(0, 181, config.current.sweep_step))  # 10-degree steps by default
+    broadcast('sweep_start', {'angles': angles})
     
-    for angle in angles:
-        set_servo_angle(angle)
-        time.sleep(0.1)
-        dist = get_distance()
-        distance_map[angle] = dist
-        
+    def emit_reading(angle, dist):
+        state.update(servo_angle=angle)
+        fusion.observe_distance(angle, dist)
         # Emit sweep data for visualization
-        socketio.emit('sweep_data', {
+        broadcast('sweep_data', {
             'angle': angle,
             'distance': dist
         })
     
+    # Each step waits only as long as the servo needs for that move, then pings
+    with stats.timer('sweep'):
+        distance_map = sweep(car, angles, servo_model, on_reading=emit_reading)
+    stats.count('sweeps')
+    
     # Find angle with maximum distance
     best_angle = max(distance_map, key=distance_map.get)
-    return best_angle
+    return best_angle, distance_map
+
+# ===== BROWSER INPUT =====
+# The dashboard samples its controls (keys, buttons, touch joystick, gamepad) web_input_rate
+# times a second and sends 'drive' only when the command changed; holding it sends a small
+# 'keepalive' every web_keepalive s instead. Every command or keepalive renews a lease: a car
+# driven from the browser stops when neither arrives for web_input_timeout s (tab closed,
+# phone asleep, Wi-Fi gone), instead of driving on until the next 'stop'.
+
+web_input = {'deadline': None,   # monotonic time the current web command expires, None when stopped
+             'command': None}    # (x, y) of the last command, driven again when the speed slider moves
+
+def input_settings(c):
+    """Sampler settings for the browser, keepalives always fit into the timeout"""
+    return {'rate': c.web_input_rate, 'keepalive': min(c.web_keepalive, c.web_input_timeout / 3),
+            'timeout': c.web_input_timeout}
+
+def renew_lease():
+    web_input['deadline'] = time.monotonic() + config.current.web_input_timeout
+
+def input_watchdog():
+    """Stops a car driven from the browser once its commands stop arriving, a green thread"""
+    with supervisor.track('input_watchdog') as token:
+        while state.current.running and not token.cancelled:
+            deadline = web_input['deadline']
+            if deadline is not None and time.monotonic() > deadline:
+                web_input['deadline'] = None
+                if motors.last_source == 'web' and state.current.is_moving:
+                    move_robot('stop')
+                    stats.count('web.lapses')
+                    broadcast('input_lapsed', {})
+            runtime.sleep(config.current.web_input_timeout / 4)
+
+def web_driving():
+    """True while the car moves on a command from the dashboard"""
+    return (state.current.mode == 'manual' and state.current.is_moving and subsystems.ready()
+            and motors.last_source == 'web')
+
+def web_command(x, y, received_at):
+    """Drives from a dashboard command, the clients hear of it only when the direction changed"""
+    stats.count('web.commands')
+    if state.current.mode != 'manual' or not hardware_ready():
+        return
+    drive_robot(x, y, received_at=received_at)
+    web_input['command'] = (x, y)
+    web_input['deadline'] = None
+    if state.current.is_moving:
+        renew_lease()
 
 # ===== FLASK ROUTES =====
 
@@ -249,96 +599,222 @@ def index():
     """Serve the main web interface"""
     return render_template('index.html')
 
+@app.route('/status')
+def status():
+    """Hardware state and init time of every subsystem"""
+    return jsonify(subsystems.status())
+
+@app.route('/stats')
+def timing_stats():
+    """Stage timings, latencies and loop jitter in milliseconds"""
+    return jsonify(stats.snapshot())
+
+@app.route('/config')
+def current_config():
+    """Settings in use, the tunable ones follow the config file"""
+    return jsonify(config.current._asdict())
+
+@app.route('/tasks')
+def task_status():
+    """Running background tasks with their run time, and the last finished ones"""
+    return jsonify(supervisor.status())
+
+@app.route('/obstacles')
+def obstacles():
+    """Fused obstacle estimate per sector for the stopping distance at the current speed"""
+    within = stopping.threshold(state.current.speed / 100.0)
+    return jsonify({'within': round(within, 1), 'blocked': fusion.blocked(within),
+                    'sectors': [e._asdict() for e in fusion.sectors_estimate(within)]})
+
+@app.route('/sonar')
+def sonar_status():
+    """Last reading of every ultrasonic sensor, their slots and effective sample rates in Hz"""
+    if sonar is None:
+        return jsonify({'error': 'ultrasonic not started'}), 503
+    return jsonify({'readings': {name: r._asdict() for name, r in sonar.latest().items()},
+                    'slots': sonar.slots(), 'rates': sonar.rates()})
+
+@app.route('/history')
+def history_route():
+    """Sensor history, ?seconds=300 or ?start=&end= (Unix time), &points=500&channels=distance&method=minmax|lttb"""
+    try:
+        return jsonify(history_window(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics, scraping only reads the counters"""
+    gauges = {
+        'clients': lambda: connected_clients,
+        'hardware_ready': lambda: subsystems.ready(),
+        'autonomous': lambda: state.current.autonomous,
+        'state_version': lambda: state.current.version,
+        'tasks_running': lambda: len(supervisor.tasks),
+        'speech_queue': lambda: speaker.pending,
+        'speech_dropped': lambda: speaker.dropped,
+        'history_samples': lambda: len(history),
+        'snapshot_version': lambda: snapshot.version,
+        'snapshots_full': lambda: snapshot.full_sent,
+        'snapshots_resumed': lambda: snapshot.resumed,
+        'ultrasonic_distance_cm': lambda: state.current.ultrasonic_distance,
+    }
+    return Response(render_metrics(stats, gauges), mimetype='text/plain; version=0.0.4')
+
 # ===== SOCKETIO EVENTS =====
 
 @socketio.on('connect')
-def handle_connect():
-    """Handle client connection"""
+def handle_connect(auth=None):
+    """Handle client connection, sends the full state or, on a reconnect, what the client missed"""
+    global connected_clients
+    connected_clients += 1
     print('Client connected')
-    emit('robot_state', robot_state)
+    auth = auth if isinstance(auth, dict) else {}
+    payload = snapshot.since(auth.get('epoch'), auth.get('version'))
+    # the client says which history it wants, the full window or the part it missed
+    if isinstance(auth.get('history'), dict):
+        try:
+            payload['history'] = history_window(auth['history'])
+        except (TypeError, ValueError):
+            pass
+    emit('snapshot', payload)
+    emit('input_config', input_settings(config.current))
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
+    global connected_clients
+    connected_clients -= 1
     print('Client disconnected')
 
-@socketio.on('set_mode')
-def handle_mode(data):
-    """Switch between manual and autonomous mode"""
-    global autonomous_active
-    
-    mode = data.get('mode', 'manual')
-    robot_state['mode'] = mode
+def set_mode(mode):
+    """Switch between manual and autonomous mode, from the dashboard or the joystick"""
+    # on_autonomous() starts or cancels the task, the clients get robot_state
+    state.update(mode=mode, autonomous=(mode == 'autonomous'))
     
     if mode == 'autonomous':
-        autonomous_active = True
-        threading.Thread(target=autonomous_mode, daemon=True).start()
         speak("Autonomous mode activated")
     else:
-        autonomous_active = False
-        robot.stop()
+        car.stop()
         speak("Manual mode activated")
-    
-    emit('robot_state', robot_state, broadcast=True)
+
+@socketio.on('set_mode')
+def handle_mode(data):
+    """Switch between manual and autonomous mode"""
+    mode = data.get('mode', 'manual')
+    if not hardware_ready():
+        return
+    set_mode(mode)
+
+@socketio.on('drive')
+def handle_drive(data):
+    """Analog command from the dashboard's input sampler, x and y in -1..1"""
+    received_at = time.perf_counter()
+    try:
+        x = max(-1.0, min(1.0, float(data.get('x', 0))))
+        y = max(-1.0, min(1.0, float(data.get('y', 0))))
+    except (TypeError, ValueError):
+        return
+    web_command(x, y, received_at)
+
+@socketio.on('keepalive')
+def handle_keepalive():
+    """The held command is unchanged, keep driving"""
+    stats.count('web.keepalives')
+    if web_input['deadline'] is not None:
+        renew_lease()
+
+DIRECTION_VECTORS = {'forward': (0, 1), 'backward': (0, -1), 'left': (-1, 0), 'right': (1, 0), 'stop': (0, 0)}
 
 @socketio.on('move')
 def handle_move(data):
-    """Handle manual movement commands"""
-    if robot_state['mode'] == 'manual':
-        direction = data.get('direction', 'stop')
-        move_robot(direction, robot_state['speed'])
-        emit('robot_state', robot_state, broadcast=True)
+    """Discrete command ('forward', 'left', ...), same lease as 'drive'"""
+    received_at = time.perf_counter()
+    x, y = DIRECTION_VECTORS.get(data.get('direction'), (0, 0))
+    web_command(x, y, received_at)
+
+@socketio.on('history')
+def handle_history(data):
+    """Same query as /history, answered through the client's acknowledgement callback"""
+    try:
+        return history_window(data or {})
+    except ValueError as e:
+        return {'error': str(e)}
 
 @socketio.on('set_speed')
 def handle_speed(data):
     """Set motor speed (0-100%)"""
     speed = int(data.get('speed', 50))
-    robot_state['speed'] = max(0, min(100, speed))
-    emit('robot_state', robot_state, broadcast=True)
+    changed = state.update(speed=max(0, min(100, speed)))
+    # commands are only sent when they change, so a held direction would keep the old speed
+    if changed and web_input['command'] is not None and web_driving():
+        drive_robot(*web_input['command'])
 
 @socketio.on('set_servo')
 def handle_servo(data):
     """Set servo angle (0-180 degrees)"""
     angle = int(data.get('angle', 90))
-    set_servo_angle(angle)
-    emit('robot_state', robot_state, broadcast=True)
+    if not hardware_ready():
+        return
+    runtime.offload(set_servo_angle, angle)   # waits for the move, the clients see it in the next sensor_update
 
 @socketio.on('servo_sweep')
 def handle_servo_sweep():
     """Perform servo sweep and return data"""
-    speak("Performing servo sweep")
-    threading.Thread(target=sweep_and_find_path, daemon=True).start()
+    if not hardware_ready():
+        return
+    if supervisor.running('autonomous'):
+        emit('status', {'message': 'Autonomous mode is using the servo, switch to manual to sweep'})
+        return
+    if supervisor.start('sweep', sweep_and_find_path) is None:
+        emit('status', {'message': 'Sweep already running'})
+        return
+    speak("Performing servo sweep", INFO)
 
 # ===== MAIN =====
 
-if __name__ == '__main__':
-    print("Starting Flask Robot Control Server...")
-    print("Access at: http://[YOUR_PI_IP]:5000")
+def run_server():
+    """Start the hardware, the sensor loop and the web server, blocks until stopped"""
+    # Bring the hardware up in the background, the server answers meanwhile
+    subsystems.start()
+    config.watch()
+    
+    # Green threads, they run once the server's event loop does
+    runtime.start()
+    
+    # Start sensor monitoring
+    runtime.spawn(sensor_monitor)
     
-    # Start sensor monitoring thread
-    sensor_thread = threading.Thread(target=sensor_monitor, daemon=True)
-    sensor_thread.start()
+    # Stops the car when the browser driving it goes quiet
+    runtime.spawn(input_watchdog)
     
     try:
         # Run Flask-SocketIO server
         # Reference: https://flask-socketio.readthedocs.io/en/latest/
-        socketio.run(app, host='0.0.0.0', port=5000, debug=False)
+        socketio.run(app, host='0.0.0.0', port=cfg.web_port, debug=False)
     except KeyboardInterrupt:
         print("\nShutting down...")
     finally:
-        running = False
-        autonomous_active = False
-        robot.stop()
-        ena.off()
-        enb.off()
+        state.update(running=False, autonomous=False)
+        supervisor.cancel_all(timeout=1.0)
+        runtime.close()
+        if subsystems.ready('motors'):
+            motors.stop()
+            ena.off()
+            enb.off()
         print("Cleanup complete")
 
+if __name__ == '__main__':
+    print("Starting Flask Robot Control Server...")
+    print("Access at: http://[YOUR_PI_IP]:5000")
+    run_server()
+
 """
 References:
 - Flask: https://flask.palletsprojects.com/
 - Flask-SocketIO: https://flask-socketio.readthedocs.io/
 - GPIOZero: https://gpiozero.readthedocs.io/
 - pyttsx3: https://pyttsx3.readthedocs.io/
-- Python Statistics: https://docs.python.org/3/library/statistics.html
+- NumPy statistics: https://numpy.org/doc/stable/reference/routines.statistics.html
 """
 
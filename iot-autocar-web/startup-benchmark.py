@@ -0,0 +1,144 @@
+
+"""
+Measures how long app.py and pi-receiver-mode-switcher.py take until they answer.
+
+Each script is started on gpiozero's mock pins (no Raspberry Pi needed) and polled:
+
+  app.py        time to the first HTTP response, then until /status reports every
+                subsystem ready, plus the init time of each subsystem
+  receiver      time until the TCP port accepts the computer-bridge connection
+
+Run from the repository root:
+
+  python ./iot-autocar-web/startup-benchmark.py
+  python ./iot-autocar-web/startup-benchmark.py --runs 10 --max-first-response 2.0
+
+With --max-first-response the exit code is 1 when the median time to the first
+response is slower, so a regression in start-up time fails the run.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from statistics import median
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+APP = os.path.join(ROOT, 'iot-autocar-web', 'app.py')
+RECEIVER = os.path.join(ROOT, 'raspberry-pi', 'pi-receiver-mode-switcher.py')
+APP_PORT = 5000
+RECEIVER_PORT = 5005
+
+
+def launch(script):
+    env = dict(os.environ, GPIOZERO_PIN_FACTORY='mock', PYTHONUNBUFFERED='1')
+    return subprocess.Popen([sys.executable, script], env=env, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def get_status():
+    with urllib.request.urlopen(f'http://127.0.0.1:{APP_PORT}/status', timeout=0.5) as response:
+        return json.load(response)
+
+
+def measure_app(timeout):
+    start = time.perf_counter()
+    proc = launch(APP)
+    result = {'first_response_s': None, 'ready_s': None, 'subsystems_ms': None}
+    try:
+        while time.perf_counter() - start < timeout and proc.poll() is None:
+            try:
+                status = get_status()
+            except OSError:
+                time.sleep(0.01)
+                continue
+            now = time.perf_counter() - start
+            if result['first_response_s'] is None:
+                result['first_response_s'] = round(now, 3)
+                result['first_state'] = status['state']
+            if status['state'] != 'initializing':
+                result['ready_s'] = round(now, 3)
+                result['state'] = status['state']
+                result['subsystems_ms'] = {name: s['ms'] for name, s in status['subsystems'].items()}
+                break
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return result
+
+
+def measure_receiver(timeout):
+    start = time.perf_counter()
+    proc = launch(RECEIVER)
+    result = {'first_response_s': None}
+    try:
+        while time.perf_counter() - start < timeout and proc.poll() is None:
+            try:
+                with socket.create_connection(('127.0.0.1', RECEIVER_PORT), timeout=0.5):
+                    result['first_response_s'] = round(time.perf_counter() - start, 3)
+                    break
+            except OSError:
+                time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start-up time of app.py and the receiver on mock pins")
+    parser.add_argument('--targets', nargs='+', default=['app', 'receiver'], choices=['app', 'receiver'])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds before a run counts as failed")
+    parser.add_argument('--max-first-response', type=float, help="fail if the median is slower (s)")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    measure = {'app': measure_app, 'receiver': measure_receiver}
+    results = {}
+    failed = False
+    for target in args.targets:
+        runs = [measure[target](args.timeout) for _ in range(args.runs)]
+        first = [r['first_response_s'] for r in runs if r['first_response_s'] is not None]
+        ready = [r['ready_s'] for r in runs if r.get('ready_s') is not None]
+        results[target] = {
+            'runs': runs,
+            'first_response_s': round(median(first), 3) if first else None,
+            'ready_s': round(median(ready), 3) if ready else None,
+        }
+        if args.max_first_response is not None and (not first or median(first) > args.max_first_response):
+            failed = True
+
+    print(f"{'target':<9} {'first response s':>17} {'ready s':>8}")
+    for target, r in results.items():
+        print(f"{target:<9} {r['first_response_s']!s:>17} {r['ready_s'] if r['ready_s'] is not None else '-':>8}")
+    if 'app' in results and results['app']['runs'][-1].get('subsystems_ms'):
+        print("\napp.py subsystem init (ms, last run):")
+        for name, ms in results['app']['runs'][-1]['subsystems_ms'].items():
+            print(f"  {name:<11} {ms if ms is not None else '-'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        print(f"\nslower than --max-first-response {args.max_first_response} s")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
+
+
+"""
+
+Reference:
+    Mock pins: https://gpiozero.readthedocs.io/en/stable/api_pins.html#mock-pins
+    urllib.request: https://docs.python.org/3/library/urllib.request.html
+
+"""
@@ -0,0 +1,123 @@
+"""
+Joystick and web dashboard in one process.
+
+pi-receiver-mode-switcher.py (joystick) and app.py (browser) both claim the same GPIO
+pins, so only one could run at a time. This runs app.py's dashboard and, next to it,
+the joystick listener computer-bridge.py connects to:
+
+  - TCP port 5005 (what computer-bridge.py uses) and UDP port 5006, same frames
+  - one set of devices, one sensor thread and one MotorOwner for both inputs
+  - the joystick's double-press switches modes exactly like the dashboard's button,
+    and the browser shows live telemetry while the joystick drives
+
+Joystick commands are sent only when the stick direction changes, so a centred stick
+does not keep overriding buttons pressed in the browser; the last command wins.
+
+Run this on Raspberry Pi instead of app.py or the receiver:  python3 unified-runtime.py
+Timing statistics are at http://[YOUR_PI_IP]:5000/stats. Measure latency with both
+interfaces busy (works on mock pins too):
+
+  python3 unified-runtime.py --bench 20
+"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+import urllib.request
+
+import app as web   # building nothing at import, the hardware starts in web.run_server()
+
+# Shared autocar package, app.py has put the repository root on sys.path
+from autocar.config import cli_parser
+from autocar.joystick import JoystickListener, get_movement
+
+# Settings are app.py's (web.config): joystick_speed, sw_debounce and deadzone follow the
+# config file while running, port (TCP) and udp_port are read once.
+
+joystick_state = {'movement': 'stop', 'last_switch': 0.0}
+
+
+def on_frame(joystick, sent_at):
+    """Called on the joystick thread for every frame"""
+    if not web.subsystems.ready():
+        return
+
+    # mode switching (double-press on the joystick sends SW:1)
+    c = web.config.current
+    now = time.monotonic()
+    if joystick.get('SW', 0) == 1 and now - joystick_state['last_switch'] > c.sw_debounce:
+        joystick_state['last_switch'] = now
+        web.set_mode('manual' if web.state.current.mode == 'autonomous' else 'autonomous')
+        joystick_state['movement'] = 'stop'
+        return
+
+    if web.state.current.mode != 'manual':
+        return
+
+    movement = get_movement(joystick['X'], joystick['Y'], c.deadzone)
+    if movement != joystick_state['movement']:
+        joystick_state['movement'] = movement
+        web.move_robot(movement, c.joystick_speed, source='joystick', received_at=sent_at)
+
+
+def bench(seconds, rate=50):
+    """Drives with a fake joystick while a fake dashboard polls, then prints the latencies"""
+    web.subsystems.wait()
+    time.sleep(0.5)
+    stop_at = time.monotonic() + seconds
+
+    def dashboard():
+        while time.monotonic() < stop_at:
+            for path in ('/', '/status'):
+                try:
+                    urllib.request.urlopen(f'http://127.0.0.1:{web.cfg.web_port}{path}', timeout=1).read()
+                except OSError:
+                    pass
+            time.sleep(0.1)
+
+    threading.Thread(target=dashboard, daemon=True).start()
+
+    with socket.create_connection(('127.0.0.1', web.cfg.port)) as sock:
+        i = 0
+        while time.monotonic() < stop_at:
+            y = 900 if (i // 10) % 2 else 512   # forward / stop every 0.2 s
+            sock.sendall(f"X:512|Y:{y}|SW:0|T:{int(time.monotonic() * 1000)}\n".encode())
+            i += 1
+            time.sleep(1 / rate)
+
+    histograms = web.stats.snapshot()['histograms_ms']
+    print()
+    for name in ('joystick_to_motor', 'joystick.transit', 'actuate', 'sensor_read', 'sensor_loop.period', 'sensor_loop.jitter'):
+        print(f"{name + ' (ms):':<26} {histograms.get(name)}")
+    os._exit(0)
+
+
+def main():
+    # the settings' flags are listed in --help, app.py has already read them
+    parser = argparse.ArgumentParser(description="Joystick listener and web dashboard in one process",
+                                     parents=[cli_parser()])
+    parser.add_argument('--bench', type=float, help="measure latency for this many seconds, then exit")
+    args = parser.parse_args()
+
+    cfg = web.cfg
+    print("Starting joystick listener and Flask Robot Control Server...")
+    print(f"Joystick on TCP {cfg.port} / UDP {cfg.udp_port}, dashboard at http://[YOUR_PI_IP]:{cfg.web_port}")
+    JoystickListener(on_frame, tcp_port=cfg.port, udp_port=cfg.udp_port, stats=web.stats).start()
+    if args.bench:
+        threading.Thread(target=bench, args=(args.bench,), daemon=True).start()
+    web.run_server()
+
+
+if __name__ == '__main__':
+    main()
+
+
+"""
+
+Reference:
+    asyncio streams: https://docs.python.org/3/library/asyncio-stream.html
+    Flask-SocketIO: https://flask-socketio.readthedocs.io/
+
+"""
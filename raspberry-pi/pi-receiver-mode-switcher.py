@@ -13,75 +13,191 @@ The order of running the code:
       
 """
 
+import os
+import sys
 import socket
-from gpiozero import Robot, OutputDevice, LineSensor, DistanceSensor, Servo
+from gpiozero import Robot, OutputDevice, LineSensor, Servo
 from time import sleep
 import time
 
+# shared autocar package lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from autocar.braking import StoppingModel
+from autocar.car import GpioCar
+from autocar.config import LiveConfig
+from autocar.fusion import ObstacleFusion
+from autocar.hardware import select_pin_factory, servo_settle
+from autocar.infrared import IrWatch
+from autocar.instrument import FrameClock, Instruments, serve_http
+from autocar.joystick import get_movement, parse_frame
+from autocar.lifecycle import Subsystems
+from autocar.navigation import ReactiveNavigator, sweep
+from autocar.servo import ServoModel, point_servo
+from autocar.sonar import Sonar, SonarArray, fixed_mounts
+from autocar.tasks import Supervisor
+from autocar.turning import TurnModel, reverse, turn
+from autocar.ultrasonic import Ultrasonic
+
 
 # --------- AUTONOMOUS MODE SETUP --------- #
 
+# Every device is created by an init function below. The functions run in parallel in the
+# background (subsystems.start()) while the TCP listener already waits for the computer.
+subsystems = Subsystems()
+
+# stage timings, joystick-to-motor latency and loop jitter, served as JSON on stats_port
+stats = Instruments()
+
+# background work (the extra ultrasonic sensors' sampler) runs as named tasks, listed at /tasks
+supervisor = Supervisor(stats)
+
+# Pins, ports and driving parameters come from autocar/config.py (autocar-config.json,
+# AUTOCAR_* environment variables or --flags, see `python -m autocar.config`).
+# cfg is read once at start-up; the loop reads config.current, which follows the file.
+# The loop runs every 0.12 s (loop delay + recv timeout), where reactive navigation collides
+# more than stop-and-sweep in the simulator (SCRIPT_NAVIGATION in autocar/simulator.py)
+config = LiveConfig(defaults={'sample_period': 0.12, 'navigation': 'sweep'})
+cfg = config.current
+
+# ---- GPIO backend ----
+# pin_factory none picks the best available: pigpio, lgpio, rpigpio, native, then mock pins
+pin_factory = settle_time = None
+
+def init_gpio():
+    global pin_factory, settle_time
+    # must happen before any gpiozero device is created
+    pin_factory = select_pin_factory(cfg.pin_factory)
+    settle_time = servo_settle(pin_factory, cfg.servo_settle)
+    print(f"GPIO backend: {pin_factory} (servo settle {settle_time * 1000:.0f} ms)")
+
+subsystems.add('gpio', init_gpio)
+
 # ---- L298N and DC hobby motor Setup ---- 
-# Enable pins (must be HIGH to allow L298N to drive motors)
-ena = OutputDevice(12)   # ENA
-enb = OutputDevice(13)   # ENB
-ena.on()
-enb.on()
+ena = enb = robot = None
+
+def init_motors():
+    global ena, enb, robot
+    # Enable pins (must be HIGH to allow L298N to drive motors)
+    ena = OutputDevice(cfg.motor_enable[0])   # ENA
+    enb = OutputDevice(cfg.motor_enable[1])   # ENB
+    ena.on()
+    enb.on()
 
-# L298N input pins: left=(IN1, IN2), right=(IN3, IN4)
-robot = Robot(left=(7, 8), right=(9, 10))
+    # L298N input pins: left=(IN1, IN2), right=(IN3, IN4)
+    robot = Robot(left=cfg.motor_left, right=cfg.motor_right)
+
+subsystems.add('motors', init_motors, requires=('gpio',))
 
 # ---- HC-SR04 Ultrasonic sensor ---- 
-ultra = None  # not created yet
+ultra = sonar = None  # not created until the first reading (lazy), unless there are fixed sensors to sample
+
+def on_sonar_reading(reading):
+    # the fixed sensors' readings go into the obstacle estimate, the servo's come from the driving loop
+    if reading.name != 'front':
+        fusion.observe_distance(reading.angle, reading.distance, reading.time)
+
+def init_ultrasonic():
+    global ultra, sonar
+    ultra = Ultrasonic(echo=cfg.ultrasonic_echo, trigger=cfg.ultrasonic_trigger)   # pings on demand, see autocar/ultrasonic.py
+    # more sensors at fixed angles (sonar_fixed) ping in interleaved slots, see autocar/sonar.py
+    sonars = [Sonar('front', ultra, None)]
+    for echo, trigger, angle in fixed_mounts(cfg.sonar_fixed):
+        sonars.append(Sonar(f'sonar{angle}', Ultrasonic(echo=echo, trigger=trigger), angle))
+    sonar = SonarArray(sonars, servo_angle=lambda: car.servo_angle if car is not None else 90,
+                       separation=cfg.sonar_separation, guard=cfg.sonar_guard,
+                       on_reading=on_sonar_reading, instruments=stats)
+    sleep(0.2)  # allowing sensor to stabilize
+    fixed = [name for name in sonar.sonars if name != 'front']
+    if fixed:
+        # the fixed sensors are sampled back to back into the obstacle estimate, cancelled on exit
+        supervisor.start('sonar', sonar.run, fixed)
+
+subsystems.add('ultrasonic', init_ultrasonic, requires=('gpio',), lazy=not cfg.sonar_fixed)
 
 def get_distance():
-    global ultra
-    if ultra is None:
-        ultra = DistanceSensor(echo=26, trigger=16)
-        sleep(0.2)  # allowing sensor to stabilize
-    
-    return ultra.distance * 100
+    subsystems.get('ultrasonic')
+    with stats.timer('sensor_read'):
+        dist = sonar.ping('front').distance
+    return ultra.last * 100 if dist is None else dist
 
 
 # ---- IR sensor Setup (MH Infrared Obstacle Sensor Module) ---- 
-left_ir = LineSensor(17)    # IR left
-right_ir = LineSensor(27)   # IR right
+left_ir = right_ir = ir_watch = None
+
+def on_ir_trip(event):
+    """gpiozero callback thread: stop at once, even in the middle of a turn (only autonomous mode drives the car)"""
+    if car is not None and car.preempt():
+        stats.record('ir_to_stop', time.monotonic() - event.time)
+
+def init_ir():
+    global left_ir, right_ir, ir_watch
+    left_ir = LineSensor(cfg.ir_left)
+    right_ir = LineSensor(cfg.ir_right)
+    # edge callbacks instead of reading the pins once per loop, see autocar/infrared.py
+    ir_watch = IrWatch(left_ir, right_ir, on_trip=on_ir_trip)
+
+subsystems.add('ir', init_ir, requires=('gpio',))
 
 # ---- Servo SG90 ----
-servo = Servo(19)  # PWM pin (19, 12, 13, or 18)
+servo = None
 
-# Helper function convert servo.value (-1..1) to degrees (0..180)
+def init_servo():
+    global servo
+    servo = Servo(cfg.servo_pin)  # PWM pin (19, 12, 13, or 18)
+
+subsystems.add('servo', init_servo, requires=('gpio',))
+
+# Helper function to point the servo in degrees (0..180), waits as long as the move needs
 def set_servo_deg(deg):
-    deg = max(0, min(180, deg))
-    servo.value = (deg - 90) / 90   # maps 0..180 -> -1..1
-    sleep(0.03)  # settling time
+    point_servo(car, deg, servo_model)
 
 
 # ---- configurations ----
-FRONT_THRESHOLD = 25     # in cm obstacle distance limit
-REVERSE_TIME = 0.4       # time to move back and create some space 
-TURN_TIME = 0.55         # time to rotate toward chosen direction
+# speeds, distances and timings are in autocar/config.py, calibrations are learned into these files
+TURN_CALIBRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'turn-calibration.json')
+SERVO_CALIBRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'servo-calibration.json')
+
+turn_model = TurnModel(rate=cfg.turn_rate, path=TURN_CALIBRATION)
+car = servo_model = navigator = None
+
+# Obstacle distance limit grows with speed instead of a fixed FRONT_THRESHOLD
+stopping = StoppingModel(cfg.max_speed, cfg.braking_distance, cfg.sample_period, cfg.stop_margin)
+
+# IR state and ultrasonic readings of the driving loop and sweeps, one obstacle estimate per sector
+fusion = ObstacleFusion()
+
+def apply_config(old, new, changed):
+    """Tunable values held by objects instead of read from config.current"""
+    stopping.max_speed = new.max_speed
+    stopping.braking_distance = new.braking_distance
+    stopping.sample_period = new.sample_period
+    stopping.margin = new.stop_margin
+    if navigator is not None:
+        navigator.cruise = new.forward_speed
+        navigator.fusion = fusion if new.obstacle_fusion else None
+
+config.on_change(apply_config)
 
 
 def sweep_environment():
     
-    """Sweeps servo 90 -> 0 -> 180 -> 90, takes unique distance readings, returns best angle"""
+    """Sweeps servo 90 -> 0 -> 180 -> 90, takes unique distance readings, returns best angle and all readings"""
 
     print("\n--- Performing 180 degree sweep ---")
 
-    ANGLES_TO_SCAN = list(range(90, -1, -5)) + \
-                     list(range(0, 181, 5)) + \
-                     list(range(180, 89, -5))
+    step = config.current.sweep_step
+    ANGLES_TO_SCAN = list(range(90, -1, -step)) + \
+                     list(range(0, 181, step)) + \
+                     list(range(180, 89, -step))
 
-    distance_map = {}
+    def show(angle, dist_cm):
+        print(f"Angle {angle} -> {dist_cm:.1f} cm")
+        fusion.observe_distance(angle, dist_cm)
 
-    for angle in ANGLES_TO_SCAN:
-        if angle not in distance_map:   # avoid duplicates
-            set_servo_deg(angle)
-            sleep(0.05)
-            dist_cm = ultra.distance * 100 # distance in cm
-            distance_map[angle] = dist_cm
-            print(f"Angle {angle} -> {dist_cm:.1f} cm")
+    # each step waits only as long as the servo needs for that move, then pings
+    start = time.monotonic()
+    distance_map = sweep(car, ANGLES_TO_SCAN, servo_model, on_reading=show)
+    print(f"Sweep took {time.monotonic() - start:.2f} s")
 
     # Find angle with maximum distance
     best_angle = max(distance_map, key=lambda a: distance_map[a])
@@ -89,160 +205,223 @@ def sweep_environment():
 
     print(f"\n>> Best direction: {best_angle} degree, ({best_distance:.1f} cm)")
 
-    return best_angle
+    return best_angle, distance_map
 
 
-def reverse_and_turn(best_angle):
+def reverse_and_turn(best_angle, distance_map):
     
-    """Reverse slightly and turn robot toward the chosen direction"""
+    """Reverse until there is some space and turn robot toward the chosen direction"""
 
     print("\nReversing...")
-    robot.backward()
-    sleep(REVERSE_TIME)
-    robot.stop()
+    c = config.current
+    reverse(car, 1.0, c.reverse_time / 2, c.reverse_time, clearance=stopping.threshold(c.forward_speed) * 1.5)
     sleep(0.1)
 
     if best_angle < 80:
         print("Turning LEFT")
-        robot.left()
     elif best_angle > 100:
         print("Turning RIGHT")
-        robot.right()
     else:
         print("Forward direction is clear")
         return
 
-    sleep(TURN_TIME)
-    robot.stop()
+    # turn time comes from the learned rotation rate, corrected by the ultrasonic during the turn
+    turned = turn(car, turn_model, best_angle, distance_map, 1.0)
+    print(f"Turned for {turned:.2f} s, rotation rate estimate {turn_model.rate:.0f} deg/s")
+    turn_model.save()
+    fusion.rotate(best_angle - 90)
     sleep(0.1)
 
 
+def avoid_obstacle():
 
-# ------ MANUAL REMOTE CONTROL SETUP ------ #
+    """Full stop-and-sweep: find the clearest direction, reverse and turn toward it"""
 
-# Joystick deadzone, basically ignoring small deviations near 512
-DEADZONE = 100
+    best_angle, distance_map = sweep_environment()
+    set_servo_deg(90)
+    reverse_and_turn(best_angle, distance_map)
+
+
+def init_navigation():
+    global car, servo_model, navigator
+    # Same devices behind the interface used by the shared autocar code
+    car = GpioCar(robot, servo, left_ir, right_ir, get_distance, ir_watch=ir_watch)
+
+    # Servo waits scale with the size of the move, written by servo-settle-benchmark.py
+    servo_model = ServoModel(settle=settle_time, path=SERVO_CALIBRATION)
+
+    # Continuous navigation, only falls back to avoid_obstacle() when boxed in
+    navigator = ReactiveNavigator(car, fallback=avoid_obstacle, cruise=config.current.forward_speed, stopping=stopping,
+                                  fusion=fusion if config.current.obstacle_fusion else None)
+
+subsystems.add('navigation', init_navigation, requires=('motors', 'ir', 'servo'))
+
+
+
+# ------ MANUAL REMOTE CONTROL SETUP ------ #
 
 # ---- TCP setup ----
 HOST = ''  # listen on all interfaces
-PORT = 5005
+
+# hardware comes up in the background while waiting for the computer to connect
+subsystems.start()
+serve_http(stats, cfg.stats_port, routes={'/tasks': supervisor.status})  # curl http://localhost:5010/stats on the Pi
+config.watch()
 
 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-sock.bind((HOST, PORT))
+sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+sock.bind((HOST, cfg.port))
 sock.listen(1)
 print("Waiting for connection...")
 
 conn, addr = sock.accept()
 print(f"Connected by {addr}")
 
+if not subsystems.wait():
+    print(f"Hardware failed to start: {subsystems.status()}")
+    conn.close()
+    sock.close()
+    sys.exit(1)
+
 joystick = {'X': 0, 'Y': 0, 'SW': 0}  # dictionary to store joystick state
+frame_clock = FrameClock()  # transit time from the T: stamp computer-bridge.py adds
+frame_sent_at = None        # when the newest frame not yet acted on left the computer
 
 def parse_data(data_str):
     """Parse incoming string into dictionary"""
-    try:
-        parts = data_str.split('|')
-        for part in parts:
-            key, val = part.split(':')
-            joystick[key] = int(val)
-    except Exception as e:
-        print("Error parsing:", data_str, e)
-
-
-def get_movement(x, y):
-    x_centered = x - 512
-    y_centered = y - 512
-
-    if abs(x_centered) < DEADZONE and abs(y_centered) < DEADZONE:
-        return 'stop'
-    if y_centered > DEADZONE:
-        return 'forward'
-    elif y_centered < -DEADZONE:
-        return 'backward'
-    elif x_centered > DEADZONE:
-        return 'right'
-    elif x_centered < -DEADZONE:
-        return 'left'
-    else:
-        return 'stop'
+    if not parse_frame(data_str, joystick):
+        print("Error parsing:", data_str)
+
+# get_movement(x, y) comes from autocar/joystick.py, shared with unified-runtime.py
 
 
 # --- Mode Switching Logic configs ---
 mode = "manual"  # start in manual mode by default
 last_switch_time = 0
-SW_DEBOUNCE = 0.5  # seconds
+driving = None   # (speed, time) of the last forward command in stop-and-sweep, how far the car got goes into fusion
 
 
 # ------ MAIN LOGIC LOOP ------
 
 # Make socket non-blocking via timeout
-conn.settimeout(0.1)  # 100 milliseconds timeout
+conn.settimeout(cfg.recv_timeout)  # 100 milliseconds by default
+loop = stats.loop('control_loop', cfg.loop_period)
 
 try:
     while True:
+        loop.tick()
+        c = config.current  # one consistent set of tunable values per pass
+
         # --- Try to receive any joystick data (non-blocking) ---
         try:
-            data = conn.recv(1024)
+            with stats.timer('recv'):
+                data = conn.recv(1024)
+            received_at = time.perf_counter()
             if data:
-                lines = data.decode('utf-8').strip().split('\n')
-                for line in lines:
-                    parse_data(line)
+                with stats.timer('parse'):
+                    lines = data.decode('utf-8').strip().split('\n')
+                    for line in lines:
+                        parse_data(line)
+                        if 'T' in joystick:
+                            transit = frame_clock.transit(joystick.pop('T'), received_at)
+                            stats.record('joystick.transit', transit)
+                            frame_sent_at = received_at - transit
+                        else:
+                            frame_sent_at = received_at
+                stats.count('joystick.frames', len(lines))
         except OSError:
             # timeout or no data then continue
             pass
 
         # --- Mode switching (check joystick SW regardless of mode) ---
         current_time = time.time()
-        if joystick.get('SW', 0) == 1 and (current_time - last_switch_time) > SW_DEBOUNCE:
+        if joystick.get('SW', 0) == 1 and (current_time - last_switch_time) > c.sw_debounce:
             last_switch_time = current_time
             if mode == "manual":
                 mode = "auto"
                 print("\n>>> Switching to AUTONOMOUS mode")
+                navigator.reset()
+                fusion.clear()
+                driving = None
             else:
                 mode = "manual"
                 print("\n>>> Switching to MANUAL mode")
-            robot.stop()
+            car.stop()   # also clears an IR preempt
             sleep(0.5)
 
+        # --- IR edges since the last pass, the trips already stopped the car ---
+        for event in ir_watch.drain():
+            stats.count('ir.trips' if event.blocked else 'ir.releases')
+            if mode == "auto":
+                side = "left" if event.side == 0 else "right"
+                print(f"IR {side} {'blocked' if event.blocked else 'clear'} (L={event.state[0]}, R={event.state[1]})")
+
         # --- Behavior depending on mode ---
         if mode == "manual":
             # joystick values were updated above (non-blocking)
-            movement = get_movement(joystick['X'], joystick['Y'])
-            if movement == 'forward':
-                robot.forward(0.5)
-            elif movement == 'backward':
-                robot.backward(0.5)
-            elif movement == 'left':
-                robot.left(0.5)
-            elif movement == 'right':
-                robot.right(0.5)
-            else:
-                robot.stop()
-
-        else:  # mode == "auto"
+            with stats.timer('decide'):
+                movement = get_movement(joystick['X'], joystick['Y'], c.deadzone)
+            speed = c.joystick_speed / 100
+            with stats.timer('actuate'):
+                if movement == 'forward':
+                    robot.forward(speed)
+                elif movement == 'backward':
+                    robot.backward(speed)
+                elif movement == 'left':
+                    robot.left(speed)
+                elif movement == 'right':
+                    robot.right(speed)
+                else:
+                    robot.stop()
+            if frame_sent_at is not None:
+                stats.record('joystick_to_motor', time.perf_counter() - frame_sent_at)
+                frame_sent_at = None
+
+        elif c.navigation == 'reactive':  # mode == "auto"
+            with stats.timer('auto_tick'):
+                boxed_in = not navigator.tick()
+            if boxed_in:
+                print("Boxed in, performed full sweep")
+
+        else:  # mode == "auto", stop-and-sweep
 
             front_dist = get_distance()
-            ir_left = int(left_ir.value)
-            ir_right = int(right_ir.value)
+            ir_left, ir_right = car.ir()   # debounced, stays 0 from the trip until the sensor is clear
+
+            # slow down progressively when something is ahead, the limit shrinks with the speed
+            speed = stopping.approach_speed(c.forward_speed, front_dist)
+            threshold = stopping.threshold(speed)
 
-            print(f"IR L={ir_left}, R={ir_right}, Dist={front_dist:.1f} cm")
+            print(f"IR L={ir_left}, R={ir_right}, Dist={front_dist:.1f} cm, Speed={speed:.2f}, Limit={threshold:.1f} cm")
+
+            # on the fused estimate of everything seen lately, or on any single reading
+            if driving is not None:
+                fusion.advance(driving[0] * stopping.max_speed * (time.monotonic() - driving[1]))
+                driving = None
+            if c.obstacle_fusion:
+                fusion.observe(car.servo_angle, front_dist, (ir_left, ir_right))
+                obstacle = fusion.blocked(threshold)
+            else:
+                obstacle = ir_left == 0 or ir_right == 0 or front_dist < threshold
 
-            if ir_left == 0 or ir_right == 0 or front_dist < FRONT_THRESHOLD:
+            if obstacle:
                 print("\nObstacle detected! Stopping.")
-                robot.stop()
+                car.stop()
                 sleep(0.1)
 
-                best_angle = sweep_environment()
-                set_servo_deg(90)
-                reverse_and_turn(best_angle)
+                avoid_obstacle()
             else:
-                robot.forward(0.5)
+                car.drive(speed, speed)   # ignored after an IR preempt until the stop above
+                driving = (speed, time.monotonic())
 
         # small loop delay
-        sleep(0.02)
+        sleep(c.loop_period)
 finally:
     print("Program stopped.")
+    supervisor.cancel_all(timeout=1.0)
     conn.close()
     sock.close()
+    ir_watch.close()
     robot.close()
     ena.off()
     enb.off()
@@ -269,6 +448,7 @@ L298N + IR logic:
 
 DistanceSensor (HC-SR04) logic:
     Code adapted from https://gpiozero.readthedocs.io/en/stable/api_input.html#distancesensor-hc-sr04
+    Read on demand instead of DistanceSensor's background sampling (autocar/ultrasonic.py)
 
 HW-504 2-Axis joystick:
     Code adapted from https://lastminuteengineers.com/joystick-interfacing-arduino-processing/
@@ -0,0 +1,178 @@
+
+"""
+Measures how long the servo needs per move under each GPIO backend (pin factory) and
+writes the servo-calibration.json used by autocar/servo.py.
+
+Run on the Raspberry Pi with the car standing still in front of a fixed scene:
+
+  python ./raspberry-pi/servo-settle-benchmark.py
+  python ./raspberry-pi/servo-settle-benchmark.py --factories pigpio \
+      --save raspberry-pi/servo-calibration.json iot-autocar-web/servo-calibration.json
+
+For each backend it:
+  1. times servo.value writes (cost of one move command),
+  2. takes a reference reading at every angle with the servo at rest,
+  3. for every move size in --moves, moves onto each angle from that far away, pings
+     after every delay in --delays and compares with the reference. The shortest
+     delay whose mean error stays below --tolerance is what that move size needs,
+  4. fits delay = slew * degrees + settle through those points.
+
+The HC-SR04 is pinged on demand (autocar/ultrasonic.py), so the delay is exactly the
+time between the servo command and the measurement. On a computer without GPIO
+only the write cost is measured on mock pins.
+
+For pigpio, start the daemon first: sudo pigpiod
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from statistics import linear_regression, mean
+
+from gpiozero import Device, Servo
+
+# shared autocar package lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from autocar.hardware import PREFERRED_FACTORIES, make_pin_factory
+from autocar.servo import ServoModel
+from autocar.ultrasonic import Ultrasonic
+
+
+SERVO_PIN = 19
+TRIGGER_PIN = 16
+ECHO_PIN = 26
+REST = 0.5           # seconds that surely let the servo come to rest
+TRIGGER_LEAD = 0.01  # moves that do not ping wait this much longer than the measured delay
+
+
+def set_deg(servo, deg):
+    servo.value = (deg - 90) / 90
+
+
+def write_cost(servo, writes=500):
+    """Average seconds for one servo.value assignment"""
+    start = time.perf_counter()
+    for i in range(writes):
+        set_deg(servo, 80 + (i % 2) * 20)
+    return (time.perf_counter() - start) / writes
+
+
+def reference(servo, ultra, angles):
+    """Distances in cm per angle with the servo at rest"""
+    readings = {}
+    for angle in angles:
+        set_deg(servo, angle)
+        time.sleep(REST)
+        readings[angle] = ultra.distance * 100
+    return readings
+
+
+def move_error(servo, ultra, angles, ref, move, delay, repeats):
+    """Mean error in cm of a ping taken delay seconds after moving move degrees onto each angle"""
+    errors = []
+    for _ in range(repeats):
+        for angle in angles:
+            start = angle - move if angle - move >= 0 else angle + move
+            if start > 180:
+                continue
+            set_deg(servo, start)
+            time.sleep(REST)
+            set_deg(servo, angle)
+            time.sleep(delay)
+            errors.append(abs(ultra.distance * 100 - ref[angle]))
+    return mean(errors) if errors else None
+
+
+def benchmark(factory_name, angles, moves, delays, repeats, tolerance):
+    Device.pin_factory = make_pin_factory(factory_name)
+    servo = Servo(SERVO_PIN)
+    result = {'factory': factory_name, 'write_us': round(write_cost(servo) * 1e6, 1)}
+
+    if factory_name != 'mock':
+        ultra = Ultrasonic(echo=ECHO_PIN, trigger=TRIGGER_PIN)
+        ref = reference(servo, ultra, angles)
+
+        needed = {}
+        for move in moves:
+            for delay in sorted(delays):
+                error = move_error(servo, ultra, angles, ref, move, delay, repeats)
+                print(f"  {factory_name:<8} move {move:3d} deg, ping after {delay * 1000:4.0f} ms "
+                      f"-> mean error {error:5.2f} cm")
+                if error <= tolerance:
+                    needed[move] = delay
+                    break
+        result['needed_s'] = needed
+
+        if len(needed) >= 2:
+            slew, intercept = linear_regression(list(needed), list(needed.values()))
+            model = ServoModel(slew=max(0.0, slew), settle=max(0.0, intercept) + TRIGGER_LEAD,
+                               trigger_lead=TRIGGER_LEAD)
+            result['slew'] = round(model.slew, 5)
+            result['settle'] = round(model.settle, 4)
+            result['trigger_lead'] = model.trigger_lead
+            result['sweep_time_s'] = round(model.sweep_time(angles, start=angles[0]), 2)
+        ultra.close()
+
+    servo.close()
+    Device.pin_factory.close()
+    Device.pin_factory = None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servo move timing per GPIO backend")
+    parser.add_argument('--factories', nargs='+', default=list(PREFERRED_FACTORIES) + ['mock'])
+    parser.add_argument('--moves', nargs='+', type=int, default=[10, 30, 90, 180], help="move sizes in degrees")
+    parser.add_argument('--delays', nargs='+', type=float,
+                        default=[0.0, 0.02, 0.04, 0.06, 0.08, 0.12, 0.18, 0.25, 0.35, 0.5])
+    parser.add_argument('--step', type=int, default=30, help="degrees between measured angles")
+    parser.add_argument('--repeats', type=int, default=2)
+    parser.add_argument('--tolerance', type=float, default=2.0, help="cm of mean error accepted")
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--save', nargs='+', help="write the first fitted model to these calibration files")
+    args = parser.parse_args()
+
+    angles = list(range(0, 181, args.step))
+    results = []
+    for name in args.factories:
+        try:
+            results.append(benchmark(name, angles, args.moves, args.delays, args.repeats, args.tolerance))
+        except Exception as e:
+            print(f"[skip] {name}: {e}")
+            Device.pin_factory = None
+
+    print(f"\n{'backend':<8} {'write us':>9} {'ms/deg':>7} {'settle ms':>10} {'sweep s':>8}")
+    for r in results:
+        slew = f"{r['slew'] * 1000:.2f}" if 'slew' in r else '-'
+        settle = f"{r['settle'] * 1000:.0f}" if 'settle' in r else '-'
+        print(f"{r['factory']:<8} {r['write_us']:>9} {slew:>7} {settle:>10} {r.get('sweep_time_s', '-')!s:>8}")
+
+    if args.save:
+        fitted = [r for r in results if 'slew' in r]
+        if fitted:
+            model = ServoModel(fitted[0]['slew'], fitted[0]['settle'], fitted[0]['trigger_lead'])
+            for path in args.save:
+                model.save(path)
+                print(f"{fitted[0]['factory']} calibration written to {path}")
+        else:
+            print("no backend could be calibrated, nothing saved")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
+
+
+"""
+
+Reference:
+    Pin factories: https://gpiozero.readthedocs.io/en/stable/api_pins.html#changing-the-pin-factory
+    SG90 datasheet (operating speed 0.1 s/60 degrees): http://www.ee.ic.ac.uk/pcheung/teaching/DE1_EE/stores/sg90_datasheet.pdf
+    Least squares line fit: https://docs.python.org/3/library/statistics.html#statistics.linear_regression
+
+"""
@@ -0,0 +1,58 @@
+"""
+app.py's apply_config on a LiveConfig reload: tunables held by objects are updated and
+the browsers get the new input settings.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'iot-autocar-web'))
+
+import app  # noqa: E402
+from autocar.config import LiveConfig  # noqa: E402
+
+
+@pytest.fixture
+def reload(tmp_path, monkeypatch):
+    """Writes a config file, returns (LiveConfig calling apply_config, writer, broadcasts)"""
+    for name in ('max_speed', 'braking_distance', 'sample_period', 'margin'):
+        monkeypatch.setattr(app.stopping, name, getattr(app.stopping, name))
+    sent = []
+    monkeypatch.setattr(app, 'broadcast', lambda event, data: sent.append((event, data)))
+    path = tmp_path / 'autocar-config.json'
+
+    def write(values):
+        path.write_text(json.dumps(values))
+
+    write({})
+    config = LiveConfig(argv=['--config', str(path)])
+    config.on_change(app.apply_config)
+    return config, write, sent
+
+
+def test_reload_applies_tunables_and_sends_input_settings(reload):
+    config, write, sent = reload
+    write({'stop_margin': 20.0, 'web_input_rate': 30})
+    assert sorted(config.reload()) == ['stop_margin', 'web_input_rate']
+    assert app.stopping.margin == 20.0
+    assert [(event, data['rate']) for event, data in sent] == [('input_config', 30)]
+
+
+def test_reload_without_input_settings_sends_nothing(reload):
+    config, write, sent = reload
+    write({'stop_margin': 15.0})
+    assert config.reload() == ['stop_margin']
+    assert app.stopping.margin == 15.0
+    assert sent == []
+
+
+"""
+
+Reference:
+    pytest monkeypatch: https://docs.pytest.org/en/stable/how-to/monkeypatch.html
+    pytest tmp_path: https://docs.pytest.org/en/stable/how-to/tmp_path.html
+
+"""
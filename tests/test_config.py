@@ -0,0 +1,109 @@
+"""
+Settings from every source in autocar/config.py and LiveConfig reloading the tunable ones.
+"""
+
+import json
+
+import pytest
+
+from autocar.config import FIELDS_BY_NAME, ConfigError, LiveConfig, resolve
+
+
+def test_sources_in_order(tmp_path):
+    path = tmp_path / 'car.json'
+    path.write_text(json.dumps({'deadzone': 80, 'joystick_speed': 70, 'port': 6000}))
+    config = resolve(argv=['--deadzone', '60'], defaults={'deadzone': 90, 'baud': 115200, 'port': 5500},
+                     path=str(path), environ={'AUTOCAR_JOYSTICK_SPEED': '40'})
+    assert config.deadzone == 60           # command line over everything
+    assert config.joystick_speed == 40     # environment over the file
+    assert config.port == 6000             # file over the script's defaults
+    assert config.baud == 115200           # script's defaults over the field default
+    assert config.web_port == FIELDS_BY_NAME['web_port'].default
+
+
+def test_values_converted_to_the_field_type():
+    config = resolve(argv=['--motor-left', '5,6', '--binary'],
+                     environ={'AUTOCAR_FORWARD_SPEED': '0.8', 'AUTOCAR_SONAR_FIXED': 'none'})
+    assert config.motor_left == (5, 6)
+    assert config.binary is True
+    assert config.forward_speed == 0.8
+    assert config.sonar_fixed is None
+
+
+@pytest.mark.parametrize('environ, message', [
+    ({'AUTOCAR_DEADZONE': '600'}, 'above the maximum'),
+    ({'AUTOCAR_DEADZONE': '1.5'}, 'deadzone'),
+    ({'AUTOCAR_NAVIGATION': 'wander'}, 'not one of'),
+    ({'AUTOCAR_BINARY': 'maybe'}, 'not true or false'),
+    ({'AUTOCAR_PORT': ''}, 'a value is required'),
+])
+def test_bad_values_name_the_setting_and_source(environ, message):
+    with pytest.raises(ConfigError, match=message) as e:
+        resolve(environ=environ)
+    assert 'from environment' in str(e.value)
+
+
+def test_unknown_setting_in_file(tmp_path):
+    path = tmp_path / 'car.json'
+    path.write_text(json.dumps({'deadzon': 80}))
+    with pytest.raises(ConfigError, match='unknown settings deadzon'):
+        resolve(path=str(path), environ={})
+
+
+@pytest.fixture
+def live(tmp_path):
+    """LiveConfig on a file, (config, writer, calls to its callback)"""
+    path = tmp_path / 'car.json'
+
+    def write(values):
+        path.write_text(json.dumps(values))
+
+    write({'deadzone': 100})
+    config = LiveConfig(argv=['--config', str(path)])
+    calls = []
+    config.on_change(lambda old, new, changed: calls.append((old.deadzone, new.deadzone, changed)))
+    return config, write, calls
+
+
+def test_reload_applies_tunable_values(live):
+    config, write, calls = live
+    write({'deadzone': 120})
+    assert config.reload() == ['deadzone']
+    assert config.current.deadzone == 120
+    assert calls == [(100, 120, ['deadzone'])]
+
+
+def test_reload_keeps_frozen_values_until_restart(live, capsys):
+    config, write, calls = live
+    write({'deadzone': 100, 'port': 6000})
+    assert config.reload() == []
+    assert config.current.port == 5005
+    assert calls == []
+    assert 'restart to apply port' in capsys.readouterr().out
+
+
+def test_reload_ignores_a_bad_file(live, capsys):
+    config, write, calls = live
+    write({'deadzone': -1})
+    assert config.reload() == []
+    assert config.current.deadzone == 100
+    assert calls == []
+    assert 'reload ignored' in capsys.readouterr().out
+
+
+def test_reload_keeps_the_command_line_on_top(tmp_path):
+    path = tmp_path / 'car.json'
+    path.write_text(json.dumps({}))
+    config = LiveConfig(argv=['--config', str(path), '--deadzone', '50'])
+    path.write_text(json.dumps({'deadzone': 120}))
+    assert config.reload() == []
+    assert config.current.deadzone == 50
+
+
+"""
+
+Reference:
+    pytest parametrize: https://docs.pytest.org/en/stable/how-to/parametrize.html
+    pytest tmp_path: https://docs.pytest.org/en/stable/how-to/tmp_path.html
+
+"""
@@ -0,0 +1,79 @@
+"""
+Binary frames of the HW-504 link (autocar/framing.py): encode/decode round trip,
+streams cut anywhere, and resynchronising after corrupted bytes.
+"""
+
+from autocar.framing import SAMPLE, SENDING_OFF, SENDING_ON, SYNC, Decoder, crc8, encode, parse_line
+
+
+def stream(count):
+    frames = [(SAMPLE, i * 97 % 1024, 1023 - i * 31 % 1024, i % 2) for i in range(count)]
+    return frames, b''.join(encode(kind, i, x, y, sw) for i, (kind, x, y, sw) in enumerate(frames))
+
+
+def test_crc8_check_value():
+    assert crc8(b'123456789') == 0xF4   # CRC-8/SMBUS check value
+
+
+def test_round_trip():
+    frames = [(SAMPLE, 0, 0, 0), (SAMPLE, 1023, 1023, 1), (SAMPLE, 512, 3, 1),
+              (SENDING_ON, 0, 0, 0), (SENDING_OFF, 0, 0, 0)]
+    data = b''.join(encode(kind, seq, x, y, sw) for seq, (kind, x, y, sw) in enumerate(frames))
+    decoder = Decoder()
+    assert decoder.feed(data) == frames
+    assert decoder.stats == {'frames': 5, 'bad_crc': 0, 'skipped_bytes': 0, 'lost_frames': 0}
+
+
+def test_frame_sizes():
+    assert len(encode(SAMPLE, 0, 512, 512, 0)) == 6
+    assert len(encode(SENDING_ON)) == 3
+
+
+def test_stream_cut_at_every_byte():
+    frames, data = stream(20)
+    decoder = Decoder()
+    decoded = []
+    for i in range(len(data)):
+        decoded += decoder.feed(data[i:i + 1])
+    assert decoded == frames
+    assert decoder.buffer == bytearray()
+
+
+def test_corrupted_byte_costs_only_its_frame():
+    frames, data = stream(4)
+    data = bytearray(data)
+    data[6 + 3] ^= 0x10   # a payload byte of the second frame
+    decoder = Decoder()
+    assert decoder.feed(bytes(data)) == [frames[0]] + frames[2:]
+    assert decoder.stats['bad_crc'] == 1
+    assert decoder.stats['lost_frames'] == 1
+
+
+def test_resync_after_noise_and_stray_sync_bytes():
+    frames, data = stream(3)
+    noise = bytes([0x00, SYNC, 0xFF, SYNC, SYNC, 0x13])
+    decoder = Decoder()
+    assert decoder.feed(noise + data) == frames
+    assert decoder.stats['skipped_bytes'] >= len(noise) - 1
+
+
+def test_lost_frames_counted_across_seq_wrap():
+    decoder = Decoder()
+    decoder.feed(encode(SAMPLE, 14))
+    decoder.feed(encode(SAMPLE, 2))   # 15, 0 and 1 never arrived
+    assert decoder.stats['lost_frames'] == 3
+
+
+def test_parse_line():
+    assert parse_line(b'X:512|Y:1023|SW:0\r\n') == (512, 1023, 0)
+    assert parse_line(b'X:1024|Y:0|SW:1') is None
+    assert parse_line(b'X:51|Y:10') is None
+
+
+"""
+
+Reference:
+    CRC-8/SMBUS check value: https://reveng.sourceforge.io/crc-catalogue/1-15.htm#crc.cat.crc-8-smbus
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
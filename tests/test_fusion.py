@@ -0,0 +1,84 @@
+"""
+Fused IR and ultrasonic obstacle estimates in autocar/fusion.py.
+"""
+
+from autocar.fusion import ObstacleFusion
+
+CLEAR = (1, 1)   # car.ir(): 0 means obstacle
+
+
+def test_near_echoes_block_after_driving_closer():
+    fusion = ObstacleFusion()
+    fusion.observe(90, 23.5, CLEAR, 0.0)
+    assert not fusion.blocked(30, 0.0)
+    fusion.advance(1.0)
+    fusion.observe(90, 22.4, CLEAR, 0.02)
+    assert fusion.blocked(30, 0.02)
+    assert fusion.front(30, 0.02).distance == 23.5   # median of the raw readings
+
+
+def test_one_spurious_echo_is_not_enough():
+    fusion = ObstacleFusion()
+    for i in range(5):
+        fusion.observe(90, 100.0, CLEAR, i * 0.02)
+    fusion.observe(90, 12.0, CLEAR, 0.1)
+    assert not fusion.blocked(30, 0.1)
+    fusion.observe(90, 12.0, CLEAR, 0.12)
+    assert fusion.blocked(30, 0.12)
+
+
+def test_blocked_ir_stops_whatever_the_echoes():
+    fusion = ObstacleFusion()
+    for i in range(5):
+        fusion.observe(90, 100.0, (1, 0), i * 0.02)
+    assert fusion.blocked(30, 0.08)
+    assert fusion.estimate(90 + 25, 30, 0.08).probability > fusion.estimate(90 - 25, 30, 0.08).probability
+
+
+def test_evidence_fades_with_age():
+    fusion = ObstacleFusion(memory=0.5)
+    fusion.observe(90, 20.0, CLEAR, 0.0)
+    fusion.observe(90, 20.0, CLEAR, 0.02)
+    fresh = fusion.front(30, 0.02)
+    old = fusion.front(30, 5.0)
+    assert fresh.probability > old.probability
+    assert fresh.confidence > old.confidence
+    assert old.age == 4.98
+
+
+def test_unseen_sector_has_prior_and_no_confidence():
+    fusion = ObstacleFusion()
+    estimate = fusion.estimate(0, 30, 0.0)
+    assert estimate.probability == fusion.prior
+    assert estimate.confidence == 0
+    assert estimate.age is None and estimate.distance is None
+    assert len(fusion.sectors_estimate(30, 0.0)) == 180 // fusion.sector_size + 1
+
+
+def test_rotate_moves_readings_and_forgets_the_ir():
+    fusion = ObstacleFusion()
+    fusion.observe(45, 20.0, CLEAR, 0.0)
+    fusion.observe(90, 50.0, CLEAR, 0.0)
+    fusion.rotate(-45)   # turned left, what was on the left is now ahead
+    assert fusion.estimate(90, 30, 0.0).distance == 20.0
+    assert fusion.estimate(135, 30, 0.0).distance == 50.0
+    assert fusion.ir is None
+    fusion.rotate(-90)   # the far one goes beyond 180 degrees, out of sight
+    assert list(fusion.sectors) == [180]
+
+
+def test_clear():
+    fusion = ObstacleFusion()
+    fusion.observe(90, 10.0, (0, 0), 0.0)
+    fusion.clear()
+    assert fusion.sectors == {} and fusion.ir is None
+    assert not fusion.blocked(30, 0.0)
+
+
+"""
+
+Reference:
+    Log-odds (binary Bayes filter) sensor fusion, Thrun, Burgard & Fox, Probabilistic Robotics, ch. 4.2
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
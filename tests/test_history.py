@@ -0,0 +1,106 @@
+"""
+The sensor history ring buffer and its downsampling in autocar/history.py.
+"""
+
+import numpy as np
+import pytest
+
+from autocar.history import History, lttb, minmax
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def filled(n, capacity=100):
+    """History with n ticks, one every 0.1 s, distance = tick number"""
+    clock = Clock()
+    history = History(('distance', 'ir_left'), capacity=capacity, clock=clock)
+    for i in range(n):
+        clock.now = i * 0.1
+        history.append({'distance': float(i), 'ir_left': i % 2})
+    return history
+
+
+def test_ring_overwrites_the_oldest_rows():
+    history = filled(130)
+    assert len(history) == 100
+    assert history.latest('distance', 3).tolist() == [127.0, 128.0, 129.0]
+    assert history.latest('distance', 500)[0] == 30.0
+
+
+def test_missing_channels_are_left_out():
+    clock = Clock()
+    history = History(('distance', 'ir_left'), capacity=10, clock=clock)
+    history.append({'distance': 5.0})
+    clock.now = 0.1
+    history.append({'distance': 6.0, 'ir_left': 1})
+    series = history.window(points=10)['series']
+    assert series['distance']['v'] == [5.0, 6.0]
+    assert series['ir_left']['v'] == [1.0]
+
+
+def test_window_of_the_last_seconds():
+    history = filled(100)
+    window = history.window(seconds=1.0, points=100, channels=['distance'])
+    assert window['samples'] == 11
+    assert window['series']['distance']['v'] == [float(i) for i in range(89, 100)]
+    assert window['series']['distance']['t'] == [i * 100 for i in range(11)]
+    assert list(window['series']) == ['distance']
+
+
+def test_window_reduced_to_about_points():
+    history = filled(100)
+    for method in ('minmax', 'lttb'):
+        window = history.window(points=20, method=method)
+        assert window['method'] == method
+        assert window['samples'] == 100
+        assert 2 <= len(window['series']['distance']['v']) <= 20
+
+
+def test_window_checks_its_arguments():
+    history = filled(10)
+    with pytest.raises(ValueError, match='method'):
+        history.window(method='mean')
+    with pytest.raises(ValueError, match='channels'):
+        history.window(channels=['speed'])
+
+
+def test_minmax_keeps_spikes_in_time_order():
+    v = np.full(1000, 200.0)
+    v[537] = 3.0
+    v[100] = 400.0
+    t = np.arange(1000, dtype=np.float64)
+    keep = minmax(t, v, 40)
+    assert len(keep) <= 40
+    assert 537 in keep and 100 in keep
+    assert (np.diff(keep) > 0).all()
+
+
+def test_minmax_short_range_unchanged():
+    v = np.arange(10, dtype=np.float64)
+    assert minmax(v, v, 40).tolist() == list(range(10))
+
+
+def test_lttb_keeps_the_ends_and_the_peak():
+    t = np.arange(500, dtype=np.float64)
+    v = np.zeros(500)
+    v[250] = 100.0
+    keep = lttb(t, v, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 499
+    assert 250 in keep
+    assert (np.diff(keep) > 0).all()
+
+
+"""
+
+Reference:
+    Largest-Triangle-Three-Buckets, S. Steinarsson 2013: https://skemman.is/handle/1946/15343
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
@@ -0,0 +1,94 @@
+"""
+Timing histograms, counters and the frame clock in autocar/instrument.py.
+"""
+
+import threading
+
+from autocar.instrument import Counter, FrameClock, Histogram, Instruments
+
+
+def test_bucket_value_within_precision():
+    histogram = Histogram()
+    for us in (1, 31, 32, 100, 1000, 12345, 987654, 59_000_000):
+        value = histogram._value(histogram._index(us))
+        assert abs(value - us) <= us / 2 ** histogram.sub_bits
+
+
+def test_snapshot_percentiles_in_milliseconds():
+    histogram = Histogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+    snapshot = histogram.snapshot()
+    assert snapshot['count'] == 100
+    assert snapshot['mean'] == 50.5
+    assert snapshot['max'] == 100.0
+    assert abs(snapshot['p50'] - 50) <= 50 / 16
+    assert abs(snapshot['p99'] - 99) <= 99 / 16
+    assert snapshot['p99'] <= snapshot['max']
+
+
+def test_empty_and_reset():
+    histogram = Histogram()
+    assert histogram.snapshot() == {'count': 0}
+    histogram.record(0.01)
+    histogram.reset()
+    assert histogram.snapshot() == {'count': 0}
+
+
+def test_values_clamped_to_range():
+    histogram = Histogram(max_seconds=1.0)
+    histogram.record(-1)
+    histogram.record(5)
+    snapshot = histogram.snapshot()
+    assert snapshot['count'] == 2
+    assert snapshot['max'] == 1000.0
+
+
+def test_no_lost_records_across_threads():
+    histogram, counter = Histogram(), Counter()
+
+    def work():
+        for _ in range(1000):
+            histogram.record(0.001)
+            counter.add()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert histogram.snapshot()['count'] == 8000
+    assert counter.value == 8000
+
+
+def test_instruments_snapshot():
+    stats = Instruments()
+    stats.record('sensor_read', 0.002)
+    with stats.timer('parse'):
+        pass
+    stats.count('emits.status', 3)
+    loop = stats.loop('control', period=0.02)
+    loop.tick()
+    loop.tick()
+    snapshot = stats.snapshot()
+    assert sorted(snapshot['histograms_ms']) == ['control.jitter', 'control.period', 'parse', 'sensor_read']
+    assert snapshot['histograms_ms']['control.period']['count'] == 1
+    assert snapshot['counters'] == {'emits.status': 3}
+    assert stats.histogram('parse') is stats.histograms['parse']
+
+
+def test_frame_clock_relative_to_fastest_frame():
+    clock = FrameClock()
+    assert clock.transit(1000, 101.005) == 0
+    assert abs(clock.transit(1100, 101.110) - 0.005) < 1e-9
+    assert clock.transit(1200, 101.203) == 0   # faster frame, new offset
+    assert abs(clock.transit(1300, 101.305) - 0.002) < 1e-9
+
+
+"""
+
+Reference:
+    HdrHistogram bucket layout: http://hdrhistogram.org/
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
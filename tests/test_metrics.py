@@ -0,0 +1,67 @@
+"""
+Prometheus text rendering of the instruments in autocar/metrics.py.
+"""
+
+from autocar.instrument import Instruments
+from autocar.metrics import render
+
+
+def test_counters_with_and_without_labels():
+    stats = Instruments()
+    stats.count('motor_commands.forward', 2)
+    stats.count('motor_commands.left')
+    stats.count('frames.dropped', 4)
+    lines = render(stats).splitlines()
+    assert 'autocar_motor_commands_total{direction="forward"} 2' in lines
+    assert 'autocar_motor_commands_total{direction="left"} 1' in lines
+    assert 'autocar_frames_dropped_total 4' in lines
+    assert lines.count('# TYPE autocar_motor_commands_total counter') == 1
+
+
+def test_histogram_as_summary_in_seconds():
+    stats = Instruments()
+    for _ in range(10):
+        stats.record('sensor_loop.period', 0.1)
+    lines = render(stats).splitlines()
+    assert '# TYPE autocar_sensor_loop_period_seconds summary' in lines
+    assert 'autocar_sensor_loop_period_seconds_count 10' in lines
+    quantile = [line for line in lines if line.startswith('autocar_sensor_loop_period_seconds{quantile="0.5"}')]
+    assert len(quantile) == 1 and abs(float(quantile[0].split()[-1]) - 0.1) < 0.1 / 16
+    total = [line for line in lines if line.startswith('autocar_sensor_loop_period_seconds_sum')]
+    assert abs(float(total[0].split()[-1]) - 1.0) < 1e-6
+
+
+def test_labelled_histogram_keeps_label_with_quantile():
+    stats = Instruments()
+    stats.record('emits.status', 0.002)
+    output = render(stats)
+    assert 'autocar_emits_seconds{event="status",quantile="0.5"}' in output
+    assert 'autocar_emits_seconds_count{event="status"} 1' in output
+
+
+def test_empty_histogram_has_no_quantiles():
+    stats = Instruments()
+    stats.histogram('parse')
+    lines = render(stats).splitlines()
+    assert 'autocar_parse_seconds_count 0' in lines
+    assert 'autocar_parse_seconds_sum 0.000000' in lines
+    assert not any('quantile' in line for line in lines)
+
+
+def test_gauges_read_at_scrape_and_failing_ones_left_out():
+    def broken():
+        raise RuntimeError('not up yet')
+
+    output = render(Instruments(), gauges={'clients': lambda: 3, 'battery': broken})
+    assert 'autocar_clients 3.0\n' in output
+    assert '# TYPE autocar_battery gauge' in output
+    assert not any(line.startswith('autocar_battery') for line in output.splitlines())
+
+
+"""
+
+Reference:
+    Exposition format: https://prometheus.io/docs/instrumenting/exposition_formats/
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
@@ -0,0 +1,80 @@
+"""
+ServoModel and point_servo (autocar/servo.py): waits sized to the move, clamped angles,
+tolerant loading and atomic saving of the calibration.
+"""
+
+import json
+
+import pytest
+
+from autocar.servo import ServoModel, point_servo
+
+
+class FakeCar:
+
+    def __init__(self, angle=90):
+        self.servo_angle = angle
+        self.slept = []
+
+    def servo(self, deg):
+        self.servo_angle = max(0, min(180, deg))
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+
+
+def test_wait_follows_the_size_of_the_move():
+    model = ServoModel(slew=0.002, settle=0.03)
+    car = FakeCar(90)
+    point_servo(car, 135, model)
+    point_servo(car, 135, model)
+    assert car.slept == [pytest.approx(0.12), pytest.approx(0.03)]
+
+
+@pytest.mark.parametrize('angle, end', [(100000, 180), (-500, 0), (180.0, 180.0)])
+def test_out_of_range_angle_waits_for_the_clamped_move(angle, end):
+    model = ServoModel(slew=0.002, settle=0.03)
+    car = FakeCar(90)
+    point_servo(car, angle, model)
+    assert car.servo_angle == end
+    assert car.slept == [pytest.approx(model.move_time(90))]
+
+
+def test_trigger_delay_and_sweep_time():
+    model = ServoModel(slew=0.002, settle=0.03, trigger_lead=0.01)
+    assert model.trigger_delay(-10) == pytest.approx(0.04)
+    assert ServoModel(slew=0.0, settle=0.005, trigger_lead=0.01).trigger_delay(5) == 0.0
+    assert model.sweep_time([90, 0, 180]) == pytest.approx(0.02 + 0.2 + 0.38)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'servo-calibration.json')
+    ServoModel(slew=0.0031, settle=0.045, trigger_lead=0.012).save(path)
+    loaded = ServoModel(path=path)
+    assert (loaded.slew, loaded.settle, loaded.trigger_lead) == (0.0031, 0.045, 0.012)
+    assert [p.name for p in tmp_path.iterdir()] == ['servo-calibration.json']
+
+
+@pytest.mark.parametrize('content', ['{"slew": 0.003', '{"settle": 0.04}', '{"slew": -1, "settle": 0.04}',
+                                     '{"slew": "fast", "settle": 0.04}', '[]'])
+def test_unreadable_calibration_keeps_the_defaults(tmp_path, content):
+    path = tmp_path / 'servo-calibration.json'
+    path.write_text(content)
+    model = ServoModel(slew=0.002, settle=0.03, trigger_lead=0.01, path=str(path))
+    assert (model.slew, model.settle, model.trigger_lead) == (0.002, 0.03, 0.01)
+
+
+def test_partial_calibration_keeps_trigger_lead(tmp_path):
+    path = tmp_path / 'servo-calibration.json'
+    path.write_text(json.dumps({'slew': 0.004, 'settle': 0.05}))
+    model = ServoModel(trigger_lead=0.02, path=str(path))
+    assert (model.slew, model.settle, model.trigger_lead) == (0.004, 0.05, 0.02)
+
+
+"""
+
+Reference:
+    SG90 datasheet (operating speed 0.1 s/60 degrees): http://www.ee.ic.ac.uk/pcheung/teaching/DE1_EE/stores/sg90_datasheet.pdf
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
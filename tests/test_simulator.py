@@ -0,0 +1,31 @@
+"""
+The simulator's strategy table as a regression test: at the rate each script's driving
+loop runs, the navigation it uses by default must not collide more than the other one.
+"""
+
+import pytest
+
+from autocar.simulator import SCRIPT_NAVIGATION, check, compare
+
+LOOPS = [('simulator default', 'reactive', 0.02)] + [(script, navigation, period)
+                                                     for script, (navigation, period) in SCRIPT_NAVIGATION.items()]
+
+
+@pytest.mark.parametrize('script, navigation, period', LOOPS, ids=[loop[0] for loop in LOOPS])
+def test_default_navigation_collides_no_more_than_the_other(script, navigation, period):
+    summary = compare(['sweep', 'reactive'], seeds=20, duration=60.0, obstacles=10, period=period)
+    assert check(summary, navigation) == []
+
+
+def test_check_reports_the_navigation_colliding_more():
+    summary = {'sweep': {'collisions': 0.1}, 'reactive': {'collisions': 0.25}}
+    assert check(summary) == ["reactive collides more than sweep: 0.25 against 0.1 per run"]
+    assert check(summary, 'sweep') == []
+
+
+"""
+
+Reference:
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
@@ -0,0 +1,95 @@
+"""
+Snapshot.since() (autocar/snapshot.py): the full state on a first connect, only the
+missed events when a client resumes, and the full state again when it cannot.
+"""
+
+from autocar.snapshot import Snapshot
+
+
+def names(result):
+    return [event for event, _ in result['events']]
+
+
+def filled():
+    snapshot = Snapshot()
+    snapshot.record('robot_state', {'mode': 'manual'})
+    snapshot.record('sweep_start', {})
+    snapshot.record('sweep_data', {'angle': 0, 'distance': 40})
+    snapshot.record('sweep_data', {'angle': 10, 'distance': 55})
+    snapshot.record('status', {'message': 'sweep done'})
+    snapshot.record('sensor_update', {'distance': 42})
+    return snapshot
+
+
+def test_first_connect_gets_full_state_in_version_order():
+    result = filled().since()
+    assert result['full'] is True
+    assert result['version'] == 6
+    assert names(result) == ['robot_state', 'sweep_start', 'sweep_data', 'sweep_data', 'status', 'sensor_update']
+    versions = [data['v'] for _, data in result['events']]
+    assert versions == sorted(versions)
+
+
+def test_resume_gets_only_what_changed():
+    snapshot = filled()
+    epoch, version = snapshot.epoch, snapshot.version
+    snapshot.record('status', {'message': 'autonomous'})
+    snapshot.record('robot_state', {'mode': 'autonomous'})
+    result = snapshot.since(epoch, version)
+    assert result['full'] is False
+    assert names(result) == ['status', 'robot_state']
+    assert result['events'][1][1] == {'mode': 'autonomous', 'v': 8}
+    assert snapshot.resumed == 1
+
+
+def test_resume_when_up_to_date_is_empty():
+    snapshot = filled()
+    result = snapshot.since(snapshot.epoch, snapshot.version)
+    assert result['full'] is False
+    assert result['events'] == []
+
+
+def test_only_newest_latest_event_is_kept():
+    snapshot = Snapshot()
+    snapshot.record('sensor_update', {'distance': 10})
+    snapshot.record('sensor_update', {'distance': 20})
+    assert snapshot.since()['events'] == [['sensor_update', {'distance': 20, 'v': 2}]]
+
+
+def test_new_sweep_replaces_the_previous_one():
+    snapshot = filled()
+    snapshot.record('sweep_start', {})
+    snapshot.record('sweep_data', {'angle': 90, 'distance': 70})
+    events = names(snapshot.since())
+    assert events.count('sweep_start') == 1
+    assert events.count('sweep_data') == 1
+
+
+def test_cannot_resume_gets_full_state():
+    snapshot = filled()
+    for epoch, version in ((snapshot.epoch, None), ('00000000', 3), (snapshot.epoch, '3'),
+                           (snapshot.epoch, snapshot.version + 1)):
+        result = snapshot.since(epoch, version)
+        assert result['full'] is True, (epoch, version)
+    assert snapshot.full_sent == 4
+
+
+def test_log_overflow_falls_back_to_full_state():
+    snapshot = Snapshot(statuses=2, log=3)
+    epoch = snapshot.epoch
+    for i in range(5):
+        snapshot.record('status', {'message': str(i)})
+    assert snapshot.since(epoch, 1)['full'] is True
+    resumed = snapshot.since(epoch, 4)
+    assert resumed['full'] is False
+    assert [data['message'] for _, data in resumed['events']] == ['4']
+    assert [data['message'] for _, data in snapshot.since()['events']] == ['3', '4']
+
+
+"""
+
+Reference:
+    Socket.IO connection state recovery: https://socket.io/docs/v4/connection-state-recovery
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
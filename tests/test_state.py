@@ -0,0 +1,71 @@
+"""
+Copy-on-write robot state and its subscribers in autocar/state.py.
+"""
+
+import threading
+
+import pytest
+
+from autocar.state import RobotState, StateStore
+
+
+def test_state_is_read_only_and_checks_fields():
+    state = RobotState(mode='autonomous')
+    assert state.mode == 'autonomous' and state.speed == 50
+    with pytest.raises(AttributeError):
+        state.speed = 80
+    with pytest.raises(TypeError, match='sped'):
+        RobotState(sped=80)
+    assert set(state.as_dict()) == set(RobotState.PUBLIC)
+
+
+def test_update_publishes_a_new_version():
+    store = StateStore()
+    before = store.current
+    assert store.update(speed=80, mode='manual') == ('speed',)
+    assert store.current.speed == 80 and store.current.version == 1
+    assert before.speed == 50 and before.version == 0   # readers holding the old state keep it whole
+
+
+def test_update_without_change_is_dropped():
+    store = StateStore()
+    calls = []
+    store.subscribe(lambda old, new, changed: calls.append(changed))
+    assert store.update(speed=50) == ()
+    assert store.current.version == 0
+    assert calls == []
+
+
+def test_subscribers_filtered_by_field():
+    store = StateStore()
+    every, modes = [], []
+    store.subscribe(lambda old, new, changed: every.append(changed))
+    store.subscribe(lambda old, new, changed: modes.append((old.mode, new.mode)), fields=('mode',))
+    store.update(speed=30)
+    store.update(mode='autonomous', speed=40)
+    assert every == [('speed',), ('mode', 'speed')]
+    assert modes == [('manual', 'autonomous')]
+
+
+def test_no_lost_updates_across_threads():
+    store = StateStore()
+
+    def work():
+        for _ in range(500):
+            store.update(ultrasonic_distance=object())   # always a change
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.current.version == 2000
+
+
+"""
+
+Reference:
+    Copy-on-write: https://en.wikipedia.org/wiki/Copy-on-write
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
@@ -0,0 +1,137 @@
+"""
+Supervisor (autocar/tasks.py): one task per name, 'ignore' and 'replace' policies,
+and cancellation that wakes a sleeping task at once.
+"""
+
+import threading
+import time
+
+from autocar import tasks
+from autocar.tasks import Supervisor
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def sleeper(started, seconds=10.0):
+    started.set()
+    tasks.sleep(seconds)
+
+
+def test_ignore_refuses_a_second_start():
+    supervisor = Supervisor()
+    started = threading.Event()
+    first = supervisor.start('sweep', sleeper, started)
+    assert started.wait(1.0)
+    assert supervisor.start('sweep', sleeper, threading.Event()) is None
+    assert supervisor.running('sweep')
+    assert supervisor.cancel('sweep', timeout=1.0)
+    assert first.outcome == 'cancelled'
+
+
+def test_cancel_wakes_a_sleeping_task_at_once():
+    supervisor = Supervisor()
+    started = threading.Event()
+    task = supervisor.start('turn', sleeper, started, 30.0)
+    assert started.wait(1.0)
+    before = time.monotonic()
+    assert supervisor.cancel('turn', timeout=1.0)
+    assert time.monotonic() - before < 0.5
+    assert task.outcome == 'cancelled'
+    assert not supervisor.running('turn')
+
+
+def test_replace_cancels_the_running_one_first():
+    supervisor = Supervisor()
+    active = []
+    overlaps = []
+    lock = threading.Lock()
+
+    def drive(started):
+        with lock:
+            overlaps.append(len(active))
+            active.append(started)
+        started.set()
+        try:
+            tasks.sleep(10.0)
+        finally:
+            with lock:
+                active.remove(started)
+
+    first_started, second_started = threading.Event(), threading.Event()
+    first = supervisor.start('autonomous', drive, first_started, policy='replace')
+    assert first_started.wait(1.0)
+    second = supervisor.start('autonomous', drive, second_started, policy='replace')
+    assert second_started.wait(1.0)
+    assert first.outcome == 'cancelled'
+    assert overlaps == [0, 0]   # never both at once
+    assert supervisor.tasks['autonomous'] is second
+    supervisor.cancel_all(timeout=1.0)
+    assert second.outcome == 'cancelled'
+
+
+def test_start_after_cancel_is_not_refused():
+    supervisor = Supervisor()
+    started = threading.Event()
+    supervisor.start('sweep', sleeper, started)
+    assert started.wait(1.0)
+    supervisor.cancel('sweep', timeout=0)
+    again = threading.Event()
+    assert supervisor.start('sweep', sleeper, again) is not None
+    assert again.wait(1.0)
+    supervisor.cancel_all(timeout=1.0)
+
+
+def test_outcomes_in_status():
+    supervisor = Supervisor()
+
+    def fails():
+        raise ValueError("broken sensor")
+
+    def swallows(started):
+        # Cancelled is a BaseException, the loops' except Exception does not catch it
+        started.set()
+        while True:
+            try:
+                tasks.sleep(10.0)
+            except Exception:
+                pass
+
+    supervisor.start('done', lambda: None)
+    supervisor.start('failed', fails)
+    started = threading.Event()
+    supervisor.start('loop', swallows, started)
+    assert started.wait(1.0)
+    assert supervisor.cancel('loop', timeout=1.0)
+    wait_for(lambda: not supervisor.tasks)
+    outcomes = {task['name']: task['outcome'] for task in supervisor.status()['finished']}
+    assert outcomes == {'done': 'done', 'failed': 'failed', 'loop': 'cancelled'}
+
+
+def test_track_registers_work_running_elsewhere():
+    supervisor = Supervisor()
+    with supervisor.track('sensors') as token:
+        assert supervisor.running('sensors')
+        supervisor.cancel('sensors')
+        assert token.cancelled
+    assert not supervisor.tasks
+    assert supervisor.status()['finished'][0]['outcome'] == 'cancelled'
+
+
+def test_sleep_outside_a_task_is_plain():
+    assert tasks.current() is None
+    tasks.sleep(0.001)
+    tasks.check()
+
+
+"""
+
+Reference:
+    threading.Event: https://docs.python.org/3/library/threading.html#event-objects
+    pytest: https://docs.pytest.org/en/stable/
+
+"""
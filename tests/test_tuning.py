@@ -0,0 +1,36 @@
+"""
+Tuner (autocar/tuning.py): episodes run at the loop period asked for, the receiver's by
+default, and the same candidates score the same.
+"""
+
+from autocar.simulator import SCRIPT_NAVIGATION, run_episode
+from autocar.tuning import DEFAULTS, Tuner, _episode
+
+
+def test_episode_runs_at_the_given_period():
+    settings = {k: v for k, v in DEFAULTS.items() if k not in ('navigation', 'forward_speed')}
+    for period in (0.02, 0.12):
+        _, result = _episode((0, DEFAULTS, 3, 10.0, 10, period))
+        assert result == run_episode(DEFAULTS['navigation'], 3, 10.0, 10, DEFAULTS['forward_speed'], settings,
+                                     period=period)
+
+
+def test_defaults_are_the_receivers():
+    navigation, period = SCRIPT_NAVIGATION['receiver']
+    assert Tuner(workers=1).period == period
+    assert DEFAULTS['navigation'] == navigation
+
+
+def test_scores_are_reproducible():
+    with Tuner(seeds=2, duration=10.0, workers=1) as tuner:
+        first = tuner.run([DEFAULTS, dict(DEFAULTS, forward_speed=0.8)])
+        assert tuner.run([DEFAULTS, dict(DEFAULTS, forward_speed=0.8)]) == first
+    assert tuner.episodes == 8
+
+
+"""
+
+Reference:
+    pytest: https://docs.pytest.org/en/stable/
+
+"""